@@ -1,31 +1,77 @@
 #!/bin/sh
-
-if pgrep -x "retroarch" > /dev/null; then
-    echo "[M-OS] Cerrando RetroArch..."
-    pkill -TERM -x "retroarch"
-    sleep 1
-    pkill -9 -x "retroarch" 2>/dev/null
-fi
+# Cierra las apps registradas en /tmp/open_apps (una línea por app: "pid pgid inicio nombre").
+# SIGTERM a todos los grupos a la vez, espera a que terminen (como mucho TIMEOUT_TICKS x 0.1 s)
+# y recién ahí SIGKILL. Las líneas viejas (sólo un nombre) se buscan por nombre exacto.
 
 FILE="/tmp/open_apps"
+TIMEOUT_TICKS=30
+TARGETS=""      # "-pgid" para grupos, "pid" para procesos sueltos
+
+# starttime (campo 22 de /proc/<pid>/stat), tolerando espacios en el nombre del proceso
+start_of() {
+    [ -r "/proc/$1/stat" ] || return 1
+    set -- $(sed 's/.*) //' "/proc/$1/stat")
+    echo "${20}"
+}
+
+# Vivo = existe y no es un zombi (los zombis los recoge su padre, no hay que matarlos)
+alive() {
+    kill -s 0 -- "$1" 2>/dev/null || return 1
+    case "$1" in
+        -*) members=$(pgrep -g "${1#-}") ;;
+        *) members="$1" ;;
+    esac
+    for p in $members; do
+        set -- $(sed 's/.*) //' "/proc/$p/stat" 2>/dev/null)
+        [ -n "$1" ] && [ "$1" != "Z" ] && return 0
+    done
+    return 1
+}
 
 if [ -f "$FILE" ]; then
-    while read name; do
-        [ -z "$name" ] && continue
+    while read pid pgid start name; do
+        [ -z "$pid" ] && continue
 
-        # Caso especial: waydroid (se queda como estaba)
-        if echo "$name" | grep -qi "waydroid"; then
+        # Caso especial: waydroid se cierra con su propio comando
+        if echo "$pid $name" | grep -qi "waydroid"; then
             echo "[M-OS] Deteniendo sesión de Waydroid..."
-            waydroid session stop
+            waydroid session stop &
             continue
         fi
 
-        for pid in $(pgrep -f "$name"); do
-            [ "$pid" = "$$" ] && continue 
-            echo "[M-OS] Terminando proceso: $pid ($name)"
-            kill -9 "$pid" 2>/dev/null
-        done
+        case "$pid" in
+            *[!0-9]*)
+                for p in $(pgrep -x "$pid"); do TARGETS="$TARGETS $p"; done
+                continue ;;
+        esac
+
+        # Sigue vivo y es el mismo proceso (el pid pudo reciclarse)
+        [ "$(start_of "$pid")" = "$start" ] || continue
+        echo "[M-OS] Terminando grupo: $pgid ($name)"
+        TARGETS="$TARGETS -$pgid"
     done < "$FILE"
 fi
 
-rm -f "$FILE"
\ No newline at end of file
+for pid in $(pgrep -x "retroarch"); do
+    echo "[M-OS] Cerrando RetroArch ($pid)..."
+    TARGETS="$TARGETS $pid"
+done
+
+for t in $TARGETS; do kill -s TERM -- "$t" 2>/dev/null; done
+
+i=0
+while [ -n "$TARGETS" ] && [ $i -lt $TIMEOUT_TICKS ]; do
+    alive=""
+    for t in $TARGETS; do alive "$t" && alive="$alive $t"; done
+    TARGETS="$alive"
+    [ -n "$TARGETS" ] && sleep 0.1
+    i=$((i + 1))
+done
+
+for t in $TARGETS; do
+    echo "[M-OS] Forzando cierre: $t"
+    kill -s KILL -- "$t" 2>/dev/null
+done
+
+wait
+rm -f "$FILE"
@@ -1,39 +1,109 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import time
+_T0 = time.perf_counter()  # inicio del arranque (--profile-startup)
+
+import math
+import bisect
+import abc
+
 import subprocess
 import sys
 import os
-import time
-import socket
+import json
+import select
+import shutil
+import selectors
 import threading
+import importlib.util
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
 import tkinter as tk
 import tkinter.font as tkfont
 
+import mos_control
+import mos_eventbus as bus
+import mos_inotify
+import mos_catalog
+import mos_procs
+
 # ==========================================
 # 📦 IMPORTACIÓN DE LIBRERÍAS OPCIONALES
 # ==========================================
 
-# PIL (Pillow) para imágenes de alta calidad
-try:
-    from PIL import Image, ImageTk
-    HAS_PIL = True
-except ImportError:
-    HAS_PIL = False
+# PIL (Pillow) para imágenes de alta calidad.
+# Sólo se importa al usarla (load_pil): con la caché de arranque tibia ni se carga.
+HAS_PIL = importlib.util.find_spec("PIL") is not None
+Image = ImageTk = None
+
+def load_pil():
+    """Importa PIL la primera vez que hace falta. Devuelve HAS_PIL."""
+    global Image, ImageTk, HAS_PIL
+    if HAS_PIL and Image is None:
+        try:
+            from PIL import Image as _Image, ImageTk as _ImageTk
+            Image, ImageTk = _Image, _ImageTk
+        except ImportError:
+            HAS_PIL = False
+    return HAS_PIL
+
+# pulsectl (cliente nativo de PulseAudio) para seguir el volumen sin forks.
+# Se importa en el hilo del VolumeMonitor la primera vez que arranca (load_pulsectl).
+HAS_PULSECTL = importlib.util.find_spec("pulsectl") is not None
+pulsectl = None
+
+def load_pulsectl():
+    """Importa pulsectl la primera vez que hace falta. Devuelve HAS_PULSECTL."""
+    global pulsectl, HAS_PULSECTL
+    if HAS_PULSECTL and pulsectl is None:
+        try:
+            import pulsectl as _pulsectl
+            pulsectl = _pulsectl
+        except Exception:  # ImportError, u OSError si falta libpulse
+            HAS_PULSECTL = False
+    return HAS_PULSECTL
+
+# jeepney (D-Bus en Python puro) para escuchar NetworkManager y BlueZ.
+# Igual: se importa en el hilo del NetworkWatcher al conectar (load_jeepney).
+HAS_JEEPNEY = importlib.util.find_spec("jeepney") is not None
+DBusAddress = HeaderFields = MatchRule = Properties = message_bus = new_method_call = None
+open_dbus_connection = None
+
+def load_jeepney():
+    """Importa jeepney la primera vez que hace falta. Devuelve HAS_JEEPNEY."""
+    global DBusAddress, HeaderFields, MatchRule, Properties, message_bus, new_method_call
+    global open_dbus_connection, HAS_JEEPNEY
+    if HAS_JEEPNEY and open_dbus_connection is None:
+        try:
+            from jeepney import (DBusAddress as _DBusAddress, HeaderFields as _HeaderFields,
+                                 MatchRule as _MatchRule, Properties as _Properties,
+                                 message_bus as _message_bus, new_method_call as _new_method_call)
+            from jeepney.io.blocking import open_dbus_connection as _open_dbus_connection
+        except ImportError:
+            HAS_JEEPNEY = False
+            return False
+        DBusAddress, HeaderFields, MatchRule, Properties = _DBusAddress, _HeaderFields, _MatchRule, _Properties
+        message_bus, new_method_call = _message_bus, _new_method_call
+        open_dbus_connection = _open_dbus_connection
+    return HAS_JEEPNEY
 
-# EVDEV para soporte de Joystick
+# EVDEV para soporte de Joystick (fallback sin daemon).
+# Igual que PIL: se importa recién cuando arranca el hilo de mandos (load_evdev).
 ENABLE_JOYSTICK = True
-HAS_EVDEV = False
+HAS_EVDEV = ENABLE_JOYSTICK and importlib.util.find_spec("evdev") is not None
+InputDevice = ecodes = list_devices = None
 
-if ENABLE_JOYSTICK:
-    try:
-        from evdev import InputDevice, ecodes, list_devices
-        import selectors
-        HAS_EVDEV = True
-    except ImportError:
-        HAS_EVDEV = False
-    except Exception:
-        HAS_EVDEV = False
+def load_evdev():
+    """Importa evdev la primera vez que hace falta. Devuelve HAS_EVDEV."""
+    global InputDevice, ecodes, list_devices, HAS_EVDEV
+    if HAS_EVDEV and ecodes is None:
+        try:
+            from evdev import InputDevice as _InputDevice, ecodes as _ecodes, list_devices as _list_devices
+            InputDevice, ecodes, list_devices = _InputDevice, _ecodes, _list_devices
+        except Exception:
+            HAS_EVDEV = False
+    return HAS_EVDEV
 
 # ==========================================
 # ⚙️ VARIABLE DE ESTADO GLOBAL
@@ -48,7 +118,37 @@ OVERLAY_VISIBLE = threading.Event()
 # Comportamiento
 WRAP_AROUND = False  # True: vuelve al inicio al bajar del todo
 JOY_NAV_COOLDOWN = 0.15  # Segundos entre movimientos del stick
+JOY_REPEAT_DELAY = 0.35  # Segundos con el stick inclinado antes de empezar a repetir
 JOY_AXIS_THRESHOLD = 18000  # Zona muerta del stick (aprox 50%)
+NAV_FRAME_MS = 16  # La cola de entrada se drena como mucho una vez por frame
+MENU_RENDERER = "widgets"  # "widgets": tarjetas Tk recicladas | "canvas": todo en un Canvas
+BENCH_MENU_COPIES = 10     # --bench-menu: veces que se repite el menú para tener scroll
+
+# Proveedores de estado (textos de las tarjetas)
+STATUS_WORKERS = 3          # Hilos del pool que ejecutan los desc_fn
+ACTION_WORKERS = 2          # Hilos del pool que ejecutan las acciones de las tarjetas
+ACTION_MIN_INTERVAL = 0.016 # Como mucho un comando por canal y por frame (el resto se fusiona)
+ACTION_TIMEOUT = 2.0        # Timeout (s) de cada comando de una acción
+STATUS_TICK_MS = 1000       # Cada cuánto se revisan los TTL (no ejecuta nada si no vencieron)
+SNAPSHOT_MAX_WAIT = 0.15    # Espera máxima (s) por datos frescos al mostrar el overlay
+STARTUP_SNAPSHOT_WAIT = 0.5 # Al arrancar: espera máxima por el primer snapshot antes de sacar el splash
+DEFAULT_PROVIDER_TTL = 5.0  # TTL (s) para proveedores sin entrada en PROVIDER_TTL
+NETWORK_SYNC_WAIT = 0.1     # Espera (s) a que el watcher D-Bus se resincronice tras reanudar
+NETWORK_STALE_MARK = " (sin actualizar)"  # Texto cacheado mientras el watcher se resincroniza
+
+# Planificador
+WAKEUP_WINDOW = 60.0        # Ventana (s) del contador de despertares
+
+# Consumo de las apps lanzadas (sólo con el overlay visible)
+TELEMETRY_MIN = 1.0         # Intervalo (s) mientras los números cambian
+TELEMETRY_MAX = 5.0         # Intervalo (s) máximo con todo quieto
+TELEMETRY_BACKOFF = 1.5     # Factor con el que se alarga el intervalo
+TELEMETRY_CPU_DELTA = 2.0   # Puntos de CPU que cuentan como cambio
+TELEMETRY_RSS_DELTA = 0.05  # Fracción de RSS que cuenta como cambio
+
+# Latencia de apertura (tecla -> ventana pintada)
+LATENCY_DUMP = "/tmp/mos_overlay_latency.json"
+LATENCY_TRACE_TIMEOUT_MS = 1000  # si no llega el <Map>, la traza se descarta
 
 # Actualizaciones OTA
 OTA_STATE_FILE = "/home/ota/state"
@@ -59,6 +159,42 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ASSETS_DIR = os.path.join(BASE_DIR, "assets")
 UID = os.getuid()
 PULSE_SOCKET = f"unix:/run/user/{UID}/pulse/native"
+VOLUME_STEP = 5  # Porcentaje por pulsación de volumen
+SYSFS_ROOT = os.environ.get("MOS_SYSFS_ROOT", "/sys")  # se puede apuntar a un sysfs falso
+BACKLIGHT_MIN_PERCENT = 1  # nunca apagar del todo el panel con los botones
+NIGHT_LIGHT_STATE = "/tmp/nightlight_state"
+NIGHT_LIGHT_TEMP = 3500
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "mos-overlay")
+
+# Volver a ES-DE (pipeline: cerrar apps + regenerar -> lanzar -> esperar que esté listo)
+ES_TEARDOWN_NAMES = ("retroarch", "es-de")  # además de lo registrado, por nombre exacto
+ESDE_COMMAND = ["es-de", "--force-kiosk", "--no-splash", "--no-update-check"]
+STEAM_GAMES_SCRIPT = "/home/muser/ES-DE/scripts/generar_steam_games.sh"
+# Entradas del script: si ninguna cambió desde la última corrida, no se regenera
+STEAM_GAMES_INPUTS = (
+    STEAM_GAMES_SCRIPT,
+    os.path.expanduser("~/.local/share/Steam/steamapps"),
+    os.path.expanduser("~/.local/share/Steam/steamapps/libraryfolders.vdf"),
+    os.path.expanduser("~/.var/app/com.valvesoftware.Steam/.local/share/Steam/steamapps"),
+    os.path.expanduser("~/.var/app/com.valvesoftware.Steam/.local/share/Steam/steamapps/libraryfolders.vdf"),
+)
+STEAM_GAMES_STAMP = os.path.join(CACHE_DIR, "steam_games.json")
+STEAM_GAMES_TIMEOUT = 60.0
+ESDE_LOG = os.path.expanduser("~/ES-DE/logs/es_log.txt")
+ESDE_READY_MARK = "Application startup time"  # ES-DE lo loguea al terminar de arrancar
+ESDE_READY_TIMEOUT = 30.0
+RETURN_ES_REPORT = "/tmp/mos_return_es.json"
+# Si cambia cualquiera de estos directorios (fc-cache, fuentes nuevas) se invalida la caché de arranque
+FONTCONFIG_DIRS = (
+    os.path.expanduser("~/.cache/fontconfig"), "/var/cache/fontconfig",
+    os.path.expanduser("~/.local/share/fonts"), os.path.expanduser("~/.fonts"),
+    "/usr/share/fonts", "/usr/local/share/fonts",
+)
+# Catálogo de apps (mos_catalog): lanzadores + sistemas de apps de ES-DE
+LAUNCHERS_DIR = os.path.join(BASE_DIR, "launchers")
+ES_SYSTEMS_FILE = os.path.join(BASE_DIR, "esde", "es_systems.xml")
+CATALOG_INDEX = os.path.join(CACHE_DIR, "catalog.json")
+CATALOG_DEBOUNCE_MS = 300  # agrupa las ráfagas de inotify (editores, cp de varios .sh)
 
 # Visual
 APP_TITLE = "M-OS Overlay"
@@ -85,6 +221,151 @@ HAS_NERD_FONT = False
 def sc(x: int) -> int: return max(1, int(x * UI_SCALE))
 def fs(x: int) -> int: return max(10, int(x * UI_SCALE))
 
+class WakeupCounter:
+    """Cuenta despertares (timers, hilos, eventos) en una ventana deslizante."""
+
+    def __init__(self, window=WAKEUP_WINDOW):
+        self.window = window
+        self._events = deque()  # (monotonic, origen)
+        self._lock = threading.Lock()
+
+    def note(self, source):
+        now = time.monotonic()
+        with self._lock:
+            self._events.append((now, source))
+            self._prune(now)
+
+    def _prune(self, now):
+        while self._events and (now - self._events[0][0]) > self.window:
+            self._events.popleft()
+
+    def per_minute(self):
+        with self._lock:
+            self._prune(time.monotonic())
+            return len(self._events) * 60.0 / self.window
+
+    def by_source(self):
+        with self._lock:
+            self._prune(time.monotonic())
+            counts = {}
+            for _, src in self._events:
+                counts[src] = counts.get(src, 0) + 1
+            return counts
+
+    def report(self):
+        srcs = ", ".join(f"{k}={v}" for k, v in sorted(self.by_source().items()))
+        return f"wakeups/min={self.per_minute():.1f} [{srcs}]"
+
+WAKEUPS = WakeupCounter()
+
+class LatencyHistogram:
+    """Histograma logarítmico (4 baldes por potencia de 2, en µs): memoria fija."""
+
+    STEPS = 4
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        us = max(1.0, seconds * 1e6)
+        b = int(math.log2(us) * self.STEPS)
+        self.buckets[b] = self.buckets.get(b, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p):
+        """Borde superior (s) del balde donde cae el percentil p."""
+        if not self.count:
+            return None
+        rank = p / 100.0 * self.count
+        seen = 0
+        for b in sorted(self.buckets):
+            seen += self.buckets[b]
+            if seen >= rank:
+                return min(self.max, 2 ** ((b + 1) / self.STEPS) / 1e6)
+        return self.max
+
+    def summary(self):
+        ms = lambda v: None if v is None else round(v * 1000, 3)
+        return {"count": self.count, "mean_ms": ms(self.total / self.count if self.count else None),
+                "p50_ms": ms(self.percentile(50)), "p95_ms": ms(self.percentile(95)),
+                "p99_ms": ms(self.percentile(99)), "max_ms": ms(self.max if self.count else None)}
+
+class LatencyTracker:
+    """Latencia de apertura por tramo, de la tecla (timestamp del kernel) al primer pintado.
+
+    Cada traza es un dict de marcas time.monotonic(); el tramo es la diferencia
+    entre marcas consecutivas presentes (las que el origen no mandó se saltean).
+    """
+
+    STAGES = (
+        ("t_event", "t_read", "kernel_to_daemon"),
+        ("t_read", "t_sent", "daemon"),
+        ("t_sent", "t_recv", "socket"),
+        ("t_recv", "t_shown", "show"),
+        ("t_shown", "t_mapped", "map"),
+        ("t_mapped", "t_painted", "paint"),
+    )
+    ORDER = ("t_event", "t_read", "t_sent", "t_recv", "t_shown", "t_mapped", "t_painted")
+
+    def __init__(self):
+        self.hist = {}
+
+    def record(self, trace):
+        marks = [k for k in self.ORDER if isinstance(trace.get(k), (int, float))]
+        if len(marks) < 2:
+            return
+        names = {(a, b): name for a, b, name in self.STAGES}
+        for a, b in zip(marks, marks[1:]):
+            name = names.get((a, b), f"{a[2:]}_to_{b[2:]}")
+            self.hist.setdefault(name, LatencyHistogram()).add(max(0.0, trace[b] - trace[a]))
+        # El total se separa según desde dónde se midió (tecla, cliente del socket...)
+        self.hist.setdefault(f"total_from_{marks[0][2:]}", LatencyHistogram()).add(
+            max(0.0, trace[marks[-1]] - trace[marks[0]]))
+
+    def summary(self):
+        return {name: h.summary() for name, h in self.hist.items()}
+
+    def dump(self, path=LATENCY_DUMP):
+        data = {"summary": self.summary(),
+                "buckets_us": {name: {f"{2 ** (b / h.STEPS):.0f}": n for b, n in sorted(h.buckets.items())}
+                               for name, h in self.hist.items()}}
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, path)
+        return path
+
+LATENCY = LatencyTracker()
+
+class StartupProfile:
+    """Tiempo de pared de cada fase del arranque. Se reporta con --profile-startup."""
+
+    def __init__(self, t0):
+        self.t0 = self._last = t0
+        self.phases = []  # (fase, segundos)
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self):
+        return {
+            "total_ms": round((self._last - self.t0) * 1000, 2),
+            "phases": [{"phase": p, "ms": round(d * 1000, 2)} for p, d in self.phases],
+            "lazy_imports": {"PIL": Image is not None, "evdev": ecodes is not None},
+        }
+
+STARTUP = StartupProfile(_T0)
+# Perfilando no se toman los sockets: no le roba el toggle a un overlay que ya corre
+PROFILE_STARTUP = "--profile-startup" in sys.argv
+INHERITED_LISTENER = None  # socket de control pasado por el daemon (LISTEN_FDS)
+
 
 def read_state_file(path):
     try:
@@ -95,9 +376,122 @@ def read_state_file(path):
     except:
         return "IDLE"
 
+def parse_state(text):
+    """("DOWNLOADING", 45) de "DOWNLOADING 45%"; el progreso es opcional (None)."""
+    words = text.replace(":", " ").replace("%", " ").split()
+    state = words[0] if words else "IDLE"
+    progress = next((int(float(w)) for w in words[1:] if w.replace(".", "", 1).isdigit()), None)
+    return state, progress
+
+class OtaWatcher:
+    """Estado de OTA y de scripts en memoria, al día por inotify (sin polling).
+
+    Se leen los dos archivos una vez al arrancar y después sólo cuando inotify
+    avisa que cambió alguno (se vigila el directorio: así se ven también los
+    reemplazos atómicos). Si el directorio todavía no existe se vigila el de
+    arriba hasta que aparezca. Las transiciones quedan en `history`.
+    """
+
+    MASK = (mos_inotify.IN_CLOSE_WRITE | mos_inotify.IN_MOVED_TO | mos_inotify.IN_MOVED_FROM
+            | mos_inotify.IN_CREATE | mos_inotify.IN_DELETE)
+
+    def __init__(self, ota_path=OTA_STATE_FILE, script_path=SCRIPT_STATE_FILE):
+        self.paths = {"ota": ota_path, "script": script_path}
+        self.states = {key: read_state_file(path) for key, path in self.paths.items()}
+        self.history = deque(maxlen=20)  # (time.time(), clave, antes, después)
+        self.ino = None
+        self._waiting = {}  # directorio padre vigilado -> nombre del que falta
+        self._listeners = []
+
+    def add_listener(self, cb):
+        """cb(texto) con cada cambio de estado (desde el hilo de Tk)."""
+        self._listeners.append(cb)
+
+    @property
+    def ota(self): return self.states["ota"]
+
+    @property
+    def script(self): return self.states["script"]
+
+    def start(self):
+        """Abre el inotify. Devuelve el objeto (tiene fileno()) o None."""
+        try:
+            self.ino = mos_inotify.Inotify()
+        except OSError as e:
+            print(f"[Overlay] Sin inotify para OTA: {e}")
+            return None
+        self._arm()
+        return self.ino
+
+    def stop(self):
+        """Cierra el inotify. Los estados quedan en caché; reload() los resincroniza."""
+        if self.ino is not None:
+            self.ino.close()
+            self.ino = None
+        self._waiting.clear()
+
+    def _arm(self):
+        self._waiting.clear()
+        for d in {os.path.dirname(p) for p in self.paths.values()}:
+            try:
+                self.ino.add_watch(d, self.MASK | mos_inotify.IN_ONLYDIR)
+            except OSError:
+                parent, name = os.path.split(d)
+                try:
+                    self.ino.add_watch(parent, mos_inotify.IN_CREATE | mos_inotify.IN_MOVED_TO | mos_inotify.IN_ONLYDIR)
+                    self._waiting[parent] = name
+                except OSError:
+                    pass
+
+    def reload(self):
+        """Relee los dos archivos. True si cambió alguno."""
+        changed = False
+        for key, path in self.paths.items():
+            new = read_state_file(path)
+            if new != self.states[key]:
+                self.history.append((time.time(), key, self.states[key], new))
+                self.states[key] = new
+                changed = True
+        if changed:
+            text = self.text()
+            for cb in self._listeners:
+                try: cb(text)
+                except Exception: pass
+        return changed
+
+    def process(self):
+        """Consume los eventos de inotify. True si cambió algún estado."""
+        if self.ino is None:
+            return False
+        names = {os.path.basename(p) for p in self.paths.values()}
+        relevant = False
+        for path, mask, name in self.ino.read_events():
+            if self._waiting.get(path) == name:
+                self._arm()  # apareció el directorio: vigilarlo y leer lo que ya tenga
+                relevant = True
+            elif name in names or mask & mos_inotify.IN_IGNORED:
+                if mask & mos_inotify.IN_IGNORED:
+                    self._arm()  # borraron el directorio: esperar a que vuelva
+                relevant = True
+        return self.reload() if relevant else False
+
+    def text(self):
+        """Texto de la tarjeta: estado (y progreso) de OTA y scripts."""
+        (ota, ota_p), (script, script_p) = parse_state(self.ota), parse_state(self.script)
+        if ota in ("IDLE", "DONE") and script in ("IDLE", "DONE"):
+            return "Sistema al día"
+        def fmt(state, p):
+            return state.capitalize() + (f" {p}%" if p is not None else "")
+        return f"OTA: {fmt(ota, ota_p)} · Scripts: {fmt(script, script_p)}"
+
+OTA_WATCHER = OtaWatcher()
+
+def get_update_text():
+    return OTA_WATCHER.text()
+
 def get_update_status():
-    ota = read_state_file(OTA_STATE_FILE)
-    script = read_state_file(SCRIPT_STATE_FILE)
+    # Sale de la caché del OtaWatcher: sin I/O en el click de reiniciar/apagar
+    ota, script = parse_state(OTA_WATCHER.ota)[0], parse_state(OTA_WATCHER.script)[0]
 
     # Si cualquiera está en proceso, consideramos “actualizando”
     busy_states = {"CHECKING", "CHECKED", "DOWNLOADING", "DOWNLOADED", "INSTALLING"}
@@ -119,74 +513,793 @@ def get_update_status():
 
 
 
-def register_app(identifier, path="/tmp/open_apps"):
-    """Registra una app abierta para gestión externa"""
-    if not os.path.exists(path):
-        with open(path, "w") as f:
-            f.write("")
-    with open(path, "a") as f:
-        f.write(str(identifier) + "\n")
+# Apps lanzadas desde el menú (pid + grupo), compartido con cerrar_apps.sh
+PROCS = mos_procs.ProcessRegistry()
 
-def kill_es_de():
-    """Mata procesos de EmulationStation si existen"""
-    try:
-        cmd = "ps w | grep -i 'es-de' | grep -v grep | awk '{print $1}'"
-        pids = os.popen(cmd).read().strip().split()
-        for pid in pids:
-            if pid.isdigit():
-                os.system(f"kill -9 {pid}")
-    except:
-        pass
+def run_fast(cmd, name=None, track=True):
+    """Ejecuta un comando sin esperar retorno, en su propia sesión.
 
-def run_fast(cmd):
-    """Ejecuta un comando sin esperar retorno"""
+    Con track (lo normal) queda en el registro de procesos con `name` y se
+    cierra al volver a ES-DE; los comandos del sistema van con track=False.
+    En los dos casos el reaper lo recoge al terminar (sin zombis).
+    """
     try:
-        subprocess.Popen(cmd, start_new_session=True)
+        return PROCS.spawn(cmd, name, track=track)
     except Exception as e:
         print(f"[Err] {cmd}: {e}")
 
-def run_threaded_action(cmd_list, on_finish=None):
-    """Ejecuta una lista de comandos en hilo separado"""
-    def worker():
-        for cmd in cmd_list:
+def run_cmd(cmd, timeout=ACTION_TIMEOUT):
+    """Ejecuta un comando y devuelve True si salió bien. Los fallos se informan, no se tragan."""
+    try:
+        res = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=timeout)
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"[Overlay] {cmd[0]}: {e}")
+        return False
+    if res.returncode != 0:
+        err = res.stderr.decode(errors="replace").strip().splitlines()
+        print(f"[Overlay] {' '.join(cmd)} -> {res.returncode}{': ' + err[-1] if err else ''}")
+        return False
+    return True
+
+class ActionExecutor:
+    """Acciones de las tarjetas en un pool acotado, agrupadas por canal.
+
+    adjust() acumula ajustes relativos: cinco +5 mientras el canal está ocupado
+    terminan en un solo +25. run() reemplaza lo que el canal tenía en cola por
+    los comandos nuevos (lo viejo ya no sirve). Cada canal tiene a lo sumo un
+    worker y corre como mucho un comando por ACTION_MIN_INTERVAL; on_finish se
+    llama una sola vez, cuando el canal queda vacío. En la lista de run() un
+    paso puede ser una función (devuelve True si salió bien): los pasos corren
+    en orden y la cadena se corta en el primero que falla.
+    """
+
+    def __init__(self, adjusters, workers=ACTION_WORKERS):
+        self.adjusters = adjusters  # canal -> fn(delta) que aplica el ajuste
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mos-action")
+        self._lock = threading.Lock()
+        self._pending = {}   # canal -> delta acumulado o lista de comandos
+        self._finish = {}    # canal -> on_finish del último pedido
+        self._busy = set()   # canales con un worker en curso
+        self.merged = 0      # pedidos absorbidos por otro (fusionados o descartados)
+
+    def adjust(self, channel, delta, on_finish=None):
+        with self._lock:
+            if channel in self._pending:
+                self.merged += 1
+            self._pending[channel] = self._pending.get(channel, 0) + delta
+            self._schedule(channel, on_finish)
+
+    def run(self, channel, cmd_list, on_finish=None):
+        with self._lock:
+            if channel in self._pending:
+                self.merged += 1
+            self._pending[channel] = list(cmd_list)
+            self._schedule(channel, on_finish)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+    # --- Internos ---
+    def _schedule(self, channel, on_finish):
+        # Se llama con el lock tomado
+        if on_finish:
+            self._finish[channel] = on_finish
+        if channel not in self._busy:
+            self._busy.add(channel)
+            self._pool.submit(self._drain, channel)
+
+    def _drain(self, channel):
+        while True:
+            with self._lock:
+                work = self._pending.pop(channel, None)
+                if work is None:
+                    self._busy.discard(channel)
+                    on_finish = self._finish.pop(channel, None)
+                    break
+            t0 = time.monotonic()
             try:
-                subprocess.run(cmd, check=True, timeout=1)
-            except Exception:
-                pass
+                if isinstance(work, list):
+                    for step in work:
+                        if not (step() if callable(step) else run_cmd(step)):
+                            break
+                elif work:
+                    self.adjusters[channel](work)
+            except Exception as e:
+                print(f"[Overlay] Acción {channel}: {e}")
+            # Lo que llegue mientras tanto se junta para la próxima vuelta
+            rest = ACTION_MIN_INTERVAL - (time.monotonic() - t0)
+            if rest > 0:
+                time.sleep(rest)
         if on_finish:
-            on_finish()
-    threading.Thread(target=worker, daemon=True).start()
+            try: on_finish()
+            except Exception as e: print(f"[Overlay] Al terminar {channel}: {e}")
+
+# ==========================================
+# 🔊 MONITOR DE VOLUMEN (PULSEAUDIO)
+# ==========================================
+
+def parse_pactl_volume(text):
+    """Primer porcentaje de la salida de `pactl get-sink-volume`."""
+    for part in text.replace("/", " ").replace(",", " ").split():
+        if part.endswith("%") and part[:-1].isdigit():
+            return int(part[:-1])
+    return None
+
+class PulsectlVolumeBackend:
+    """Una sola conexión nativa: eventos, lecturas y escrituras.
+
+    El poll del mainloop de libpulse es nuestro (set_poll_func) y suma el pipe
+    de wake(): un aviso queda en el pipe hasta que event_listen lo atiende, así
+    que no se pierde aunque llegue antes de entrar al loop, y no hace falta
+    ningún timeout.
+    """
+
+    def __init__(self, server=PULSE_SOCKET):
+        self.server = server
+        self.pulse = None
+        self._changed = False
+        self._listening = False
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+
+    def connect(self):
+        self.pulse = pulsectl.Pulse("mos-overlay", server=self.server)
+        self.pulse.set_poll_func(self._poll)
+        self.pulse.event_mask_set("sink", "server")
+        self.pulse.event_callback_set(self._on_event)
+
+    def _poll(self, fds, timeout):
+        # Sólo dentro de event_listen se mira el pipe: durante lecturas/escrituras
+        # el aviso queda pendiente para el próximo wait_event()
+        poller = select.poll()
+        for pfd in fds:
+            poller.register(pfd.fd, pfd.events)
+        if self._listening:
+            poller.register(self._wake_r, select.POLLIN)
+        ready = dict(poller.poll(None if timeout < 0 else timeout * 1000))
+        if ready.pop(self._wake_r, 0):
+            try: os.read(self._wake_r, 64)
+            except BlockingIOError: pass
+            self.pulse.event_listen_stop()  # el loop ya corre: corta después de este dispatch
+        for pfd in fds:
+            pfd.revents = ready.get(pfd.fd, 0)
+        return sum(1 for pfd in fds if pfd.revents)
+
+    def _on_event(self, ev):
+        self._changed = True
+        raise pulsectl.PulseLoopStop
+
+    def _default_sink(self):
+        return self.pulse.get_sink_by_name(self.pulse.server_info().default_sink_name)
+
+    def read(self):
+        sink = self._default_sink()
+        return round(sink.volume.value_flat * 100), bool(sink.mute)
+
+    def adjust(self, delta):
+        self.pulse.volume_change_all_chans(self._default_sink(), delta / 100.0)
+
+    def wait_event(self):
+        self._changed = False
+        self._listening = True
+        try:
+            self.pulse.event_listen()
+        finally:
+            self._listening = False
+        return self._changed
+
+    def wake(self):
+        # Desde el hilo de Tk: un byte en el pipe, sin esperar a nadie
+        try: os.write(self._wake_w, b"x")
+        except OSError: pass
+
+    def close(self):
+        try: self.pulse.close()
+        except Exception: pass
+
+class PactlVolumeBackend:
+    """Fallback sin libpulse: un único `pactl subscribe` persistente.
+
+    Las lecturas sólo se hacen cuando llega un evento de sink/server (no por
+    refresco), y siempre contra el mismo --server que las escrituras. Una
+    ráfaga de eventos (mover el slider da decenas) se junta hasta que haya
+    COALESCE_WINDOW segundos de silencio: una sola lectura por ráfaga.
+    `subscribe_cmd` permite usar una fuente de eventos sustituta.
+    """
+
+    COALESCE_WINDOW = 0.05
+
+    def __init__(self, server=PULSE_SOCKET, subscribe_cmd=None):
+        self.server = server
+        self.subscribe_cmd = subscribe_cmd or ["pactl", "--server", server, "subscribe"]
+        self.proc = None
+        self._buf = b""
+        self._wake_r, self._wake_w = os.pipe()
+
+    def _pactl(self, *args):
+        return subprocess.check_output(["pactl", "--server", self.server, *args], text=True, timeout=1)
+
+    def connect(self):
+        self._buf = b""
+        self.proc = subprocess.Popen(self.subscribe_cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def read(self):
+        vol = parse_pactl_volume(self._pactl("get-sink-volume", "@DEFAULT_SINK@"))
+        muted = "yes" in self._pactl("get-sink-mute", "@DEFAULT_SINK@")
+        return vol, muted
+
+    def adjust(self, delta):
+        self._pactl("set-sink-volume", "@DEFAULT_SINK@", f"{delta:+d}%")
+
+    def _read_events(self, out):
+        chunk = os.read(out, 4096)
+        if not chunk:
+            raise ConnectionError("pactl subscribe terminó")
+        *lines, self._buf = (self._buf + chunk).split(b"\n")
+        # Ej: "Event 'change' on sink #0" / "Event 'change' on server"
+        return any(b" sink " in l or l.endswith(b"server") for l in lines)
+
+    def wait_event(self):
+        out = self.proc.stdout.fileno()
+        timeout, changed = None, False
+        while True:
+            ready, _, _ = select.select([out, self._wake_r], [], [], timeout)
+            if self._wake_r in ready:
+                os.read(self._wake_r, 64)
+                return changed  # hay un ajuste pendiente: la lectura va después
+            if out not in ready:
+                return changed  # silencio: se cerró la ráfaga (o timeout sin nada)
+            changed = self._read_events(out) or changed
+            if changed:
+                timeout = self.COALESCE_WINDOW
+
+    def wake(self):
+        try: os.write(self._wake_w, b"x")
+        except OSError: pass
+
+    def close(self):
+        if self.proc:
+            try: self.proc.kill(); self.proc.wait(timeout=1)
+            except Exception: pass
+
+class VolumeMonitor:
+    """Mantiene en memoria el volumen y mute del sink por defecto.
+
+    Un hilo escucha los eventos de PulseAudio y aplica los ajustes pendientes
+    sobre la misma conexión. Los listeners reciben el texto nuevo en cuanto
+    cambia (desde el hilo del monitor). stop() suelta la conexión y termina el
+    hilo; el último valor queda en caché y start() lo resincroniza.
+    """
+
+    RECONNECT_DELAY = 2.0
+
+    def __init__(self, backend=None):
+        self.backend = backend  # None: se elige (e importa pulsectl) al arrancar el hilo
+        self.volume = None
+        self.muted = False
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._running = False
+        self._thread = None
+
+    def add_listener(self, cb):
+        self._listeners.append(cb)
+
+    def start(self):
+        with self._lock:
+            self._running = True
+            if self._thread is not None:
+                return  # el hilo anterior todavía no salió: sigue él
+            self._thread = threading.Thread(target=self._loop, name="mos-volume", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+        if self.backend:
+            self.backend.wake()
+
+    def _keep_running(self):
+        # La salida se decide con el lock: un start() justo ahora reusa este hilo
+        with self._lock:
+            if not self._running:
+                self._thread = None
+            return self._running
+
+    @property
+    def connected(self):
+        return self._running and self.volume is not None
+
+    def text(self):
+        if self.volume is None:
+            return "Volumen: N/A"
+        return f"Volumen: {self.volume}%" + (" (silencio)" if self.muted else "")
+
+    def adjust(self, delta):
+        """Encola un ajuste relativo (en %); se escribe desde el hilo del monitor."""
+        with self._lock:
+            self._pending += delta
+        if self.backend:
+            self.backend.wake()
+
+    def _take_pending(self):
+        with self._lock:
+            delta, self._pending = self._pending, 0
+        return delta
+
+    def _refresh(self):
+        vol, muted = self.backend.read()
+        if (vol, muted) != (self.volume, self.muted):
+            self.volume, self.muted = vol, muted
+            text = self.text()
+            for cb in self._listeners:
+                try: cb(text)
+                except Exception: pass
+
+    def _loop(self):
+        if self.backend is None:
+            self.backend = PulsectlVolumeBackend() if load_pulsectl() else PactlVolumeBackend()
+        while self._keep_running():
+            try:
+                self.backend.connect()
+                self._refresh()
+                while self._running:
+                    changed = self.backend.wait_event()
+                    WAKEUPS.note("volume")
+                    delta = self._take_pending()
+                    if delta:
+                        self.backend.adjust(delta)
+                        changed = True
+                    if changed:
+                        self._refresh()
+            except Exception as e:
+                print(f"[Overlay] Monitor de volumen caído: {e}")
+                self.volume = None
+                self.backend.close()
+                time.sleep(self.RECONNECT_DELAY)
+                continue
+            self.backend.close()
+
+VOLUME_MONITOR = VolumeMonitor()
+
+# ==========================================
+# 💡 BRILLO Y LUZ NOCTURNA
+# ==========================================
+
+# Orden de preferencia de /sys/class/backlight (el mismo que usa systemd-backlight)
+BACKLIGHT_TYPES = ("firmware", "platform", "raw")
+
+def read_int(path):
+    with open(path, "r") as f:
+        return int(f.read().strip())
+
+class SysfsBacklight:
+    """brightness/max_brightness de /sys/class/backlight/<dev>, sin forks.
+
+    Si `brightness` no es escribible (sin regla udev ni grupo video), los
+    ajustes se delegan en `writer` (brightnessctl pasa por logind).
+    """
+
+    name = "sysfs"
+
+    def __init__(self, path, writer=None):
+        self.path = path
+        self.max = read_int(os.path.join(path, "max_brightness")) or 1
+        self.notify_path = os.path.join(path, "actual_brightness")
+        if not os.path.exists(self.notify_path):
+            self.notify_path = os.path.join(path, "brightness")
+        self.writable = os.access(os.path.join(path, "brightness"), os.W_OK)
+        self.writer = writer
+
+    def to_percent(self, raw):
+        return round(raw * 100 / self.max)
+
+    def read(self):
+        return self.to_percent(read_int(self.notify_path))
+
+    def adjust(self, delta):
+        if not self.writable:
+            return self.writer.adjust(delta) if self.writer else False
+        raw = read_int(os.path.join(self.path, "brightness"))
+        percent = max(BACKLIGHT_MIN_PERCENT, min(100, self.to_percent(raw) + delta))
+        new = round(percent * self.max / 100)
+        if new == raw and delta:
+            new = max(1, min(self.max, raw + (1 if delta > 0 else -1)))
+        with open(os.path.join(self.path, "brightness"), "w") as f:
+            f.write(str(new))
+        return True
+
+class BrightnessctlBacklight:
+    """brightnessctl: una sola llamada por lectura (-m) en vez de `g` + `m`."""
+
+    name = "brightnessctl"
+    notify_path = None
+
+    def read(self):
+        # "intel_backlight,backlight,1200,50%,2400"
+        out = subprocess.check_output(["brightnessctl", "-m"], text=True, timeout=1)
+        return int(out.strip().splitlines()[0].split(",")[3].rstrip("%"))
+
+    def adjust(self, delta):
+        return run_cmd(["brightnessctl", "set", f"{abs(delta)}%{'+' if delta > 0 else '-'}"])
+
+class LightBacklight:
+    name = "light"
+    notify_path = None
+
+    def read(self):
+        return int(float(subprocess.check_output(["light", "-G"], text=True, timeout=1).strip()))
+
+    def adjust(self, delta):
+        return run_cmd(["light", "-A" if delta > 0 else "-U", str(abs(delta))])
+
+def probe_backlight(root=SYSFS_ROOT, which=shutil.which):
+    """Elige el backend de brillo: sysfs, brightnessctl o light (o None)."""
+    tool = BrightnessctlBacklight() if which("brightnessctl") else LightBacklight() if which("light") else None
+    base = os.path.join(root, "class", "backlight")
+    try: names = sorted(os.listdir(base))
+    except OSError: names = []
+    candidates = []
+    for name in names:
+        path = os.path.join(base, name)
+        try:
+            with open(os.path.join(path, "type"), "r") as f:
+                kind = f.read().strip()
+        except OSError:
+            kind = "raw"
+        rank = BACKLIGHT_TYPES.index(kind) if kind in BACKLIGHT_TYPES else len(BACKLIGHT_TYPES)
+        candidates.append((rank, name, path))
+    for _rank, _name, path in sorted(candidates):
+        try:
+            return SysfsBacklight(path, writer=tool)
+        except (OSError, ValueError):
+            continue
+    return tool
+
+class BacklightMonitor:
+    """Brillo actual con el backend sondeado una sola vez (al primer uso).
+
+    Con sysfs un hilo espera la notificación del kernel sobre actual_brightness
+    (poll con POLLPRI/POLLERR) en vez de releer: el valor en memoria siempre
+    está al día y leerlo no cuesta nada. Con herramientas externas se lee a
+    pedido, como cualquier otro proveedor.
+    """
+
+    def __init__(self, root=SYSFS_ROOT):
+        self.root = root
+        self._backend = None
+        self._probed = False
+        self.percent = None
+        self._listeners = []
+        self._running = False
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wake_r, self._wake_w = os.pipe()
+
+    @property
+    def backend(self):
+        if not self._probed:
+            self._backend = probe_backlight(self.root)
+            self._probed = True
+            print(f"[Overlay] Brillo: {self._backend.name if self._backend else 'sin backend'}")
+        return self._backend
+
+    def add_listener(self, cb):
+        self._listeners.append(cb)
+
+    @staticmethod
+    def format(percent):
+        return f"Brillo: {percent}%" if percent is not None else "Nivel de Brillo"
+
+    def text(self):
+        if self._running and self.percent is not None:
+            return self.format(self.percent)
+        try:
+            return self.format(self.backend.read()) if self.backend else self.format(None)
+        except Exception:
+            return self.format(None)
+
+    def adjust(self, delta):
+        if not self.backend:
+            print("[Overlay] No hay forma de ajustar el brillo")
+            return False
+        return self.backend.adjust(delta)
+
+    def start(self):
+        """Arranca el hilo de notificaciones (sólo si el backend es sysfs)."""
+        if not self.backend or not self.backend.notify_path:
+            return
+        with self._lock:
+            self._running = True
+            if self._thread is not None:
+                return  # el hilo anterior todavía no salió: sigue él
+            self._thread = threading.Thread(target=self._loop, name="mos-backlight", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+        try: os.write(self._wake_w, b"x")
+        except OSError: pass
+
+    def _keep_running(self):
+        with self._lock:
+            if not self._running:
+                self._thread = None
+            return self._running
+
+    def _give_up(self):
+        with self._lock:
+            self._running = False
+            self._thread = None
+
+    def _loop(self):
+        try:
+            fd = os.open(self.backend.notify_path, os.O_RDONLY)
+        except OSError as e:
+            print(f"[Overlay] Sin notificaciones de brillo: {e}")
+            self._give_up()
+            return
+        poller = select.poll()
+        poller.register(fd, select.POLLPRI | select.POLLERR)
+        poller.register(self._wake_r, select.POLLIN)
+        try:
+            while self._keep_running():
+                # sysfs: hay que leer el atributo antes de cada poll para rearmarlo
+                os.lseek(fd, 0, os.SEEK_SET)
+                percent = self.backend.to_percent(int(os.read(fd, 64).strip() or 0))
+                if percent != self.percent:
+                    self.percent = percent
+                    for cb in self._listeners:
+                        try: cb(self.format(percent))
+                        except Exception: pass
+                events = poller.poll()
+                WAKEUPS.note("backlight")
+                if any(f == self._wake_r for f, _ in events):
+                    os.read(self._wake_r, 64)
+        except (OSError, ValueError) as e:
+            print(f"[Overlay] Monitor de brillo caído: {e}")
+            self._give_up()
+        finally:
+            os.close(fd)
+
+BACKLIGHT = BacklightMonitor()
+
+# Herramientas de luz nocturna, en orden: (nombre, encender, apagar)
+NIGHT_LIGHT_TOOLS = (
+    ("gammastep", ["gammastep", "-O", str(NIGHT_LIGHT_TEMP)], ["gammastep", "-x"]),
+    ("redshift", ["redshift", "-O", str(NIGHT_LIGHT_TEMP)], ["redshift", "-x"]),
+)
+_NIGHT_LIGHT = []  # [herramienta o None] una vez sondeada
+
+def night_light_tool(which=shutil.which):
+    """(nombre, encender, apagar) de la primera herramienta instalada; se sondea una vez."""
+    if not _NIGHT_LIGHT:
+        _NIGHT_LIGHT.append(next((t for t in NIGHT_LIGHT_TOOLS if which(t[0])), None))
+    return _NIGHT_LIGHT[0]
+
+# ==========================================
+# 📡 ESTADO DE RED Y BLUETOOTH (D-BUS)
+# ==========================================
+
+NM_BUS = "org.freedesktop.NetworkManager"
+NM_PATH = "/org/freedesktop/NetworkManager"
+NM_DEVICE_TYPE_WIFI = 2
+BLUEZ_BUS = "org.bluez"
+
+class JeepneySystemBus:
+    """Adaptador mínimo sobre jeepney para el NetworkWatcher.
+
+    Cualquier objeto con los mismos métodos (get_all, call, add_signal_match,
+    next_signal, close) sirve como bus falso para pruebas.
+    """
+
+    def __init__(self):
+        if not load_jeepney():
+            raise ImportError("jeepney no disponible")
+        self.conn = open_dbus_connection(bus="SYSTEM")
+        self._queue = deque(maxlen=256)
+        self._filters = []
+
+    @staticmethod
+    def _unwrap(props):
+        return {k: v[1] for k, v in props.items()}
+
+    def call(self, dest, path, iface, method, signature=None, *args):
+        msg = new_method_call(DBusAddress(path, bus_name=dest, interface=iface), method, signature, args)
+        return self.conn.send_and_get_reply(msg).body
+
+    def get_all(self, dest, path, iface):
+        reply = self.conn.send_and_get_reply(Properties(DBusAddress(path, bus_name=dest, interface=iface)).get_all())
+        return self._unwrap(reply.body[0])
+
+    def managed_objects(self, dest):
+        objs = self.call(dest, "/", "org.freedesktop.DBus.ObjectManager", "GetManagedObjects")[0]
+        return {path: {iface: self._unwrap(p) for iface, p in ifaces.items()} for path, ifaces in objs.items()}
+
+    def add_signal_match(self, path_namespace):
+        # El filtro local no puede usar el sender (llega el nombre único), así que se filtra por path
+        rule = MatchRule(type="signal", interface="org.freedesktop.DBus.Properties",
+                         member="PropertiesChanged", path_namespace=path_namespace)
+        self.conn.send_and_get_reply(message_bus.AddMatch(rule))
+        self._filters.append(self.conn.filter(rule, queue=self._queue))
+
+    def next_signal(self):
+        """Bloquea hasta el próximo PropertiesChanged: (path, iface, cambios)."""
+        msg = self.conn.recv_until_filtered(self._queue)
+        iface, changed, _invalidated = msg.body
+        return msg.header.fields[HeaderFields.path], iface, self._unwrap(changed)
+
+    def close(self):
+        try: self.conn.close()
+        except Exception: pass
+
+class NetworkWatcher:
+    """Cachea SSID, señal Wi-Fi y encendido del adaptador Bluetooth.
+
+    Lee el estado una vez al conectar y después sólo reacciona a las señales
+    PropertiesChanged de NetworkManager y BlueZ: cero forks en régimen.
+    """
+
+    RECONNECT_DELAY = 5.0
+
+    def __init__(self, bus_factory=None):
+        self.bus_factory = bus_factory or JeepneySystemBus
+        self.bus = None
+        self.has_wifi = False      # NetworkManager respondió
+        self.has_bt = False        # BlueZ respondió
+        self.ssid = ""
+        self.strength = None
+        self.bt_powered = None
+        self._wifi_dev = None
+        self._ap = None
+        self._adapter = None
+        self._listeners = []
+        self._stop_evt = None
+        self._synced = threading.Event()
+
+    def add_listener(self, cb):
+        """cb(wifi_text, bt_text); se llama desde el hilo del watcher."""
+        self._listeners.append(cb)
+
+    def start(self):
+        if self._stop_evt and not self._stop_evt.is_set(): return
+        self._synced.clear()
+        self._stop_evt = stop_evt = threading.Event()
+        threading.Thread(target=self._loop, args=(stop_evt,), name="mos-netwatch", daemon=True).start()
+
+    def stop(self):
+        """Suelta el bus. El último estado queda en caché hasta el próximo start()."""
+        if self._stop_evt: self._stop_evt.set()
+        if self.bus: self.bus.close()
+
+    def wait_synced(self, timeout):
+        return self._synced.wait(timeout)
+
+    def wifi_text(self):
+        if not self.ssid:
+            return "Wi-Fi: Desconectado"
+        if self.strength is None:
+            return f"Conectado a: {self.ssid}"
+        return f"Conectado a: {self.ssid} ({self.strength}%)"
+
+    def bt_text(self):
+        return "Bluetooth: Encendido" if self.bt_powered else "Bluetooth: Apagado"
+
+    # --- Sincronización inicial ---
+    def _sync_wifi(self):
+        self._wifi_dev = None
+        for dev in self.bus.call(NM_BUS, NM_PATH, NM_BUS, "GetDevices")[0]:
+            props = self.bus.get_all(NM_BUS, dev, f"{NM_BUS}.Device")
+            if props.get("DeviceType") == NM_DEVICE_TYPE_WIFI:
+                self._wifi_dev = dev
+                break
+        ap = "/"
+        if self._wifi_dev:
+            ap = self.bus.get_all(NM_BUS, self._wifi_dev, f"{NM_BUS}.Device.Wireless").get("ActiveAccessPoint", "/")
+        self._set_ap(ap)
+        self.has_wifi = True
+
+    def _set_ap(self, ap):
+        self._ap = ap if ap and ap != "/" else None
+        self.ssid, self.strength = "", None
+        if self._ap:
+            props = self.bus.get_all(NM_BUS, self._ap, f"{NM_BUS}.AccessPoint")
+            self.ssid = bytes(props.get("Ssid", b"")).decode(errors="replace")
+            self.strength = props.get("Strength")
+
+    def _sync_bt(self):
+        self._adapter, self.bt_powered = None, False
+        for path, ifaces in self.bus.managed_objects(BLUEZ_BUS).items():
+            if "org.bluez.Adapter1" in ifaces:
+                self._adapter = path
+                self.bt_powered = bool(ifaces["org.bluez.Adapter1"].get("Powered"))
+                break
+        self.has_bt = True
+
+    # --- Señales ---
+    def _on_signal(self, path, iface, changed):
+        if iface == f"{NM_BUS}.Device.Wireless" and path == self._wifi_dev and "ActiveAccessPoint" in changed:
+            self._set_ap(changed["ActiveAccessPoint"])
+        elif iface == f"{NM_BUS}.AccessPoint" and path == self._ap:
+            if "Ssid" in changed:
+                self.ssid = bytes(changed["Ssid"]).decode(errors="replace")
+            if "Strength" in changed:
+                self.strength = changed["Strength"]
+        elif iface == NM_BUS and path == NM_PATH and "Devices" in changed:
+            self._sync_wifi()
+        elif iface == "org.bluez.Adapter1" and "Powered" in changed:
+            if self._adapter in (None, path):
+                self._adapter = path
+                self.bt_powered = bool(changed["Powered"])
+        else:
+            return False
+        return True
+
+    def _notify(self):
+        wifi, bt = self.wifi_text(), self.bt_text()
+        for cb in self._listeners:
+            try: cb(wifi if self.has_wifi else None, bt if self.has_bt else None)
+            except Exception: pass
+
+    def _loop(self, stop_evt):
+        while not stop_evt.is_set():
+            try:
+                self.bus = self.bus_factory()
+                self.bus.add_signal_match(NM_PATH)
+                self.bus.add_signal_match("/org/bluez")
+                try: self._sync_wifi()
+                except Exception as e: print(f"[Overlay] NetworkManager no disponible: {e}")
+                try: self._sync_bt()
+                except Exception as e: print(f"[Overlay] BlueZ no disponible: {e}")
+                self._synced.set()
+                self._notify()
+                while not stop_evt.is_set():
+                    path, iface, changed = self.bus.next_signal()
+                    WAKEUPS.note("netwatch")
+                    if self._on_signal(path, iface, changed):
+                        self._notify()
+            except ImportError as e:
+                print(f"[Overlay] Sin watcher D-Bus: {e}")
+                self._synced.set()  # los lectores van al fallback, sin reintentos
+                return
+            except Exception as e:
+                if stop_evt.is_set():
+                    return  # stop() cerró el bus a propósito
+                print(f"[Overlay] Watcher D-Bus caído: {e}")
+            self.has_wifi = self.has_bt = False
+            self._synced.set()  # que los lectores no esperen: van al fallback
+            if self.bus: self.bus.close()
+            stop_evt.wait(self.RECONNECT_DELAY)
+
+NETWORK_WATCHER = NetworkWatcher()
 
 # --- Lectores de Estado del Sistema ---
 
 def get_volume_text():
+    if VOLUME_MONITOR.connected:
+        return VOLUME_MONITOR.text()
     try:
         res = subprocess.check_output(
-            ["pactl", "get-sink-volume", "@DEFAULT_SINK@"],
+            ["pactl", "--server", PULSE_SOCKET, "get-sink-volume", "@DEFAULT_SINK@"],
             text=True, timeout=1
         )
-        for part in res.replace("/", " ").replace(",", " ").split():
-            if part.endswith("%") and part[:-1].isdigit():
-                return f"Volumen: {part}"
-        return "Volumen: --"
+        vol = parse_pactl_volume(res)
+        return f"Volumen: {vol}%" if vol is not None else "Volumen: --"
     except:
         return "Volumen: N/A"
 
 def get_brightness_text():
-    try:
-        curr = int(subprocess.check_output(["brightnessctl", "g"], text=True, timeout=1))
-        max_b = int(subprocess.check_output(["brightnessctl", "m"], text=True, timeout=1))
-        if max_b == 0: return "Brillo: --"
-        percent = int((curr / max_b) * 100)
-        return f"Brillo: {percent}%"
-    except:
-        try:
-            val = float(subprocess.check_output(["light", "-G"], text=True, timeout=1).strip())
-            return f"Brillo: {int(val)}%"
-        except:
-            return "Nivel de Brillo"
+    return BACKLIGHT.text()
 
 def get_wifi_text():
+    # Con el watcher vivo nunca se forkea: si todavía no resincronizó, lo último
+    # conocido marcado como viejo (el push del watcher lo reemplaza al llegar)
+    if NETWORK_WATCHER.has_wifi:
+        synced = NETWORK_WATCHER.wait_synced(NETWORK_SYNC_WAIT)
+        return NETWORK_WATCHER.wifi_text() + ("" if synced else NETWORK_STALE_MARK)
     try:
         cmd = "nmcli -t -f active,ssid dev wifi | grep '^yes'"
         res = subprocess.check_output(cmd, shell=True, text=True, timeout=1).strip()
@@ -196,6 +1309,9 @@ def get_wifi_text():
         return "Wi-Fi: Sin datos"
 
 def get_bt_text():
+    if NETWORK_WATCHER.has_bt:
+        synced = NETWORK_WATCHER.wait_synced(NETWORK_SYNC_WAIT)
+        return NETWORK_WATCHER.bt_text() + ("" if synced else NETWORK_STALE_MARK)
     try:
         res = subprocess.check_output(["bluetoothctl", "show"], text=True, timeout=1)
         return "Bluetooth: Encendido" if "Powered: yes" in res else "Bluetooth: Apagado"
@@ -203,9 +1319,21 @@ def get_bt_text():
         return "Bluetooth: N/A"
 
 def get_night_light_state():
-    return os.path.exists("/tmp/nightlight_state")
+    return os.path.exists(NIGHT_LIGHT_STATE)
+
+def set_night_light_state(on):
+    """Marca el estado de la luz nocturna (sin forks de touch/rm). True si quedó marcado."""
+    try:
+        if on: open(NIGHT_LIGHT_STATE, "a").close()
+        else: os.remove(NIGHT_LIGHT_STATE)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"[Overlay] Estado de luz nocturna: {e}")
+        return False
+    return True
 
-def is_gamepad(dev: InputDevice) -> bool:
+def is_gamepad(dev: "InputDevice") -> bool:
     """Filtra dispositivos que tengan ejes y botones típicos de un mando."""
     try:
         caps = dev.capabilities(verbose=False)
@@ -223,56 +1351,578 @@ def is_gamepad(dev: InputDevice) -> bool:
     except Exception:
         return False
 
+# ==========================================
+# 📈 CONSUMO DE LAS APPS LANZADAS
+# ==========================================
+
+def format_usage(usage):
+    """Texto corto para la tarjeta: CPU, RAM (y swap si hay) y E/S de una app."""
+    io = usage["io"]
+    io_text = f"{io / 2**20:.1f} MB/s" if io >= 2**20 else f"{io / 1024:.0f} KB/s"
+    ram = f"RAM {usage['rss'] / 2**20:.0f} MB"
+    if usage.get("swap", 0) >= 2**20:
+        ram += f" (+{usage['swap'] / 2**20:.0f} swap)"
+    return f"CPU {usage['cpu']:.0f}% · {ram} · E/S {io_text}"
+
+class AppTelemetry:
+    """Consumo de las apps registradas en PROCS, muestreado desde /proc.
+
+    Es un servicio del Scheduler: sólo corre con el overlay visible. El
+    intervalo arranca en TELEMETRY_MIN y se alarga hasta TELEMETRY_MAX
+    mientras los números no cambien. Los listeners reciben
+    {nombre: uso} (desde el hilo del muestreo) sólo cuando algo cambió.
+    """
+
+    def __init__(self, registry):
+        self.sampler = mos_procs.AppSampler(registry)
+        self.interval = TELEMETRY_MIN
+        self.last = {}
+        self._listeners = []
+        self._stop_evt = None
+
+    def add_listener(self, cb):
+        self._listeners.append(cb)
+
+    def start(self):
+        if self._stop_evt and not self._stop_evt.is_set(): return
+        self._stop_evt = stop_evt = threading.Event()
+        threading.Thread(target=self._loop, args=(stop_evt,), name="mos-telemetry", daemon=True).start()
+
+    def stop(self):
+        if self._stop_evt: self._stop_evt.set()
+
+    def _changed(self, apps):
+        if apps.keys() != self.last.keys():
+            return True
+        for name, u in apps.items():
+            old = self.last[name]
+            if abs(u["cpu"] - old["cpu"]) >= TELEMETRY_CPU_DELTA:
+                return True
+            if abs(u["rss"] - old["rss"]) > old["rss"] * TELEMETRY_RSS_DELTA:
+                return True
+            if abs(u["swap"] - old["swap"]) > max(old["swap"] * TELEMETRY_RSS_DELTA, 2**20):
+                return True
+            if (u["io"] >= 1024) != (old["io"] >= 1024):
+                return True
+        return False
+
+    def _loop(self, stop_evt):
+        self.sampler.sample()  # base para las tasas de CPU y E/S
+        self.interval = TELEMETRY_MIN
+        while not stop_evt.wait(self.interval):
+            WAKEUPS.note("telemetry")
+            try:
+                apps = self.sampler.sample()
+            except Exception as e:
+                print(f"[Overlay] Muestreo de apps: {e}")
+                continue
+            if not self._changed(apps):
+                self.interval = min(TELEMETRY_MAX, self.interval * TELEMETRY_BACKOFF)
+                continue
+            self.interval = TELEMETRY_MIN
+            self.last = apps
+            for cb in self._listeners:
+                try: cb(apps)
+                except Exception: pass
+
+TELEMETRY = AppTelemetry(PROCS)
+
+# ==========================================
+# 🎮 MANDOS (FALLBACK SIN DAEMON)
+# ==========================================
+
+class ControllerManager:
+    """Todos los mandos conectados en un único hilo con selector.
+
+    Sólo se usa cuando no hay daemon publicando en el bus de eventos.
+    El hotplug llega por inotify en /dev/input (sin reescanear), lo que no es
+    mando se cierra en el acto, y grab/ungrab se aplica a todos juntos.
+    Hilos: uno, como mucho. Fds: uno por mando conectado.
+
+    Los eventos se leen en lote y se agrupan en frames (hasta SYN_REPORT); en
+    cada frame sólo cuenta el último valor de cada eje. Una desconexión se
+    detecta por el error de read() (ENODEV) o por inotify, nunca con stat().
+
+    `devices` sólo lo toca el hilo del manager: set_grab() y stop() le avisan
+    por el pipe de wake y él aplica el cambio.
+    """
+
+    RESCAN_FALLBACK = 2.0  # sólo si no hay inotify
+    INPUT_DIR = "/dev/input"
+
+    def __init__(self, on_action):
+        self.on_action = on_action   # callback(bus.NAV_*, valor), desde el hilo del manager
+        self.devices = {}            # path -> (InputDevice, NavNormalizer)
+        self._frames = {}            # path -> eventos del frame en curso (None: descartando)
+        self.frames = 0              # frames procesados
+        self.syscalls = 0            # select + read() del camino caliente
+        self.grabbed = False         # lo pedido (cualquier hilo)
+        self._grab_applied = False   # lo aplicado a los mandos abiertos (hilo del manager)
+        self._thread = None
+        self._stopping = False
+        self._lock = threading.Lock()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+
+    def start(self):
+        with self._lock:
+            self._stopping = False
+            if self._thread is not None:
+                return  # el hilo anterior todavía no salió: sigue él
+            self._thread = threading.Thread(target=self._run, name="mos-joystick", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Cierra todos los mandos y termina el hilo."""
+        with self._lock:
+            self._stopping = True
+        self._wake()
+
+    def set_grab(self, grab):
+        """Pide grab/ungrab de todos los mandos; lo aplica el hilo del manager."""
+        self.grabbed = grab
+        self._wake()
+
+    def _sync_grab(self):
+        grab = self.grabbed
+        if grab == self._grab_applied:
+            return
+        self._grab_applied = grab
+        for dev, _ in self.devices.values():
+            try:
+                if grab: dev.grab()
+                else: dev.ungrab()
+            except Exception:
+                pass
+
+    def _wake(self):
+        try: os.write(self._wake_w, b"x")
+        except OSError: pass
+
+    def _open(self, path, sel):
+        if path in self.devices:
+            return
+        try:
+            dev = InputDevice(path)
+        except Exception:
+            return
+        if not is_gamepad(dev):
+            try: dev.close()
+            except Exception: pass
+            return
+        if self._grab_applied:
+            try: dev.grab()
+            except Exception: pass
+        self.devices[path] = (dev, bus.NavNormalizer(bus.axis_ranges(dev), JOY_AXIS_THRESHOLD))
+        sel.register(dev.fd, selectors.EVENT_READ, path)
+        print(f"[Overlay] Mando conectado: {dev.name} ({path})")
+
+    def _close(self, path, sel):
+        entry = self.devices.pop(path, None)
+        if not entry:
+            return
+        dev = entry[0]
+        self._frames.pop(path, None)
+        try: sel.unregister(dev.fd)
+        except Exception: pass
+        try: dev.ungrab()
+        except Exception: pass
+        try: dev.close()
+        except Exception: pass
+
+    def _scan(self, sel):
+        try:
+            for path in list_devices():
+                self._open(path, sel)
+        except Exception as e:
+            print(f"[Overlay] Error escaneando mandos: {e}")
+
+    def _on_hotplug(self, ino, sel):
+        for _, mask, name in ino.read_events():
+            if not name.startswith("event"):
+                continue
+            path = os.path.join(self.INPUT_DIR, name)
+            if mask & mos_inotify.IN_DELETE:
+                self._close(path, sel)
+            else:
+                # CREATE/ATTRIB: udev puede tardar en dar permisos, se reintenta con ATTRIB
+                self._open(path, sel)
+
+    def _run(self):
+        if not load_evdev():
+            with self._lock:
+                self._thread = None
+            return
+        sel = selectors.DefaultSelector()
+        sel.register(self._wake_r, selectors.EVENT_READ, "wake")
+        try:
+            while True:
+                os.read(self._wake_r, 64)
+        except BlockingIOError:
+            pass
+
+        ino = None
+        try:
+            ino = mos_inotify.Inotify()
+            ino.add_watch(self.INPUT_DIR, mos_inotify.IN_CREATE | mos_inotify.IN_ATTRIB | mos_inotify.IN_DELETE)
+            sel.register(ino.fileno(), selectors.EVENT_READ, "hotplug")
+        except OSError:
+            if ino: ino.close()
+            ino = None
+
+        try:
+            while True:
+                self._serve(sel, ino)
+                for path in list(self.devices):
+                    self._close(path, sel)
+                self._grab_applied = False
+                # La salida se decide con el lock: un start() mientras cerrábamos reusa este hilo
+                with self._lock:
+                    if self._stopping:
+                        self._thread = None
+                        return
+        except Exception as e:
+            print(f"[Overlay] Hilo de mandos detenido: {e}")
+            with self._lock:
+                self._thread = None
+        finally:
+            for path in list(self.devices):
+                self._close(path, sel)
+            self._grab_applied = False
+            if ino: ino.close()
+            sel.close()
+
+    def _serve(self, sel, ino):
+        """Atiende mandos y hotplug hasta que se pide stop()."""
+        self._sync_grab()
+        self._scan(sel)
+        last_scan = time.monotonic()
+        while not self._stopping:
+            ready = sel.select(None if ino else self.RESCAN_FALLBACK)
+            if not ino and time.monotonic() - last_scan >= self.RESCAN_FALLBACK:
+                last_scan = time.monotonic()
+                self._scan(sel)
+            for key, _ in ready:
+                if key.data == "wake":
+                    try: os.read(self._wake_r, 64)
+                    except BlockingIOError: pass
+                    self._sync_grab()
+                elif key.data == "hotplug":
+                    self._on_hotplug(ino, sel)
+                else:
+                    WAKEUPS.note("joystick")
+                    self._read(key.data, sel)
+
+    def report(self):
+        per_frame = self.syscalls / self.frames if self.frames else 0.0
+        return f"joystick: frames={self.frames} syscalls={self.syscalls} ({per_frame:.2f}/frame)"
+
+    def _read(self, path, sel):
+        entry = self.devices.get(path)
+        if not entry:
+            return
+        dev, norm = entry
+        self.syscalls += 1  # el select que nos despertó
+        try:
+            reads, batch = bus.read_batch(dev.fd)
+        except OSError:
+            # ENODEV: el mando se fue (inotify también avisa, lo que llegue primero)
+            print(f"[Overlay] Mando desconectado: {dev.name} ({path})")
+            self._close(path, sel)
+            return
+        self.syscalls += reads
+
+        frame = self._frames.get(path, [])
+        for ev in batch:
+            if ev[2] != bus.EV_SYN:
+                if frame is not None:
+                    frame.append(ev)
+            elif ev[3] == bus.SYN_REPORT:
+                if frame:
+                    self._feed_frame(norm, frame)
+                frame = []
+            elif ev[3] == bus.SYN_DROPPED:
+                # Se llenó el buffer del kernel: todo hasta el próximo SYN_REPORT es inválido
+                frame = None
+        self._frames[path] = frame
+
+    def _feed_frame(self, norm, frame):
+        self.frames += 1
+        for _sec, _usec, etype, code, value in bus.collapse_frame(frame):
+            res = norm.feed(etype, code, value)
+            if res:
+                self.on_action(*res)
+        norm.feed(bus.EV_SYN, bus.SYN_REPORT, 0)
+
+class NavQueue:
+    """Cola de navegación entre los hilos de entrada y Tk.
+
+    push() se puede llamar desde cualquier hilo: sólo hace append a un deque
+    (atómico en CPython, sin locks) y agenda un drenado si no hay uno pendiente.
+    El hilo de Tk drena todo junto como mucho una vez por frame y le pasa el
+    lote a `handler`, así un mando a 1000 Hz cuesta un callback por frame.
+    """
+
+    def __init__(self, root, handler, frame_ms=NAV_FRAME_MS):
+        self.root = root
+        self.handler = handler
+        self.frame_ms = frame_ms
+        self._items = deque()
+        self._scheduled = False
+
+    def push(self, action, value=1):
+        self._items.append((action, value))
+        if not self._scheduled:
+            # Carrera benigna: en el peor caso se agenda un drenado de más (vacío)
+            self._scheduled = True
+            try: self.root.after(self.frame_ms, self._drain)
+            except Exception: self._scheduled = False
+
+    def clear(self):
+        self._items.clear()
+
+    def _drain(self):
+        self._scheduled = False
+        batch = []
+        try:
+            while True:
+                batch.append(self._items.popleft())
+        except IndexError:
+            pass
+        if batch:
+            self.handler(batch)
+
+# ==========================================
+# 🚀 VOLVER A ES-DE (PIPELINE POR ETAPAS)
+# ==========================================
+
+class Pipeline:
+    """Etapas con dependencias: cada una arranca apenas terminan las suyas.
+
+    Las independientes corren en paralelo (un hilo por etapa). Si una etapa
+    falla, las que dependen de ella se saltean. run() devuelve el reporte con
+    el inicio y la duración de cada etapa (ms, relativos al arranque).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._stages = {}   # nombre -> (fn, dependencias)
+
+    def stage(self, name, fn, after=()):
+        self._stages[name] = (fn, tuple(after))
+        return self
+
+    def run(self):
+        t0 = time.monotonic()
+        done = {name: threading.Event() for name in self._stages}
+        report = {"pipeline": self.name, "started": time.time(), "stages": {}}
+
+        def worker(name, fn, after):
+            for dep in after:
+                done[dep].wait()
+            entry = {"start_ms": round((time.monotonic() - t0) * 1000, 1)}
+            failed = [d for d in after if report["stages"][d]["status"] != "ok"]
+            if failed:
+                entry["status"] = "skipped"
+                entry["detail"] = f"falló {', '.join(failed)}"
+            else:
+                t = time.monotonic()
+                try:
+                    entry["detail"] = fn()
+                    entry["status"] = "ok"
+                except Exception as e:
+                    entry["status"] = "failed"
+                    entry["detail"] = f"{type(e).__name__}: {e}"
+                entry["ms"] = round((time.monotonic() - t) * 1000, 1)
+            report["stages"][name] = entry
+            done[name].set()
+
+        threads = [threading.Thread(target=worker, args=(name, fn, after), name=f"mos-{name}", daemon=True)
+                   for name, (fn, after) in self._stages.items()]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        report["total_ms"] = round((time.monotonic() - t0) * 1000, 1)
+        return report
+
+def _input_stamp(paths):
+    return {p: StartupCache._mtime(p) for p in paths}
+
+def regenerate_steam_games():
+    """Corre generar_steam_games.sh sólo si cambió alguna de sus entradas."""
+    stamp = _input_stamp(STEAM_GAMES_INPUTS)
+    try:
+        with open(STEAM_GAMES_STAMP, "r") as f:
+            if json.load(f) == stamp:
+                return "sin cambios"
+    except (OSError, ValueError):
+        pass
+    if not os.path.exists(STEAM_GAMES_SCRIPT):
+        return "no existe el script"
+    res = subprocess.run([STEAM_GAMES_SCRIPT], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                         timeout=STEAM_GAMES_TIMEOUT)
+    if res.returncode != 0:
+        raise RuntimeError(f"salió con {res.returncode}: {res.stderr.decode(errors='replace').strip()[-200:]}")
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(STEAM_GAMES_STAMP, "w") as f:
+        json.dump(_input_stamp(STEAM_GAMES_INPUTS), f)
+    return "regenerado"
+
+def wait_esde_ready(proc, before, timeout=ESDE_READY_TIMEOUT):
+    """Espera (por inotify sobre la carpeta de logs) a que ES-DE loguee ESDE_READY_MARK.
+
+    `before` es el (inodo, mtime) del log previo al lanzamiento: ES-DE rota el
+    log al arrancar, así que la marca sólo cuenta en un archivo nuevo.
+    """
+    deadline = time.monotonic() + timeout
+    log_dir = os.path.dirname(ESDE_LOG)
+    ino = None
+    try:
+        os.makedirs(log_dir, exist_ok=True)
+        ino = mos_inotify.Inotify()
+        ino.add_watch(log_dir, mos_inotify.IN_MODIFY | mos_inotify.IN_CREATE | mos_inotify.IN_MOVED_TO)
+    except OSError:
+        ino = None  # sin inotify: se revisa cada medio segundo
+    try:
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                raise RuntimeError(f"ES-DE terminó al arrancar ({proc.returncode})")
+            try:
+                st = os.stat(ESDE_LOG)
+                if (st.st_ino, st.st_mtime_ns) != before and st.st_mtime_ns >= before[1]:
+                    with open(ESDE_LOG, "r", errors="replace") as f:
+                        if ESDE_READY_MARK in f.read():
+                            return "listo"
+            except OSError:
+                pass
+            wait = min(0.5, max(0.0, deadline - time.monotonic()))
+            if ino is not None:
+                select.select([ino], [], [], wait)
+                ino.read_events()
+            else:
+                time.sleep(wait)
+        raise TimeoutError(f"sin {ESDE_READY_MARK!r} en {timeout:.0f} s")
+    finally:
+        if ino is not None:
+            ino.close()
+
+class ReturnToFrontend:
+    """Vuelta a ES-DE: cerrar apps y regenerar en paralelo, después lanzar y esperar.
+
+    Guarda el último reporte (lo consulta el socket de control con "pipeline")
+    y lo vuelca en RETURN_ES_REPORT. Si ya hay una vuelta en curso no arranca otra.
+    """
+
+    def __init__(self):
+        self.running = threading.Event()
+        self.last = None
+        self._proc = None
+        self._before = (0, 0)
+
+    def start(self):
+        if self.running.is_set():
+            return False
+        self.running.set()
+        threading.Thread(target=self._run, name="mos-return-es", daemon=True).start()
+        return True
+
+    def _teardown(self):
+        report = PROCS.terminate_all(names=ES_TEARDOWN_NAMES)
+        return f"{report['targets']} apps, {report['killed']} forzadas"
+
+    def _launch(self):
+        try:
+            st = os.stat(ESDE_LOG)
+            self._before = (st.st_ino, st.st_mtime_ns)
+        except OSError:
+            self._before = (0, 0)
+        self._proc = run_fast(ESDE_COMMAND, track=False)
+        if self._proc is None:
+            raise RuntimeError("no se pudo lanzar ES-DE")
+        return f"pid {self._proc.pid}"
+
+    def _ready(self):
+        return wait_esde_ready(self._proc, self._before)
+
+    def _run(self):
+        try:
+            pipeline = (Pipeline("return-es")
+                        .stage("teardown", self._teardown)
+                        .stage("regenerate", regenerate_steam_games)
+                        .stage("launch", self._launch, after=("teardown", "regenerate"))
+                        .stage("ready", self._ready, after=("launch",)))
+            self.last = pipeline.run()
+            print(f"[Overlay] Vuelta a ES-DE en {self.last['total_ms']} ms: "
+                  + ", ".join(f"{k}={v.get('ms', '-')}ms ({v['status']})" for k, v in self.last["stages"].items()))
+            try:
+                with open(RETURN_ES_REPORT, "w") as f:
+                    json.dump(self.last, f, indent=2)
+            except OSError:
+                pass
+        finally:
+            self.running.clear()
+
+RETURN_ES = ReturnToFrontend()
+
 # ==========================================
 # 🎮 ACCIONES DEL MENÚ
 # ==========================================
 
+# Ajustes relativos que el ActionExecutor puede fusionar: {"adjust": canal, "delta": n}
+def adjust_volume(delta):
+    run_cmd(["pactl", "--server", PULSE_SOCKET, "set-sink-volume", "@DEFAULT_SINK@", f"{delta:+d}%"])
+
+ACTIONS = ActionExecutor({"volume": adjust_volume, "brightness": BACKLIGHT.adjust})
+
 def action_vol_up():
-    return [["pactl", "--server", PULSE_SOCKET, "set-sink-volume", "@DEFAULT_SINK@", "+5%"]]
+    if VOLUME_MONITOR.connected:
+        VOLUME_MONITOR.adjust(VOLUME_STEP)
+        return None
+    return {"adjust": "volume", "delta": VOLUME_STEP}
 
 def action_vol_down():
-    return [["pactl", "--server", PULSE_SOCKET, "set-sink-volume", "@DEFAULT_SINK@", "-5%"]]
+    if VOLUME_MONITOR.connected:
+        VOLUME_MONITOR.adjust(-VOLUME_STEP)
+        return None
+    return {"adjust": "volume", "delta": -VOLUME_STEP}
 
 def action_bri_up():
-    return [["brightnessctl", "set", "5%+"], ["light", "-A", "5"]]
+    return {"adjust": "brightness", "delta": 5}
 
 def action_bri_down():
-    return [["brightnessctl", "set", "5%-"], ["light", "-U", "5"]]
+    return {"adjust": "brightness", "delta": -5}
 
 def action_toggle_night_light():
-    state_file = "/tmp/nightlight_state"
-    if os.path.exists(state_file):
-        return [["gammastep", "-x"], ["rm", "-f", state_file]]
-    else:
-        return [["gammastep", "-O", "3500"], ["touch", state_file]]
+    tool = night_light_tool()
+    if not tool:
+        print("[Overlay] No hay gammastep ni redshift para la luz nocturna")
+        return None
+    # El estado se marca recién cuando la herramienta salió bien: si falla, la tarjeta no miente
+    on = not get_night_light_state()
+    return [tool[1] if on else tool[2], lambda: set_night_light_state(on)]
 
 def action_es():
-    run_threaded_action(["/usr/bin/cerrar_apps.sh"])
-    kill_es_de()
-    run_fast(["/home/muser/ES-DE/scripts/generar_steam_games.sh"])
-    run_fast(["es-de", "--force-kiosk", "--no-splash", "--no-update-check"])
+    RETURN_ES.start()
     return "exit"
 
 def action_files():
-    register_app("dolphin")
-    run_fast(["flatpak", "run", "org.kde.dolphin"])
+    run_fast(["flatpak", "run", "org.kde.dolphin"], name="dolphin")
     return "exit"
 
 def action_discord():
-    register_app("Discord")
-    run_fast(["flatpak", "run", "--branch=stable", "--arch=x86_64", "com.discordapp.Discord"])
+    run_fast(["flatpak", "run", "--branch=stable", "--arch=x86_64", "com.discordapp.Discord"], name="Discord")
     return "exit"
 
 def action_wifi():
-    run_fast(["python3", "/home/muser/ROMs/system/WiFi.sh" ])
+    run_fast(["python3", "/home/muser/ROMs/system/WiFi.sh" ], name="WiFi")
     return "exit"
 
 def action_bt():
-    run_fast(["python3", "/home/muser/ROMs/system/Bluetooth.sh" ])
+    run_fast(["python3", "/home/muser/ROMs/system/Bluetooth.sh" ], name="Bluetooth")
     return "exit"
 
 def action_spotify():
-    run_fast(["python3", "/home/muser/ROMs/multimedia/Spotify.sh"])
+    run_fast(["python3", "/home/muser/ROMs/multimedia/Spotify.sh"], name="Spotify")
     return "exit"
 
 def action_reboot():
@@ -283,7 +1933,7 @@ def action_reboot():
             "cmd": ["systemctl", "reboot"],
         }
 
-    run_fast(["systemctl", "reboot"])
+    run_fast(["systemctl", "reboot"], track=False)
     return "exit"
 
 
@@ -295,12 +1945,37 @@ def action_shutdown():
             "cmd": ["systemctl", "poweroff"],
         }
 
-    run_fast(["systemctl", "poweroff"])
+    run_fast(["systemctl", "poweroff"], track=False)
     return "exit"
 
 
 def action_back(): return "exit"
 
+def action_refresh_ota():
+    # Fuerza una relectura (por si falló inotify); si cambió, los listeners empujan la tarjeta
+    OTA_WATCHER.reload()
+    return None
+
+# Iconos de las apps conocidas del catálogo (un .sh puede traer el suyo con `# mos-icon:`)
+CATALOG_ICONS = {
+    "steam": "󰓓", "youtube": "󰗃", "xboxcloud": "󰖺", "waydroid": "󰀲",
+}
+
+def action_launch(entry):
+    """Lanza una app del catálogo (queda en el registro de procesos)."""
+    run_fast(entry["cmd"], name=entry["id"])
+    return "exit"
+
+def catalog_item(entry):
+    """Ítem de menú a partir de una entrada de mos_catalog."""
+    return {
+        "icon": {"nf": entry.get("icon") or CATALOG_ICONS.get(entry["id"], "󰀻"), "fallback": "🚀"},
+        "label": entry["label"],
+        "desc": entry["desc"],
+        "fn": lambda: action_launch(entry),
+        "proc": entry["id"],  # nombre en el registro de procesos (consumo en la tarjeta)
+    }
+
 # ==========================================
 # 📋 DEFINICIÓN DEL MENÚ
 # ==========================================
@@ -310,8 +1985,9 @@ def action_back(): return "exit"
 MENU_ITEMS = [
     {"type": "header", "label": "APLICACIONES"},
     {"icon": {"nf": "󰔟", "fallback": ""}, "label": "Volver al menu principal", "desc": "Cerrar aplicaciones y volver", "fn": action_es},
-    {"icon": {"nf": "󰉋", "fallback": "📁"}, "label": "Explorador de Archivos", "desc": "Gestionar archivos", "fn": action_files},
-    {"icon": {"nf": "󰙯", "fallback": "💬"}, "label": "Discord", "desc": "Abrir chat de voz", "fn": action_discord},
+    {"icon": {"nf": "󰉋", "fallback": "📁"}, "label": "Explorador de Archivos", "desc": "Gestionar archivos", "fn": action_files, "proc": "dolphin"},
+    {"icon": {"nf": "󰙯", "fallback": "💬"}, "label": "Discord", "desc": "Abrir chat de voz", "fn": action_discord, "proc": "Discord"},
+    {"type": "catalog"},  # acá van las apps de launchers/ y es_systems.xml
 
     {"type": "header", "label": "SISTEMA"},
     {"icon": {"nf": "󰊴", "fallback": "🎮"}, "label": "Salir del menu", "desc": "Ocultar menú", "fn": action_back},
@@ -319,19 +1995,303 @@ MENU_ITEMS = [
     {"icon": {"nf": "󰕿", "fallback": "🔉"}, "label": "Bajar Volumen", "desc_fn": get_volume_text, "fn": action_vol_down, "tag": "volume"},
     {"icon": {"nf": "󰖩", "fallback": "📶"}, "label": "Wi-Fi", "desc_fn": get_wifi_text, "fn": action_wifi},
     {"icon": {"nf": "󰂯", "fallback": "📡"}, "label": "Bluetooth", "desc_fn": get_bt_text, "fn": action_bt},
+    {"icon": {"nf": "󰚰", "fallback": "⬇️"}, "label": "Actualizaciones", "desc_fn": get_update_text, "fn": action_refresh_ota},
 
     {"type": "header", "label": "ENERGÍA"},
     {"icon": {"nf": "󰜉", "fallback": "♻️"}, "label": "Reiniciar", "desc": "Reboot system", "fn": action_reboot, "danger": True},
     {"icon": {"nf": "󰐥", "fallback": "⏻"}, "label": "Apagar", "desc": "Shutdown system", "fn": action_shutdown, "danger": True},
 ]
 
+def compose_menu(entries):
+    """MENU_ITEMS con el marcador {"type": "catalog"} reemplazado por las apps."""
+    items = []
+    for item in MENU_ITEMS:
+        if item.get("type") == "catalog":
+            items.extend(catalog_item(e) for e in entries)
+        else:
+            items.append(item)
+    return items
+
+# ==========================================
+# 🔄 MOTOR DE ESTADO (PROVEEDORES EN SEGUNDO PLANO)
+# ==========================================
+
+# TTL (segundos) de cada proveedor. Los que dependen de nmcli/bluetoothctl
+# cambian poco y son los más lentos, así que se consultan con menos frecuencia.
+PROVIDER_TTL = {
+    get_volume_text: 2.5,
+    get_brightness_text: 2.5,
+    get_wifi_text: 10.0,
+    get_bt_text: 10.0,
+    get_update_text: 60.0,  # lo empuja el OtaWatcher; leerlo sólo consulta la caché
+}
+
+class StatusEngine:
+    """Ejecuta los proveedores de estado fuera del hilo de Tk.
+
+    Cada función (desc_fn / switch_val) se ejecuta una sola vez por TTL aunque
+    varias tarjetas la compartan. Los resultados se cachean y sólo los valores
+    que cambiaron vuelven al hilo principal vía root.after.
+    """
+
+    def __init__(self, root, workers=STATUS_WORKERS):
+        self.root = root
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mos-status")
+        self._lock = threading.Lock()
+        self._subs = {}       # fn -> [callbacks]
+        self._values = {}     # fn -> último valor leído
+        self._stamp = {}      # fn -> monotonic de la última lectura
+        self._inflight = {}   # fn -> Future en curso
+        self._dirty = set()   # fn invalidadas mientras estaban en curso
+
+    def subscribe(self, fn, callback):
+        """Registra un callback (se llama en el hilo de Tk) para un proveedor."""
+        self._subs.setdefault(fn, []).append(callback)
+        if fn in self._values:
+            callback(self._values[fn])
+
+    def unsubscribe_all(self):
+        """Olvida los callbacks (al rearmar el menú). Los valores cacheados quedan."""
+        with self._lock:
+            self._subs.clear()
+
+    def invalidate(self, fn=None):
+        """Marca uno (o todos) los proveedores como vencidos."""
+        with self._lock:
+            targets = [fn] if fn else list(self._subs)
+            for f in targets:
+                self._stamp.pop(f, None)
+                if f in self._inflight:
+                    self._dirty.add(f)
+
+    def poll(self, force=False):
+        """Lanza los proveedores vencidos. Devuelve los futures en curso."""
+        now = time.monotonic()
+        futs = []
+        with self._lock:
+            for fn in self._subs:
+                fut = self._inflight.get(fn)
+                if fut is None:
+                    ttl = PROVIDER_TTL.get(fn, DEFAULT_PROVIDER_TTL)
+                    if not force and fn in self._stamp and (now - self._stamp[fn]) < ttl:
+                        continue
+                    fut = self._submit(fn)
+                futs.append(fut)
+        return futs
+
+    def refresh(self):
+        self.invalidate()
+        return self.poll(force=True)
+
+    def push(self, fn, value):
+        """Publica un valor producido fuera del pool (p. ej. por un monitor de eventos)."""
+        with self._lock:
+            self._stamp[fn] = time.monotonic()
+            if self._values.get(fn) == value:
+                return
+            self._values[fn] = value
+        try: self.root.after(0, self._deliver, fn, value)
+        except Exception: pass
+
+    def snapshot(self, max_wait=SNAPSHOT_MAX_WAIT):
+        """Aplica ya mismo los valores cacheados, esperando un poco por los vencidos."""
+        futs = self.poll()
+        if futs:
+            wait_futures(futs, timeout=max_wait)
+        with self._lock:
+            values = dict(self._values)
+        for fn, value in values.items():
+            self._deliver(fn, value)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+    # --- Internos ---
+    def _submit(self, fn):
+        # Se llama con el lock tomado
+        fut = self._pool.submit(self._run, fn)
+        self._inflight[fn] = fut
+        return fut
+
+    def _run(self, fn):
+        try:
+            value = fn()
+        except Exception:
+            value = None
+
+        with self._lock:
+            self._inflight.pop(fn, None)
+            self._stamp[fn] = time.monotonic()
+            changed = value is not None and self._values.get(fn) != value
+            if changed:
+                self._values[fn] = value
+            if fn in self._dirty:
+                self._dirty.discard(fn)
+                self._stamp.pop(fn, None)
+                self._submit(fn)
+
+        if changed:
+            try: self.root.after(0, self._deliver, fn, value)
+            except Exception: pass  # root ya destruido
+        return value
+
+    def _deliver(self, fn, value):
+        for cb in self._subs.get(fn, ()):
+            try: cb(value)
+            except Exception: pass
+
+# ==========================================
+# ⏱️ PLANIFICADOR (TIMERS Y SERVICIOS)
+# ==========================================
+
+class Scheduler:
+    """Dueño de todos los timers de Tk y servicios de fondo del overlay.
+
+    Con el overlay oculto se suspende todo (sólo queda el socket de toggle):
+    no hay timers pendientes ni hilos despiertos. resume() lo reactiva.
+    """
+
+    def __init__(self, root, counter=WAKEUPS):
+        self.root = root
+        self.counter = counter
+        self.active = False
+        self._timers = {}    # nombre -> [intervalo_ms, fn, align_minute, after_id]
+        self._services = {}  # nombre -> (start, stop)
+
+    def every(self, name, interval_ms, fn, align_minute=False):
+        """Timer periódico. Con align_minute dispara justo al cambiar el minuto."""
+        self._timers[name] = [interval_ms, fn, align_minute, None]
+        if self.active:
+            self._fire(name)
+
+    def service(self, name, start, stop):
+        """Servicio con hilo propio: start() al reanudar, stop() al suspender."""
+        self._services[name] = (start, stop)
+        if self.active:
+            start()
+
+    def resume(self):
+        if self.active: return
+        self.active = True
+        for start, _ in self._services.values():
+            try: start()
+            except Exception as e: print(f"[Overlay] Error al reanudar servicio: {e}")
+        for name in self._timers:
+            self._fire(name)
+
+    def suspend(self):
+        if not self.active: return
+        self.active = False
+        for timer in self._timers.values():
+            if timer[3] is not None:
+                try: self.root.after_cancel(timer[3])
+                except Exception: pass
+                timer[3] = None
+        for _, stop in self._services.values():
+            try: stop()
+            except Exception as e: print(f"[Overlay] Error al suspender servicio: {e}")
+
+    def _fire(self, name):
+        timer = self._timers.get(name)
+        if not timer or not self.active: return
+        timer[3] = None
+        self.counter.note(name)
+        try: timer[1]()
+        except Exception as e: print(f"[Overlay] Error en timer {name}: {e}")
+        if not self.active: return  # el callback pudo suspender
+        if timer[2]:
+            delay = 60000 - int(time.time() * 1000) % 60000 + 5
+        else:
+            delay = timer[0]
+        timer[3] = self.root.after(delay, self._fire, name)
+
+# ==========================================
+# 💾 CACHÉ DE ARRANQUE
+# ==========================================
+
+class StartupCache:
+    """Lo caro del arranque, guardado en CACHE_DIR entre ejecuciones.
+
+    Guarda el splash ya escalado como PPM (Tk lo carga sin PIL y sin reescalar)
+    y las fuentes elegidas, HAS_NERD_FONT y UI_SCALE. La clave es el tamaño de
+    pantalla, el mtime del splash y el estado de fontconfig: si cambia
+    cualquiera, la caché entera se descarta.
+    """
+
+    VERSION = 1
+
+    def __init__(self, screen, splash_path, path=CACHE_DIR):
+        self.dir = path
+        self.meta_path = os.path.join(path, "startup.json")
+        self.splash_path = os.path.join(path, f"splash_{screen[0]}x{screen[1]}.ppm")
+        self.key = {
+            "version": self.VERSION,
+            "screen": list(screen),
+            "splash": self._mtime(splash_path),
+            "fontconfig": [self._mtime(d) for d in FONTCONFIG_DIRS],
+        }
+        self.data = self._load()
+        self._dirty = False
+
+    @staticmethod
+    def _mtime(path):
+        try: return os.stat(path).st_mtime_ns
+        except OSError: return 0
+
+    def _load(self):
+        try:
+            with open(self.meta_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("key") != self.key:
+            return {}
+        return data.get("values", {})
+
+    def get(self, name):
+        return self.data.get(name)
+
+    def put(self, name, value):
+        if self.data.get(name) != value:
+            self.data[name] = value
+            self._dirty = True
+
+    def cached_splash(self):
+        """Ruta del splash escalado si es válido para esta clave, si no None."""
+        if self.data.get("splash") and os.path.exists(self.splash_path):
+            return self.splash_path
+        return None
+
+    def store_splash(self, pil_img):
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            tmp = self.splash_path + ".tmp"
+            pil_img.convert("RGB").save(tmp, "PPM")
+            os.replace(tmp, self.splash_path)
+            self.put("splash", True)
+        except Exception as e:
+            print(f"[Overlay] No pude cachear el splash: {e}")
+
+    def save(self):
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            tmp = self.meta_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"key": self.key, "values": self.data}, f)
+            os.replace(tmp, self.meta_path)
+            self._dirty = False
+        except OSError as e:
+            print(f"[Overlay] No pude guardar la caché de arranque: {e}")
+
 # ==========================================
 # 🧩 COMPONENTES UI
 # ==========================================
 
-def pick_first_font(root, candidates):
+def pick_first_font(root, candidates, families=None):
     try:
-        fam = set(tkfont.families(root))
+        fam = families if families is not None else set(tkfont.families(root))
         for c in candidates:
             if c in fam: return c
     except Exception: pass
@@ -351,24 +2311,32 @@ class ToggleSwitch(tk.Canvas):
         self.state = False
         self.w, self.h = width, height
 
+        self.knob = None
+
     def set_state(self, state):
         self.state = bool(state)
         self.draw()
 
     def draw(self):
-        self.delete("all")
+        # Los ítems se crean una vez; después sólo cambian color y posición del knob
         track_col = ACCENT if self.state else BORDER
         pad = 4
-        # Dibujar track
-        self.create_oval(0, 0, self.h, self.h, fill=track_col, outline="")
-        self.create_oval(self.w-self.h, 0, self.w, self.h, fill=track_col, outline="")
-        self.create_rectangle(self.h/2, 0, self.w-self.h/2, self.h, fill=track_col, outline="")
-        # Dibujar knob
         d = self.h - (pad*2)
         x = (self.w - d - pad) if self.state else pad
-        self.create_oval(x, pad, x+d, pad+d, fill="#FFFFFF", outline="")
+        if self.knob is None:
+            # Dibujar track
+            self.create_oval(0, 0, self.h, self.h, fill=track_col, outline="", tags="track")
+            self.create_oval(self.w-self.h, 0, self.w, self.h, fill=track_col, outline="", tags="track")
+            self.create_rectangle(self.h/2, 0, self.w-self.h/2, self.h, fill=track_col, outline="", tags="track")
+            # Dibujar knob
+            self.knob = self.create_oval(x, pad, x+d, pad+d, fill="#FFFFFF", outline="")
+        else:
+            self.itemconfigure("track", fill=track_col)
+            self.coords(self.knob, x, pad, x+d, pad+d)
 
 class DashboardCard(tk.Frame):
+    """Tarjeta de una fila del menú. Se recicla: bind_item() la reasigna a otro ítem."""
+
     def __init__(self, parent, data, font_main, font_sub, icon_font, on_click):
         super().__init__(parent, bg=C_BG_MAIN, highlightthickness=0)
         self.data = data
@@ -387,55 +2355,70 @@ class DashboardCard(tk.Frame):
         self.text_frame = tk.Frame(self.inner, bg=C_CARD_BG)
         self.text_frame.pack(side="left", fill="both", expand=True)
 
-        if data.get("switch"):
-            self.switch_widget = ToggleSwitch(self.inner, width=sc(50), height=sc(26), bg=C_CARD_BG)
-            self.switch_widget.pack(side="right", padx=sc(20))
-
         # Título
-        fg_title = C_DANGER if data.get("danger") else C_TEXT_MAIN
         self.lbl_title = tk.Label(
-            self.text_frame, text=data.get("label", ""),
-            font=(font_main, fs(14), "bold"), bg=C_CARD_BG, fg=fg_title, anchor="w"
+            self.text_frame, text="",
+            font=(font_main, fs(14), "bold"), bg=C_CARD_BG, fg=C_TEXT_MAIN, anchor="w"
         )
         self.lbl_title.pack(fill="x", pady=(sc(2), 0))
 
         # Descripción
-        init_desc = data.get("desc", "...")
         self.lbl_desc = tk.Label(
-            self.text_frame, text=init_desc,
+            self.text_frame, text="",
             font=(font_sub, fs(10)), bg=C_CARD_BG, fg=C_TEXT_SEC, anchor="w"
         )
         self.lbl_desc.pack(fill="x")
 
         # Event bindings
-        widgets = [self.inner, self.icon_container, self.icon_lbl, self.text_frame, self.lbl_title, self.lbl_desc]
-        if self.switch_widget: widgets.append(self.switch_widget)
+        for w in (self.inner, self.icon_container, self.icon_lbl, self.text_frame, self.lbl_title, self.lbl_desc):
+            self._bind_events(w)
+
+        self.bind_item(data)
 
-        for w in widgets:
-            if not w: continue
-            w.bind("<Enter>", lambda e: self.set_highlight(True))
-            w.bind("<Leave>", lambda e: self.set_highlight(False))
-            w.bind("<Button-1>", lambda e: self.execute())
+    def _bind_events(self, w):
+        w.bind("<Enter>", lambda e: self.set_highlight(True))
+        w.bind("<Leave>", lambda e: self.set_highlight(False))
+        w.bind("<Button-1>", lambda e: self.execute())
 
     def _setup_icon(self, data, font_fallback):
-        icon_txt = get_icon_text(data)
         self.icon_container = tk.Frame(self.inner, bg=C_CARD_BG, width=sc(70), height=sc(52), bd=0, highlightthickness=0)
         self.icon_container.pack_propagate(False)
         self.icon_container.pack(side="left", padx=(sc(12), sc(10)), fill="y")
 
         self.icon_lbl = tk.Label(
-            self.icon_container, text=icon_txt,
+            self.icon_container, text=get_icon_text(data),
             font=(self.icon_font or font_fallback, fs(22)),
             bg=C_CARD_BG, fg=C_TEXT_MAIN, bd=0
         )
         self.icon_lbl.pack(expand=True)
 
-    def update_data(self):
-        if "desc_fn" in self.data:
-            try: self.lbl_desc.config(text=self.data["desc_fn"]())
+    def bind_item(self, data, desc=None, switch=None):
+        """Muestra `data` en esta tarjeta (con los últimos valores de sus proveedores)."""
+        self.data = data
+        self.icon_lbl.configure(text=get_icon_text(data))
+        self.lbl_title.configure(text=data.get("label", ""))
+        self.lbl_desc.configure(text=desc if desc is not None else data.get("desc", "..."))
+
+        if data.get("switch"):
+            if not self.switch_widget:
+                self.switch_widget = ToggleSwitch(self.inner, width=sc(50), height=sc(26), bg=C_CARD_BG)
+                self._bind_events(self.switch_widget)
+            if not self.switch_widget.winfo_manager():
+                self.switch_widget.pack(side="right", padx=sc(20))
+            self.switch_widget.set_state(bool(switch))
+        elif self.switch_widget and self.switch_widget.winfo_manager():
+            self.switch_widget.pack_forget()
+
+        # Recalcular colores (título peligroso, resaltado) para el ítem nuevo
+        selected, self.is_selected = self.is_selected, None
+        self.set_highlight(bool(selected))
+
+    def update_data(self, desc=None, switch=None):
+        if desc is not None and desc != self.lbl_desc.cget("text"):
+            try: self.lbl_desc.config(text=desc)
             except: pass
-        if self.switch_widget and "switch_val" in self.data:
-            try: self.switch_widget.set_state(self.data["switch_val"]())
+        if switch is not None and self.switch_widget and bool(switch) != self.switch_widget.state:
+            try: self.switch_widget.set_state(switch)
             except: pass
 
     def set_highlight(self, active: bool):
@@ -455,36 +2438,436 @@ class DashboardCard(tk.Frame):
 
         if self.switch_widget:
             self.switch_widget.configure(bg=bg)
-            self.switch_widget.draw()
 
     def execute(self):
         self.on_click(self)
 
+class HeaderRow(tk.Frame):
+    """Título de sección (fila no seleccionable). También se recicla."""
+
+    def __init__(self, parent, font):
+        super().__init__(parent, bg=C_BG_MAIN)
+        self.lbl = tk.Label(self, text="", fg=C_CARD_HOVER, bg=C_BG_MAIN, font=(font, fs(9), "bold"))
+        self.lbl.pack(anchor="w", pady=(sc(15), sc(5)))
+        tk.Frame(self, bg="#333", height=1).pack(fill="x", pady=(0, sc(5)))
+
+    def bind_item(self, data):
+        self.lbl.configure(text=data["label"])
+
+# ==========================================
+# 📜 LISTA DEL MENÚ (VIRTUALIZADA)
+# ==========================================
+
+class MenuIndex:
+    """Geometría precalculada de todas las filas del menú.
+
+    rows[i] = (y, alto, item, índice seleccionable o None). Las alturas son
+    fijas por tipo de fila, así que armar el índice es O(n) sin tocar Tk y
+    buscar las filas visibles es un bisect.
+    """
+
+    def __init__(self, items, card_h, header_h, bottom_pad=0):
+        self.rows = []
+        self.tops = []
+        self.row_of = []  # índice seleccionable -> fila
+        y = 0
+        for item in items:
+            is_header = item.get("type") == "header"
+            h = header_h if is_header else card_h
+            sel = None
+            if not is_header:
+                sel = len(self.row_of)
+                self.row_of.append(len(self.rows))
+            self.rows.append((y, h, item, sel))
+            self.tops.append(y)
+            y += h
+        self.height = y + bottom_pad
+
+    def visible(self, y0, y1):
+        """Filas que se cruzan con [y0, y1)."""
+        start = max(0, bisect.bisect_right(self.tops, y0) - 1)
+        end = bisect.bisect_left(self.tops, y1)
+        return range(start, min(end, len(self.rows)))
+
+    def center_on(self, index, view_h):
+        """Fracción de yview que centra el ítem seleccionable `index` (None si no hace falta)."""
+        if index >= len(self.row_of):
+            return None
+        max_scroll = self.height - view_h
+        if max_scroll <= 0:
+            return None
+        y, h, _item, _sel = self.rows[self.row_of[index]]
+        target = min(max(0, y + h / 2 - view_h / 2), max_scroll)
+        return target / self.height
+
+class MenuRenderer(abc.ABC):
+    """Interfaz de la lista del menú para OverlayApp.
+
+    La app sólo habla en índices seleccionables (el orden de navegación):
+    build(), set_selected(), ensure_visible(), update_item(), scroll() y
+    scroll_to_top(). El renderer guarda los últimos valores de cada ítem
+    (desc/switch) para poder redibujar filas que vuelven a ser visibles.
+    on_click(índice) se llama al hacer click en una fila.
+    """
+
+    def __init__(self, parent, font, icon_font, on_click):
+        self.parent = parent
+        self.font = font
+        self.icon_font = icon_font
+        self.on_click = on_click
+        self.items = []        # todas las filas (incluye headers)
+        self.selectable = []   # sólo las seleccionables, en orden
+        self.values = {}       # índice seleccionable -> {"desc": ..., "switch": ...}
+        self.selected = 0
+        self.widget = None     # lo que la app empaqueta
+
+    def build(self, items):
+        self.items = list(items)
+        self.selectable = [it for it in self.items if it.get("type") != "header"]
+        self.values = {}
+
+    def update_item(self, index, desc=None, switch=None):
+        vals = self.values.setdefault(index, {})
+        if desc is not None: vals["desc"] = desc
+        if switch is not None: vals["switch"] = switch
+        self._refresh_item(index)
+
+    @abc.abstractmethod
+    def set_selected(self, index):
+        pass
+
+    @abc.abstractmethod
+    def ensure_visible(self, index):
+        pass
+
+    @abc.abstractmethod
+    def scroll(self, units):
+        pass
+
+    @abc.abstractmethod
+    def scroll_to_top(self):
+        pass
+
+    @abc.abstractmethod
+    def _refresh_item(self, index):
+        pass
+
+class VirtualCardList(MenuRenderer):
+    """Canvas con sólo las tarjetas que entran en pantalla (+ un margen).
+
+    Las tarjetas y headers salen de un pool y se reasignan al scrollear, así
+    que la cantidad de widgets depende del alto de la pantalla, no del largo
+    del menú. Moverse sólo toca la fila anterior y la nueva.
+    """
+
+    MARGIN_ROWS = 2          # filas extra arriba y abajo del viewport
+    BOTTOM_PAD = 50          # espacio al final de la lista (sin escalar)
+    SCROLL_UNIT = 40         # px por "unidad" de rueda (sin escalar)
+    OFFSCREEN = -100000
+
+    def __init__(self, parent, font, icon_font, on_click):
+        super().__init__(parent, font, icon_font, on_click)
+        self.canvas = tk.Canvas(parent, bg=C_BG_MAIN, highlightthickness=0, bd=0, yscrollincrement=1)
+        self.widget = self.canvas
+        self.index = None
+        self.width = 1
+        self.shown = {}      # fila -> (widget, id de ventana del canvas)
+        self.pool = {"card": [], "header": []}
+        self.canvas.bind("<Configure>", self._on_configure)
+
+    # --- construcción ---
+    def build(self, items):
+        super().build(items)
+        for row, (w, win) in list(self.shown.items()):
+            self._release(row)
+        card_h, header_h = self._measure()
+        self.index = MenuIndex(self.items, card_h, header_h, sc(self.BOTTOM_PAD))
+        self.canvas.configure(scrollregion=(0, 0, 1, self.index.height))
+        self.render()
+
+    def _measure(self):
+        # Una tarjeta y un header de muestra: todas las filas de un tipo miden lo mismo
+        card = self._take("card", self.selectable[0] if self.selectable else {"label": ""})
+        header = self._take("header", {"label": "X"})
+        card.update_idletasks()
+        card_h = card.winfo_reqheight() + 2 * sc(3)
+        header_h = header.winfo_reqheight()
+        self._give("card", card)
+        self._give("header", header)
+        return card_h, header_h
+
+    # --- pool ---
+    def _take(self, kind, item):
+        pool = self.pool[kind]
+        if pool:
+            widget, win = pool.pop()
+        else:
+            if kind == "header":
+                widget = HeaderRow(self.canvas, self.font)
+            else:
+                widget = DashboardCard(self.canvas, item, self.font, self.font, self.icon_font, self._on_card_click)
+            win = self.canvas.create_window(0, self.OFFSCREEN, window=widget, anchor="nw", width=self.width)
+            widget._win = win
+        return widget
+
+    def _give(self, kind, widget):
+        self.canvas.coords(widget._win, 0, self.OFFSCREEN)
+        self.pool[kind].append((widget, widget._win))
+
+    def _release(self, row):
+        widget, _ = self.shown.pop(row)
+        self._give("header" if isinstance(widget, HeaderRow) else "card", widget)
+
+    # --- render ---
+    def _viewport(self):
+        top = self.canvas.canvasy(0)
+        return top, top + max(1, self.canvas.winfo_height())
+
+    def render(self):
+        """Asigna widgets sólo a las filas visibles (+ margen) y recicla el resto."""
+        if not self.index or not self.index.rows:
+            return
+        y0, y1 = self._viewport()
+        margin = self.MARGIN_ROWS * self.index.rows[0][1]
+        wanted = self.index.visible(y0 - margin, y1 + margin)
+        for row in [r for r in self.shown if r not in wanted]:
+            self._release(row)
+        for row in wanted:
+            if row in self.shown:
+                continue
+            y, _h, item, sel = self.index.rows[row]
+            if sel is None:
+                widget = self._take("header", item)
+                widget.bind_item(item)
+            else:
+                widget = self._take("card", item)
+                vals = self.values.get(sel, {})
+                widget.is_selected = sel == self.selected
+                widget.bind_item(item, vals.get("desc"), vals.get("switch"))
+                widget._sel = sel
+            self.canvas.coords(widget._win, 0, y + (0 if sel is None else sc(3)))
+            self.shown[row] = (widget, widget._win)
+
+    def _card_for(self, index):
+        if not self.index or index >= len(self.index.row_of):
+            return None
+        entry = self.shown.get(self.index.row_of[index])
+        return entry[0] if entry else None
+
+    # --- interfaz MenuRenderer ---
+    def set_selected(self, index):
+        prev, self.selected = self.selected, index
+        for i in (prev, index):
+            card = self._card_for(i)
+            if card: card.set_highlight(i == index)
+
+    def ensure_visible(self, index):
+        # Centrar selección
+        frac = self.index.center_on(index, max(1, self.canvas.winfo_height())) if self.index else None
+        if frac is not None:
+            self.canvas.yview_moveto(frac)
+            self.render()
+
+    def scroll(self, units):
+        self.canvas.yview_scroll(int(units * sc(self.SCROLL_UNIT)), "units")
+        self.render()
+
+    def scroll_to_top(self):
+        self.canvas.yview_moveto(0.0)
+        self.render()
+
+    def _refresh_item(self, index):
+        card = self._card_for(index)
+        if card:
+            vals = self.values[index]
+            card.update_data(desc=vals.get("desc"), switch=vals.get("switch"))
+
+    # --- eventos ---
+    def _on_configure(self, event):
+        if event.width != self.width:
+            self.width = event.width
+            for widget, win in list(self.shown.values()) + self.pool["card"] + self.pool["header"]:
+                self.canvas.itemconfigure(win, width=event.width)
+        self.render()
+
+    def _on_card_click(self, card):
+        sel = getattr(card, "_sel", None)
+        if sel is not None:
+            self.on_click(sel)
+
+class CanvasCardList(MenuRenderer):
+    """Todo el menú dibujado en un solo Canvas, con ids de ítems persistentes.
+
+    Cada fila se dibuja una vez en build() y la geometría sale de MenuIndex y
+    de las métricas de las fuentes, sin pedirle layout a Tk. Resaltar son tres
+    itemconfigure, scrollear un yview_moveto y un cambio de ancho se resuelve
+    con un scale() y un move() sobre tags, no fila por fila.
+    """
+
+    BOTTOM_PAD = 50          # espacio al final de la lista (sin escalar)
+    SCROLL_UNIT = 40         # px por "unidad" de rueda (sin escalar)
+
+    def __init__(self, parent, font, icon_font, on_click):
+        super().__init__(parent, font, icon_font, on_click)
+        self.canvas = tk.Canvas(parent, bg=C_BG_MAIN, highlightthickness=0, bd=0, yscrollincrement=1)
+        self.widget = self.canvas
+        self.index = None
+        self.width = 1
+        self.ids = {}   # índice seleccionable -> {"bg", "title", "desc", ["track", "knob"]}
+        self.f_title = (font, fs(14), "bold")
+        self.f_desc = (font, fs(10))
+        self.f_icon = (icon_font or font, fs(22))
+        self.f_header = (font, fs(9), "bold")
+        # Mismas medidas que DashboardCard/HeaderRow dentro de VirtualCardList
+        self.title_h = tkfont.Font(root=self.canvas, font=self.f_title).metrics("linespace")
+        desc_h = tkfont.Font(root=self.canvas, font=self.f_desc).metrics("linespace")
+        header_h = tkfont.Font(root=self.canvas, font=self.f_header).metrics("linespace")
+        self.inset = sc(3) + sc(2)  # margen de la fila + borde de la tarjeta
+        self.card_h = 2 * self.inset + 2 * sc(8) + max(sc(52), sc(2) + self.title_h + desc_h)
+        self.header_line = sc(15) + header_h + sc(5)
+        self.header_h = self.header_line + 1 + sc(5)
+        self.text_x = sc(12) + sc(70) + sc(10)
+        self.canvas.bind("<Configure>", self._on_configure)
+
+    # --- construcción ---
+    def build(self, items):
+        super().build(items)
+        self.canvas.delete("all")
+        self.ids = {}
+        self.index = MenuIndex(self.items, self.card_h, self.header_h, sc(self.BOTTOM_PAD))
+        for y, h, item, sel in self.index.rows:
+            if sel is None: self._draw_header(y, item)
+            else: self._draw_card(y, h, item, sel)
+        self.canvas.configure(scrollregion=(0, 0, 1, self.index.height))
+
+    def _draw_header(self, y, item):
+        c = self.canvas
+        c.create_text(0, y + sc(15), anchor="nw", text=item["label"], fill=C_CARD_HOVER, font=self.f_header)
+        c.create_rectangle(0, y + self.header_line, self.width, y + self.header_line + 1,
+                           fill="#333", outline="", tags="stretch")
+
+    def _draw_card(self, y, h, item, sel):
+        c = self.canvas
+        tag = f"row{sel}"
+        top, bottom = y + self.inset, y + h - self.inset
+        ids = {
+            "bg": c.create_rectangle(0, top, self.width, bottom, fill=C_CARD_BG, outline="", tags=(tag, "stretch")),
+            "icon": c.create_text(sc(12) + sc(35), (top + bottom) / 2, text=get_icon_text(item),
+                                  fill=C_TEXT_MAIN, font=self.f_icon, tags=tag),
+            "title": c.create_text(self.text_x, top + sc(8) + sc(2), anchor="nw", text=item.get("label", ""),
+                                   font=self.f_title, tags=tag),
+            "desc": c.create_text(self.text_x, top + sc(8) + sc(2) + self.title_h, anchor="nw",
+                                  text=item.get("desc", "..."), font=self.f_desc, tags=tag),
+        }
+        if item.get("switch"):
+            self._draw_switch(ids, (top + bottom) / 2, tag)
+        c.tag_bind(tag, "<Button-1>", lambda e, i=sel: self.on_click(i))
+        self.ids[sel] = ids
+        self._paint(sel, sel == self.selected)
+        if sel in self.values:
+            self._refresh_item(sel)
+
+    def _draw_switch(self, ids, cy, tag):
+        # Igual que ToggleSwitch, pegado al borde derecho
+        c = self.canvas
+        w, h = sc(50), sc(26)
+        x0, y0 = self.width - sc(20) - w, cy - h / 2
+        track = f"{tag}-track"
+        tags = (tag, track, "switch")
+        c.create_oval(x0, y0, x0 + h, y0 + h, fill=BORDER, outline="", tags=tags)
+        c.create_oval(x0 + w - h, y0, x0 + w, y0 + h, fill=BORDER, outline="", tags=tags)
+        c.create_rectangle(x0 + h / 2, y0, x0 + w - h / 2, y0 + h, fill=BORDER, outline="", tags=tags)
+        pad = 4
+        d = h - pad * 2
+        ids["track"] = track
+        ids["knob"] = c.create_oval(x0 + pad, y0 + pad, x0 + pad + d, y0 + pad + d,
+                                    fill="#FFFFFF", outline="", tags=(tag, "switch"))
+        ids["knob_dx"] = w - d - pad * 2
+        ids["on"] = False
+
+    def _paint(self, sel, active):
+        ids = self.ids.get(sel)
+        if not ids:
+            return
+        danger = self.selectable[sel].get("danger")
+        bg = (C_DANGER if danger else C_CARD_HOVER) if active else C_CARD_BG
+        c = self.canvas
+        c.itemconfigure(ids["bg"], fill=bg)
+        c.itemconfigure(ids["title"], fill=C_TEXT_MAIN if active or not danger else C_DANGER)
+        c.itemconfigure(ids["desc"], fill=C_TEXT_MAIN if active else C_TEXT_SEC)
+
+    # --- interfaz MenuRenderer ---
+    def set_selected(self, index):
+        prev, self.selected = self.selected, index
+        if prev != index:
+            self._paint(prev, False)
+        self._paint(index, True)
+
+    def ensure_visible(self, index):
+        # Centrar selección
+        frac = self.index.center_on(index, max(1, self.canvas.winfo_height())) if self.index else None
+        if frac is not None:
+            self.canvas.yview_moveto(frac)
+
+    def scroll(self, units):
+        self.canvas.yview_scroll(int(units * sc(self.SCROLL_UNIT)), "units")
+
+    def scroll_to_top(self):
+        self.canvas.yview_moveto(0.0)
+
+    def _refresh_item(self, index):
+        ids = self.ids.get(index)
+        if not ids:
+            return
+        vals = self.values[index]
+        if vals.get("desc") is not None:
+            self.canvas.itemconfigure(ids["desc"], text=vals["desc"])
+        if "knob" in ids and vals.get("switch") is not None and bool(vals["switch"]) != ids["on"]:
+            ids["on"] = bool(vals["switch"])
+            self.canvas.itemconfigure(ids["track"], fill=ACCENT if ids["on"] else BORDER)
+            self.canvas.move(ids["knob"], ids["knob_dx"] if ids["on"] else -ids["knob_dx"], 0)
+
+    # --- eventos ---
+    def _on_configure(self, event):
+        if event.width == self.width:
+            return
+        # Fondos y separadores arrancan en x=0: se estiran de una; los switches se corren
+        self.canvas.scale("stretch", 0, 0, event.width / self.width, 1)
+        self.canvas.move("switch", event.width - self.width, 0)
+        self.width = event.width
+
+# Renderers de la lista del menú (ver --bench-menu para compararlos)
+MENU_RENDERERS = {"widgets": VirtualCardList, "canvas": CanvasCardList}
+
 # ==========================================
 # 🖥️ APP PRINCIPAL (MAIN LOOP)
 # ==========================================
 
 class OverlayApp:
     def __init__(self):
-        global UI_SCALE
+        global UI_SCALE, HAS_NERD_FONT
+        STARTUP.mark("imports")
         self.root = tk.Tk()
         self.root.title(APP_TITLE)
         self.root.configure(bg="black")
-        self.joy_thread_running = False
-        self.joy_thread = None
 
         self.root.configure(cursor="none")
         self.root.bind_all("<Motion>", lambda e: "break")
         self.root.bind_all("<Button>", lambda e: "break")
 
         
-        # Estado del Joystick
-        self.joy = None
-        self.joy_thread_running = False
-        self.joy_thread = None
-        self._joy_last_nav = 0.0
-        
-        threading.Thread(target=self._rescan_joystick, daemon=True).start()
+        # Estado del Joystick (fallback sin daemon: todos los mandos en un solo hilo).
+        # Toda la entrada pasa por la cola y se procesa en el hilo de Tk.
+        self.nav_queue = NavQueue(self.root, self._on_nav_batch)
+        self._stick = {}          # bus.NAV_STICK_X/Y -> dirección (-1/0/1)
+        self._stick_job = None
+        self.controllers = ControllerManager(self.nav_queue.push) if HAS_EVDEV else None
+        self.scheduler = Scheduler(self.root)
+        self._open_trace = None       # traza de latencia de la apertura en curso
+        self._open_trace_job = None
+        self.root.bind("<Map>", self._on_root_map, add="+")
+
+        STARTUP.mark("tk_init")
 
         # --- FASE 1: LOADING ---
         self.sw = self.root.winfo_screenwidth()
@@ -492,12 +2875,18 @@ class OverlayApp:
         
         self.loading_img = None
         loading_path = os.path.join(ASSETS_DIR, "loading.png")
-        if os.path.exists(loading_path):
+        cache = StartupCache((self.sw, self.sh), loading_path)
+        scaled_splash = None  # se cachea después de mostrarlo
+        cached_splash = cache.cached_splash()
+        if cached_splash:
+            try: self.loading_img = tk.PhotoImage(file=cached_splash)
+            except Exception: cached_splash = None
+        if not cached_splash and os.path.exists(loading_path):
             try:
-                if HAS_PIL:
+                if load_pil():
                     pil_img = Image.open(loading_path)
-                    pil_img = pil_img.resize((self.sw, self.sh), Image.Resampling.LANCZOS)
-                    self.loading_img = ImageTk.PhotoImage(pil_img)
+                    scaled_splash = pil_img.resize((self.sw, self.sh), Image.Resampling.LANCZOS)
+                    self.loading_img = ImageTk.PhotoImage(scaled_splash)
                 else:
                     raw_img = tk.PhotoImage(file=loading_path)
                     if self.sw > 1500: self.loading_img = raw_img.zoom(2)
@@ -510,37 +2899,69 @@ class OverlayApp:
         try: self.root.attributes("-fullscreen", True)
         except: pass
         self.root.update()
+        STARTUP.mark("splash")
 
         # --- FASE 2: CONSTRUCCIÓN INTERFAZ ---
         try: self.root.attributes("-alpha", WINDOW_ALPHA)
         except: pass
 
-        UI_SCALE = max(1.0, min(min(self.sw/1920, self.sh/1080), 1.8))
-        self.font = "Segoe UI" if os.name == "nt" else "Inter"
-        
+        if scaled_splash is not None:
+            cache.store_splash(scaled_splash)
+
         self.main = tk.Frame(self.root, bg=C_BG_MAIN)
-        
-        # Fuentes
-        self.font = pick_first_font(self.root, ["Inter", "Segoe UI", "Ubuntu", "DejaVu Sans"]) or self.font
-        self.icon_font = pick_first_font(self.root, ["JetBrainsMono Nerd Font", "Symbols Nerd Font", "Nerd Font"]) or self.font
-        
-        global HAS_NERD_FONT
-        HAS_NERD_FONT = any(k in (self.icon_font or "") for k in ["Nerd", "Symbols"])
 
-        self._build_header()
+        # Fuentes y escala: de la caché si la clave coincide (sin enumerar las fuentes)
+        metrics = cache.get("metrics")
+        if metrics:
+            UI_SCALE = metrics["ui_scale"]
+            self.font = metrics["font"]
+            self.icon_font = metrics["icon_font"]
+            HAS_NERD_FONT = metrics["has_nerd_font"]
+        else:
+            UI_SCALE = max(1.0, min(min(self.sw/1920, self.sh/1080), 1.8))
+            self.font = "Segoe UI" if os.name == "nt" else "Inter"
+            try: families = set(tkfont.families(self.root))
+            except Exception: families = set()
+            self.font = pick_first_font(self.root, ["Inter", "Segoe UI", "Ubuntu", "DejaVu Sans"], families) or self.font
+            self.icon_font = pick_first_font(self.root, ["JetBrainsMono Nerd Font", "Symbols Nerd Font", "Nerd Font"], families) or self.font
+            HAS_NERD_FONT = any(k in (self.icon_font or "") for k in ["Nerd", "Symbols"])
+            if families:
+                cache.put("metrics", {"ui_scale": UI_SCALE, "font": self.font,
+                                      "icon_font": self.icon_font, "has_nerd_font": HAS_NERD_FONT})
+        cache.save()
+        STARTUP.mark("fonts")
 
-        # Canvas con Scroll
-        self.canvas = tk.Canvas(self.main, bg=C_BG_MAIN, highlightthickness=0, bd=0)
-        self.canvas.pack(fill="both", expand=True, padx=sc(20), pady=sc(10))
-        self.scroll_inner = tk.Frame(self.canvas, bg=C_BG_MAIN)
-        self.win_id = self.canvas.create_window((0, 0), window=self.scroll_inner, anchor="nw")
+        self._build_header()
+        STARTUP.mark("build_header")
 
-        self.scroll_inner.bind("<Configure>", self._on_frame_configure)
-        self.canvas.bind("<Configure>", self._on_canvas_configure)
+        # Lista del menú (virtualizada: sólo hay widgets para lo que se ve)
+        self.menu = MENU_RENDERERS[MENU_RENDERER](self.main, self.font, self.icon_font, self._on_menu_click)
+        self.menu.widget.pack(fill="both", expand=True, padx=sc(20), pady=sc(10))
 
-        self.cards = []
+        self.items = []  # ítems seleccionables, en orden de navegación
         self.idx = 0
+        # Catálogo de apps: el índice cacheado se lee de una vez; se valida después de mostrar
+        self.catalog = mos_catalog.Catalog(LAUNCHERS_DIR, ES_SYSTEMS_FILE, CATALOG_INDEX)
+        self.catalog.load()
+        self._catalog_job = None
+        self.status = StatusEngine(self.root)
+        # Volumen y brillo: sólo despiertan con cambios reales; oculto, ni conexión ni hilo
+        VOLUME_MONITOR.add_listener(lambda text: self.status.push(get_volume_text, text))
+        self.scheduler.service("volume", VOLUME_MONITOR.start, VOLUME_MONITOR.stop)
+        # Brillo: backend sondeado una vez; con sysfs avisa el kernel, sin hilo si es una herramienta
+        BACKLIGHT.add_listener(lambda text: self.status.push(get_brightness_text, text))
+        self.scheduler.service("backlight", BACKLIGHT.start, BACKLIGHT.stop)
+        if HAS_JEEPNEY:
+            NETWORK_WATCHER.add_listener(self._on_network_change)
+            self.scheduler.service("netwatch", NETWORK_WATCHER.start, NETWORK_WATCHER.stop)
+        OTA_WATCHER.add_listener(lambda text: self.status.push(get_update_text, text))
+        self.scheduler.service("ota", self._resume_ota_watcher, self._suspend_ota_watcher)
+        self.scheduler.service("catalog", self._resume_catalog, self._suspend_catalog)
+        self._proc_items = {}
+        TELEMETRY.add_listener(lambda apps: self.root.after(0, self._on_telemetry, apps))
+        self.scheduler.service("telemetry", TELEMETRY.start, TELEMETRY.stop)
         self._build_menu()
+        STARTUP.mark("build_menu")
 
         # Pie de página
         tk.Label(self.main, text="ESC: Cerrar | ENTER: Seleccionar | JOYSTICK Compatible",
@@ -551,16 +2972,30 @@ class OverlayApp:
         self.root.bind("<Up>", lambda e: OVERLAY_VISIBLE and self.move_sel(-1))
         self.root.bind("<Down>", lambda e: OVERLAY_VISIBLE and self.move_sel(1))
         self.root.bind("<Return>", lambda e: OVERLAY_VISIBLE and self.trigger())
-        self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
+        self.menu.widget.bind_all("<MouseWheel>", self._on_mousewheel)
 
         self.update_vis()
+        if not PROFILE_STARTUP:
+            self._start_socket()
+
+        self.scheduler.every("clock", 60000, self.update_clock, align_minute=True)
+        self.scheduler.every("status", STATUS_TICK_MS, self.status.poll)
+        self._start_input_bus()
+        self.scheduler.service("joystick", self._resume_joystick, self._suspend_joystick)
+        # Arranca oculto: los servicios (mandos, telemetría, D-Bus...) recién con el primer show.
+        # Reanudar acá le anunciaba BELL_SHOW al daemon y le sacaba los mandos al juego.
         self.update_clock()
-        self._start_socket()
-        self._start_joystick_listener()
-
-        self.root.after(0, self.refresh_all_cards)
-        self.periodic_refresh()
-        self.root.after(2000, self.reveal_menu_final)
+        STARTUP.mark("services")
+
+        # El splash se va apenas el menú está armado y llegó el primer snapshot
+        self.status.invalidate()
+        self.status.snapshot(STARTUP_SNAPSHOT_WAIT)
+        STARTUP.mark("first_refresh")
+        self.reveal_menu_final()
+        self.root.update_idletasks()
+        STARTUP.mark("reveal")
+        # El índice cacheado se valida una vez ya con el menú en pantalla; inotify, al mostrar
+        self.root.after_idle(self._refresh_catalog)
 
     def show_warning(self, message, on_confirm):
         # Si ya existe un overlay previo, eliminarlo
@@ -695,8 +3130,6 @@ class OverlayApp:
 
         # === NAVEGACIÓN JOYSTICK ===
         # Reutilizamos tu sistema de joystick, solo redirigimos eventos
-        self._joy_last_nav = 0
-
         def joy_nav(direction):
             self.warn_idx = max(0, min(len(self.warn_buttons) - 1, self.warn_idx + direction))
             update_warn_sel()
@@ -707,128 +3140,162 @@ class OverlayApp:
             else:
                 confirm()
 
-        # Guardamos handlers para que _process_joystick_event los use
+        # Guardamos handlers para que _dispatch_nav los use
         self.joy_warning_nav = joy_nav
         self.joy_warning_select = joy_select
 
 
     # ---------------------------
-    # LÓGICA DE JOYSTICK CORREGIDA
+    # LÓGICA DE JOYSTICK (HILO DE TK)
     # ---------------------------
-    def _joy_nav(self, direction):
-        if not OVERLAY_VISIBLE.is_set(): return
-        now = time.time()
-        if (now - self._joy_last_nav) < JOY_NAV_COOLDOWN: return
-        self._joy_last_nav = now
-        self.root.after(0, lambda: (self.move_sel(direction), self._force_focus()))
+    def _on_nav_batch(self, batch):
+        """Procesa un lote de la cola. Los movimientos seguidos se suman en uno solo."""
+        if not OVERLAY_VISIBLE.is_set():
+            return
+        dy = dx = 0
+
+        def flush():
+            nonlocal dy, dx
+            if dy: self._dispatch_nav(bus.NAV_DOWN if dy > 0 else bus.NAV_UP, abs(dy))
+            if dx: self._dispatch_nav(bus.NAV_RIGHT if dx > 0 else bus.NAV_LEFT, abs(dx))
+            dy = dx = 0
+
+        for action, value in batch:
+            if action == bus.NAV_UP: dy -= 1
+            elif action == bus.NAV_DOWN: dy += 1
+            elif action == bus.NAV_LEFT: dx -= 1
+            elif action == bus.NAV_RIGHT: dx += 1
+            elif action in (bus.NAV_STICK_X, bus.NAV_STICK_Y):
+                flush()
+                self._set_stick(action, value)
+            elif action != bus.NAV_SYN:
+                # Aceptar/volver cortan la suma: el orden respecto a los movimientos importa
+                flush()
+                self._dispatch_nav(action)
+        flush()
+
+    def _set_stick(self, axis, direction):
+        """Stick inclinado: un paso ya, y auto-repetición mientras siga inclinado."""
+        if self._stick.get(axis, 0) == direction:
+            return
+        self._stick[axis] = direction
+        self._cancel_stick_repeat()
+        if direction:
+            self._stick_step(axis, direction)
+            self._stick_job = self.root.after(int(JOY_REPEAT_DELAY * 1000), self._stick_repeat)
+        elif any(self._stick.values()):
+            self._stick_job = self.root.after(int(JOY_NAV_COOLDOWN * 1000), self._stick_repeat)
+
+    def _stick_step(self, axis, direction):
+        if axis == bus.NAV_STICK_Y:
+            self._dispatch_nav(bus.NAV_DOWN if direction > 0 else bus.NAV_UP)
+        else:
+            self._dispatch_nav(bus.NAV_RIGHT if direction > 0 else bus.NAV_LEFT)
+
+    def _stick_repeat(self):
+        self._stick_job = None
+        if not OVERLAY_VISIBLE.is_set():
+            return
+        for axis, direction in self._stick.items():
+            if direction:
+                WAKEUPS.note("stick-repeat")
+                self._stick_step(axis, direction)
+                self._stick_job = self.root.after(int(JOY_NAV_COOLDOWN * 1000), self._stick_repeat)
+                return
 
-    def _joy_select(self):
-        if not OVERLAY_VISIBLE.is_set(): return
-        self.root.after(0, lambda: (self.trigger(), self._force_focus()))
+    def _cancel_stick_repeat(self):
+        if self._stick_job:
+            self.root.after_cancel(self._stick_job)
+            self._stick_job = None
 
-    def _joy_back(self):
-        if not OVERLAY_VISIBLE.is_set(): return
-        self.root.after(0, lambda: self._hide_overlay())
+    def _reset_nav_input(self):
+        self.nav_queue.clear()
+        self._stick.clear()
+        self._cancel_stick_repeat()
 
     def _force_focus(self):
         try: self.root.focus_force()
         except: pass
 
-    def _start_joystick_listener(self):
-        if not HAS_EVDEV or self.joy is None:
-            return
-
-        self.joy_thread_running = True
-        self.joy_thread = threading.Thread(
-            target=self._joystick_worker,
-            args=(self.joy,),
-            daemon=True
-        )
-        self.joy_thread.start()
+    def _dispatch_nav(self, action, count=1):
+        """Ejecuta una acción normalizada (bus.NAV_*), venga del daemon o del evdev local.
 
-
-    def _joystick_worker(self, dev):
-        print(f"[Overlay] Hilo de escucha iniciado para {dev.name}")
-
-        try:
-            if OVERLAY_VISIBLE.is_set():
-                try: dev.grab()
-                except: pass
-
-            for event in dev.read_loop():
-                if not self.joy_thread_running:
-                    break
-
-                # Si el device desaparece → cortar
-                if not os.path.exists(dev.path):
-                    print("[Overlay] Device desapareció, reiniciando...")
-                    break
-
-                # Procesar eventos normales
-                self._process_joystick_event(event)
-
-        except Exception as e:
-            print(f"[Overlay] Hilo de mando detenido: {e}")
-
-        finally:
-            self.joy_thread_running = False
-            try: dev.ungrab()
-            except: pass
-
-    def _process_joystick_event(self, event):
-        if not OVERLAY_VISIBLE.is_set(): 
+        `count` repite los movimientos (ya sumados por _on_nav_batch).
+        """
+        if not OVERLAY_VISIBLE.is_set():
             return
-        # BOTONES
         # Si hay advertencia fullscreen, redirigir controles
         if hasattr(self, "warn_overlay") and self.warn_overlay:
-            if event.type == ecodes.EV_KEY and event.value == 1:
-                if event.code in [ecodes.BTN_SOUTH, ecodes.BTN_A]:
-                    self.joy_warning_select()
-                elif event.code in [ecodes.BTN_EAST, ecodes.BTN_B]:
-                    self.warn_overlay.destroy()
-                    self.warn_overlay = None
-                    self.root.attributes("-alpha", 1.0)
-            elif event.type == ecodes.EV_ABS and event.code == ecodes.ABS_HAT0X:
-                if event.value == -1:
-                    self.joy_warning_nav(-1)
-                elif event.value == 1:
-                    self.joy_warning_nav(1)
+            if action == bus.NAV_SELECT:
+                self.joy_warning_select()
+            elif action == bus.NAV_BACK:
+                self.warn_overlay.destroy()
+                self.warn_overlay = None
+                self.root.attributes("-alpha", 1.0)
+            elif action == bus.NAV_LEFT:
+                self.joy_warning_nav(-count)
+            elif action == bus.NAV_RIGHT:
+                self.joy_warning_nav(count)
             return
 
-        if event.type == ecodes.EV_KEY:
-            if event.value == 1:  # PRESIONADO
-
-                # A / X → seleccionar
-                if event.code in [ecodes.BTN_SOUTH, ecodes.BTN_A, ecodes.BTN_GAMEPAD]:
-                    self.trigger()
+        # A / X → seleccionar
+        if action == bus.NAV_SELECT:
+            self.trigger()
 
-                # B → volver / cerrar overlay
-                elif event.code in [ecodes.BTN_EAST, ecodes.BTN_B]:
-                    self._hide_overlay()
-
-                # L1 → página arriba (si lo usás)
-                elif event.code == ecodes.BTN_TL:
-                    self.move_sel(-1)
-
-                # R1 → página abajo (si lo usás)
-                elif event.code == ecodes.BTN_TR:
-                    self.move_sel(1)
-
-        # D-PAD / STICK
-        elif event.type == ecodes.EV_ABS:
-            val = event.value
+        # B → volver / cerrar overlay
+        elif action == bus.NAV_BACK:
+            self._hide_overlay()
 
-            # D-PAD vertical
-            if event.code in [ecodes.ABS_HAT0Y]:
-                if val == -1:  # Arriba
-                    self.move_sel(-1)
-                elif val == 1:  # Abajo
-                    self.move_sel(1)
+        # D-PAD vertical, L1 / R1
+        elif action == bus.NAV_UP:
+            self.move_sel(-count)
+        elif action == bus.NAV_DOWN:
+            self.move_sel(count)
 
-            # D-PAD horizontal (si lo necesitás)
-            if event.code in [ecodes.ABS_HAT0X]:
-                pass  # tu overlay no usa izquierda/derecha
+    # ---------------------------
+    # BUS DE EVENTOS DEL DAEMON
+    # ---------------------------
+    def _start_input_bus(self):
+        """Timbre del daemon integrado al loop de Tk: sin hilos propios."""
+        self._input_ring = None
+        self._input_via_daemon = False
+        self._input_bell = None
+        if PROFILE_STARTUP:
+            return
+        try:
+            self._input_bell = bus.bind_bell(bus.OVERLAY_BELL)
+            self.root.tk.createfilehandler(self._input_bell, tk.READABLE, self._on_input_bell)
+        except Exception as e:
+            print(f"[Overlay] Sin bus de eventos del daemon: {e}")
+            self._input_bell = None
 
+    def _announce_visibility(self, visible):
+        """Avisa al daemon. Devuelve True si hay un daemon escuchando."""
+        if not self._input_bell:
+            return False
+        msg = bus.BELL_SHOW if visible else bus.BELL_HIDE
+        return bus.ring_bell(self._input_bell, bus.DAEMON_BELL, msg)
+
+    def _open_input_ring(self):
+        if self._input_ring is None:
+            try: self._input_ring = bus.EventRing()
+            except (OSError, ValueError): return None
+        return self._input_ring
+
+    def _on_input_bell(self, *_):
+        msgs = bus.drain_bell(self._input_bell)
+        if bus.BELL_HELLO in msgs and OVERLAY_VISIBLE.is_set():
+            # El daemon (re)arrancó: re-negociar quién lee los mandos
+            self._suspend_joystick()
+            self._resume_joystick()
+        if bus.BELL_EVENTS not in msgs or not self._input_via_daemon:
+            return
+        ring = self._open_input_ring()
+        if not ring: return
+        WAKEUPS.note("input-bus")
+        for _seq, _ts, action, value, _dev in ring.read_new():
+            if action != bus.NAV_SYN:
+                self.nav_queue.push(action, value)
 
     # ---------------------------
     # LÓGICA DE UI
@@ -844,21 +3311,10 @@ class OverlayApp:
         self.scroll_to_top()
 
     def scroll_to_top(self):
-        self._sync_scrollregion()
-        self.canvas.yview_moveto(0.0)
-
-    def _sync_scrollregion(self):
-        self.scroll_inner.update_idletasks()
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-
-    def _on_frame_configure(self, event=None):
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-
-    def _on_canvas_configure(self, event):
-        self.canvas.itemconfig(self.win_id, width=event.width)
+        self.menu.scroll_to_top()
 
     def _on_mousewheel(self, event):
-        self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+        self.menu.scroll(-1 * (event.delta / 120))
 
     def _build_header(self):
         h = tk.Frame(self.main, bg=C_BG_MAIN)
@@ -868,20 +3324,30 @@ class OverlayApp:
         self.clock.pack(side="right")
 
     def _build_menu(self):
-        for item in MENU_ITEMS:
-            if item.get("type") == "header":
-                tk.Label(self.scroll_inner, text=item["label"], fg=C_CARD_HOVER, bg=C_BG_MAIN,
-                         font=(self.font, fs(9), "bold")).pack(anchor="w", pady=(sc(15), sc(5)))
-                tk.Frame(self.scroll_inner, bg="#333", height=1).pack(fill="x", pady=(0, sc(5)))
-            else:
-                c = DashboardCard(self.scroll_inner, item, self.font, self.font, self.icon_font, self.on_card_click)
-                c.pack(fill="x", pady=sc(3))
-                self.cards.append(c)
-        tk.Frame(self.scroll_inner, bg=C_BG_MAIN, height=sc(50)).pack(fill="x")
+        self.status.unsubscribe_all()
+        self.menu.build(compose_menu(self.catalog.entries))
+        self.items = self.menu.selectable
+        # Los proveedores se suscriben por ítem (no por widget: los widgets se reciclan)
+        for i, item in enumerate(self.items):
+            if "desc_fn" in item:
+                self.status.subscribe(item["desc_fn"], lambda v, i=i: self.menu.update_item(i, desc=v))
+            if item.get("switch") and "switch_val" in item:
+                self.status.subscribe(item["switch_val"], lambda v, i=i: self.menu.update_item(i, switch=v))
+        # Tarjetas de apps: muestran el consumo mientras la app está abierta
+        self._proc_items = {item["proc"]: i for i, item in enumerate(self.items) if "proc" in item}
+        if TELEMETRY.last:
+            self._on_telemetry(TELEMETRY.last)
+
+    def _on_telemetry(self, apps):
+        for name, i in self._proc_items.items():
+            base = self.items[i].get("desc", "")
+            desc = f"{base} · {format_usage(apps[name])}" if name in apps else base
+            if self.menu.values.get(i, {}).get("desc", base) != desc:
+                self.menu.update_item(i, desc=desc)
 
     def move_sel(self, d):
-        if not self.cards: return
-        n = len(self.cards)
+        if not self.items: return
+        n = len(self.items)
         prev = self.idx
         if WRAP_AROUND: self.idx = (self.idx + d) % n
         else: self.idx = max(0, min(n - 1, self.idx + d))
@@ -891,43 +3357,27 @@ class OverlayApp:
             self.ensure_visible()
 
     def ensure_visible(self):
-        if not self.cards: return
-        card = self.cards[self.idx]
-        self._sync_scrollregion()
-        
-        c_h = self.canvas.winfo_height()
-        i_h = self.scroll_inner.winfo_height()
-        if i_h <= c_h: return
-
-        card_y = card.winfo_y()
-        card_h = card.winfo_height()
-        
-        # Centrar selección
-        target = card_y + (card_h / 2) - (c_h / 2)
-        max_scroll = i_h - c_h
-        
-        if target < 0: target = 0
-        if target > max_scroll: target = max_scroll
-        
-        frac = target / max_scroll if max_scroll > 0 else 0
-        self.canvas.yview_moveto(frac)
+        if self.items: self.menu.ensure_visible(self.idx)
 
     def update_vis(self):
-        for i, c in enumerate(self.cards):
-            c.set_highlight(i == self.idx)
+        self.menu.set_selected(self.idx)
 
     def trigger(self):
-        if self.cards: self.cards[self.idx].execute()
+        if self.items: self.on_card_click(self.items[self.idx])
+
+    def _on_menu_click(self, index):
+        if 0 <= index < len(self.items):
+            self.on_card_click(self.items[index])
 
-    def _execute_final_action(self, card):
-        fn = card.data["fn"]
+    def _execute_final_action(self, item):
+        fn = item["fn"]
         res = fn()
         if res == "exit":
             # self.root.destroy()
             self._hide_overlay()
 
-    def on_card_click(self, card):
-        fn = card.data["fn"]
+    def on_card_click(self, item):
+        fn = item["fn"]
         res = fn()
 
         # --- NUEVO: warning de actualización ---
@@ -964,141 +3414,324 @@ class OverlayApp:
         if res == "exit":
             self._hide_overlay() 
             return
+
+        # Comandos y ajustes van al ActionExecutor: un solo refresco de la tarjeta al final
+        provider = item.get("desc_fn") or item.get("switch_val")
+        def on_finish():
+            if provider:
+                self.status.invalidate(provider)
+            self.status.poll()
+        if isinstance(res, dict) and "adjust" in res:
+            ACTIONS.adjust(res["adjust"], res["delta"], on_finish=on_finish)
         elif isinstance(res, list):
-            tag = card.data.get("tag")
-            run_threaded_action(res, on_finish=lambda: self.root.after(0, self.refresh_all_cards))
+            ACTIONS.run(getattr(item["fn"], "__name__", item.get("label")), res, on_finish=on_finish)
+
+
+    def _resume_catalog(self):
+        """Vigila las fuentes con inotify y revisa (por mtime) lo que cambió estando oculto."""
+        ino = self.catalog.watch()
+        if ino is not None:
+            self.root.tk.createfilehandler(ino.fileno(), tk.READABLE, self._on_catalog_event)
+        if self._catalog_job is None:
+            self._catalog_job = self.root.after(CATALOG_DEBOUNCE_MS, self._refresh_catalog)
+
+    def _suspend_catalog(self):
+        if self._catalog_job is not None:
+            self.root.after_cancel(self._catalog_job)
+            self._catalog_job = None
+        if self.catalog.ino is not None:
+            self.root.tk.deletefilehandler(self.catalog.ino.fileno())
+        self.catalog.close()
+
+    def _resume_ota_watcher(self):
+        """Estado de OTA por inotify; al reanudar se relee por si cambió estando oculto."""
+        ino = OTA_WATCHER.start()
+        if ino is not None:
+            self.root.tk.createfilehandler(ino.fileno(), tk.READABLE, self._on_ota_event)
+        OTA_WATCHER.reload()  # si cambió, el listener empuja la tarjeta
+
+    def _suspend_ota_watcher(self):
+        if OTA_WATCHER.ino is not None:
+            self.root.tk.deletefilehandler(OTA_WATCHER.ino.fileno())
+        OTA_WATCHER.stop()
+
+    def _on_ota_event(self, *_):
+        WAKEUPS.note("ota")
+        OTA_WATCHER.process()  # si cambió algo, el listener empuja la tarjeta
+
+    def _on_catalog_event(self, *_):
+        WAKEUPS.note("catalog")
+        if self.catalog.pending() and self._catalog_job is None:
+            self._catalog_job = self.root.after(CATALOG_DEBOUNCE_MS, self._refresh_catalog)
+
+    def _refresh_catalog(self):
+        self._catalog_job = None
+        if not self.catalog.refresh():
+            return
+        # Conserva la selección si el ítem sigue en el menú
+        current = self.items[self.idx].get("label") if self.items else None
+        self._build_menu()
+        labels = [it.get("label") for it in self.items]
+        self.idx = labels.index(current) if current in labels else min(self.idx, max(0, len(self.items) - 1))
+        self.update_vis()
+        self.ensure_visible()
 
+    def _on_network_change(self, wifi, bt):
+        # Hilo del watcher: el StatusEngine se encarga de volver a Tk
+        if wifi is not None: self.status.push(get_wifi_text, wifi)
+        if bt is not None: self.status.push(get_bt_text, bt)
 
     def refresh_all_cards(self):
-        for c in self.cards: c.update_data()
-        try: self.root.update_idletasks()
-        except: pass
-
-    def periodic_refresh(self):
-        self.refresh_all_cards()
-        self.root.after(2500, self.periodic_refresh)
+        self.status.refresh()
 
     def update_clock(self):
+        # Lo dispara el Scheduler justo al cambiar de minuto
         self.clock.config(text=time.strftime("%H:%M"))
-        self.root.after(1000, self.update_clock)
 
     def _start_socket(self):
-        p = "/tmp/mos_overlay.sock"
-        if os.path.exists(p):
-            try: os.unlink(p)
-            except: pass
-
-        def srv():
-            s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            s.bind(p)
-            s.listen(1)
-            try: os.chmod(p, 0o666)
-            except: pass
-            while True:
-                try:
-                    c, _ = s.accept()
-                    msg = c.recv(1024).decode(errors="ignore")
-                    if "toggle" in msg:
-                        self.root.after(0, lambda: (
-                            self._hide_overlay() if OVERLAY_VISIBLE.is_set() else self._show_overlay()
-                        ))
-                    c.close()
-                except: pass
-        threading.Thread(target=srv, daemon=True).start()
-
-    def _rescan_joystick(self, force=False):
-        """Busca mandos continuamente y reinicia el listener si es necesario."""
-        time.sleep(1)
-
-        while True:
-            try:
-                devices = list_devices()
-                found = None
-
-                # Buscar un mando válido
-                for path in devices:
-                    dev = InputDevice(path)
-                    if is_gamepad(dev):
-                        found = dev
-                        break
-
-                # Si encontramos un mando nuevo o si se pidió forzar
-                if found and (force or self.joy is None or self.joy.path != found.path):
-                    print(f"[Overlay] Detectado mando en {found.path}")
-                    self.joy = found
-
-                    # Reiniciar hilo de lectura
-                    if self.joy_thread_running:
-                        self.joy_thread_running = False
-                        time.sleep(0.2)
-
-                    self._start_joystick_listener()
-
-                # Si el mando desapareció
-                if self.joy and not os.path.exists(self.joy.path):
-                    print("[Overlay] Mando desconectado.")
-                    self.joy = None
-                    self.joy_thread_running = False
-
-            except Exception as e:
-                print(f"[Overlay] Error en rescan: {e}")
+        """Servidor de control (mos_control) integrado al loop de Tk: sin hilos.
 
-            time.sleep(2)
-
-
-    def _cleanup_joystick(self):
-        """Limpia completamente el joystick actual."""
+        Si nos lanzó el daemon, el socket de escucha viene heredado y es suyo:
+        no se borra ni se vuelve a crear.
+        """
         try:
-            self.joy_thread_running = False
-        except:
-            pass
+            self.control = mos_control.ControlServer(self._on_control, sock=INHERITED_LISTENER)
+            self.root.tk.createfilehandler(self.control.fileno(), tk.READABLE,
+                                           lambda *_: self.control.process())
+        except OSError as e:
+            print(f"[Overlay] Sin socket de control: {e}")
+            self.control = None
+
+    def _on_control(self, cmd, args):
+        """Comandos del socket de control. Corre en el hilo de Tk."""
+        t_recv = time.monotonic()
+        WAKEUPS.note("control")
+        if cmd == "toggle":
+            cmd = "hide" if OVERLAY_VISIBLE.is_set() else "show"
+        if cmd == "show":
+            if not OVERLAY_VISIBLE.is_set():
+                trace = args.get("trace")
+                trace = dict(trace, t_recv=t_recv) if isinstance(trace, dict) else {"t_recv": t_recv}
+                self._show_overlay(trace)
+        elif cmd == "hide":
+            if OVERLAY_VISIBLE.is_set():
+                self._hide_overlay()
+        elif cmd == "navigate":
+            actions = {"up": bus.NAV_UP, "down": bus.NAV_DOWN, "left": bus.NAV_LEFT, "right": bus.NAV_RIGHT}
+            action = actions.get(args.get("direction"))
+            if action is None:
+                raise mos_control.ControlError("direction: up, down, left o right")
+            self._dispatch_nav(action, max(1, int(args.get("count", 1))))
+        elif cmd == "select":
+            self._dispatch_nav(bus.NAV_SELECT)
+        elif cmd == "refresh":
+            self.status.refresh()
+        elif cmd == "latency":
+            result = {"latency": LATENCY.summary()}
+            if args.get("dump"):
+                path = args["dump"] if isinstance(args["dump"], str) else LATENCY_DUMP
+                result["dump"] = LATENCY.dump(path)
+            return result
+        elif cmd == "pipeline":
+            # Última vuelta a ES-DE (etapas y tiempos) y si hay una en curso
+            return {"running": RETURN_ES.running.is_set(), "last": RETURN_ES.last}
+        elif cmd == "wakeups":
+            lines = [WAKEUPS.report()]
+            if self.controllers:
+                lines.append(self.controllers.report())
+            return "\n".join(lines)
+        return self._control_status()
+
+    def _control_status(self):
+        item = self.items[self.idx] if self.items else None
+        return {
+            "visible": OVERLAY_VISIBLE.is_set(),
+            "selected": self.idx,
+            "label": item.get("label") if item else None,
+            "cards": len(self.items),
+            "wakeups": WAKEUPS.report(),
+            "joystick": self.controllers.report() if self.controllers else None,
+            "latency": LATENCY.summary(),
+        }
 
-        try:
-            if self.joy:
-                try:
-                    self.joy.ungrab()
-                except:
-                    pass
-                try:
-                    self.joy.close()
-                except:
-                    pass
-        except:
-            pass
+    def _resume_joystick(self):
+        # Con el daemon corriendo él es el único lector: el overlay no toca evdev
+        if self._announce_visibility(True):
+            self._input_via_daemon = True
+            if self._open_input_ring():
+                self._input_ring.read_new()  # descartar lo viejo
+            return
+        self._input_via_daemon = False
+        if self.controllers:
+            self.controllers.start()
 
-        self.joy = None
+    def _suspend_joystick(self):
+        """Cierra los mandos y termina su hilo: sin fds abiertos ni hilos despiertos."""
+        self._announce_visibility(False)
+        self._input_via_daemon = False
+        if self.controllers:
+            self.controllers.stop()
 
 
     def _hide_overlay(self):
         OVERLAY_VISIBLE.clear()
-        if self.joy:
-            try: self.joy.ungrab()
-            except: pass
+        self._reset_nav_input()
+        if self.controllers:
+            self.controllers.set_grab(False)
         self.root.withdraw()
+        # Oculto: cero timers y cero hilos despiertos (sólo el socket de control)
+        self.status.invalidate()
+        self.scheduler.suspend()
 
-    def _show_overlay(self):
+    def _show_overlay(self, trace=None):
+        # Datos frescos antes del primer frame (nada de "..." ni textos viejos)
         OVERLAY_VISIBLE.set()
-        if self.joy:
-            try: self.joy.grab()
-            except: pass
+        self.scheduler.resume()
+        if self.controllers and not self._input_via_daemon:
+            # Sin daemon leemos los mandos nosotros: que no le lleguen al juego de abajo
+            self.controllers.set_grab(True)
+        self.status.snapshot()
         self.root.deiconify()
         self.root.attributes("-fullscreen", True)
         self.root.focus_force()
         self.initial_position() # Reinicia la selección al abrir
-
-
+        if trace is not None:
+            # El resto de la traza lo completan <Map> y el primer ciclo idle (pintado)
+            trace["t_shown"] = time.monotonic()
+            self._open_trace = trace
+            self._open_trace_job = self.root.after(LATENCY_TRACE_TIMEOUT_MS, self._drop_open_trace)
+
+    def _on_root_map(self, event):
+        trace = self._open_trace
+        if event.widget is not self.root or trace is None or "t_mapped" in trace:
+            return
+        trace["t_mapped"] = time.monotonic()
+        self.root.after_idle(self._finish_open_trace)
+
+    def _finish_open_trace(self):
+        trace, self._open_trace = self._open_trace, None
+        if self._open_trace_job:
+            self.root.after_cancel(self._open_trace_job)
+            self._open_trace_job = None
+        if trace is not None:
+            self.root.update_idletasks()  # lo que quede de redibujo cuenta como pintado
+            trace["t_painted"] = time.monotonic()
+            LATENCY.record(trace)
+
+    def _drop_open_trace(self):
+        self._open_trace_job = None
+        self._open_trace = None
+
+
+def bench_menu(moves=500):
+    """Movimientos por segundo de cada renderer de la lista, con el menú real repetido.
+
+    Cada paso es lo mismo que hace move_sel (resaltar + centrar) seguido de
+    update_idletasks para que el redibujo cuente. Devuelve un dict por renderer.
+    """
+    root = tk.Tk()
+    root.geometry(f"{root.winfo_screenwidth()}x{root.winfo_screenheight()}+0+0")
+    font = pick_first_font(root, ["Inter", "Segoe UI", "Ubuntu", "DejaVu Sans"]) or "TkDefaultFont"
+    icon_font = pick_first_font(root, ["JetBrainsMono Nerd Font", "Symbols Nerd Font", "Nerd Font"]) or font
+    catalog = mos_catalog.Catalog(LAUNCHERS_DIR, ES_SYSTEMS_FILE, CATALOG_INDEX)
+    items = compose_menu(catalog.load()) * BENCH_MENU_COPIES
+    results = {}
+    for name, cls in MENU_RENDERERS.items():
+        frame = tk.Frame(root, bg=C_BG_MAIN)
+        frame.pack(fill="both", expand=True)
+        menu = cls(frame, font, icon_font, lambda i: None)
+        menu.widget.pack(fill="both", expand=True)
+        root.update()
+        t0 = time.perf_counter()
+        menu.build(items)
+        root.update()
+        t_build = time.perf_counter() - t0
+        n = len(menu.selectable)
+        idx = 0
+        t0 = time.perf_counter()
+        for step in range(moves):
+            # Baja hasta el final y vuelve a subir
+            idx = step % (2 * n - 2) if n > 1 else 0
+            idx = idx if idx < n else 2 * n - 2 - idx
+            menu.set_selected(idx)
+            menu.ensure_visible(idx)
+            root.update_idletasks()
+        elapsed = time.perf_counter() - t0
+        widgets, pending = 0, [frame]
+        while pending:
+            w = pending.pop()
+            widgets += 1
+            pending.extend(w.winfo_children())
+        results[name] = {
+            "moves_per_s": round(moves / elapsed, 1) if elapsed else None,
+            "ms_per_move": round(elapsed * 1000 / moves, 3),
+            "build_ms": round(t_build * 1000, 1),
+            "rows": len(items),
+            "widgets": widgets,
+            "canvas_items": len(menu.canvas.find_all()),
+        }
+        frame.destroy()
+    root.destroy()
+    return results
 
 if __name__ == "__main__":
+    if "--bench-menu" in sys.argv:
+        # Compara los renderers de la lista: python3 menu_overlay.py --bench-menu [movimientos]
+        i = sys.argv.index("--bench-menu")
+        moves = int(sys.argv[i + 1]) if i + 1 < len(sys.argv) else 500
+        print(json.dumps(bench_menu(moves), indent=2))
+        sys.exit()
+
     if "--toggle" in sys.argv:
+        try: mos_control.ControlClient().request("toggle", trace={"t_sent": time.monotonic()})
+        except Exception: pass
+        sys.exit()
+
+    if "--latency" in sys.argv:
+        # Histograma de latencia de apertura; con un archivo, además lo vuelca ahí
+        i = sys.argv.index("--latency")
+        dump = sys.argv[i + 1] if i + 1 < len(sys.argv) else False
         try:
-            s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            s.connect("/tmp/mos_overlay.sock")
-            s.sendall(b"toggle")
-            s.close()
-        except: pass
+            reply = mos_control.ControlClient().request("latency", dump=dump)
+            print(json.dumps(reply.get("result"), indent=2))
+        except Exception as e:
+            print(f"[Overlay] No pude consultar el overlay: {e}")
+        sys.exit()
+
+    if "--pipeline" in sys.argv:
+        # Tiempos por etapa de la última vuelta a ES-DE
+        try:
+            print(json.dumps(mos_control.ControlClient().request("pipeline").get("result"), indent=2))
+        except Exception as e:
+            print(f"[Overlay] No pude consultar el overlay: {e}")
         sys.exit()
 
+    if "--wakeups" in sys.argv:
+        try:
+            print(mos_control.ControlClient().request("wakeups").get("result"))
+        except Exception as e:
+            print(f"[Overlay] No pude consultar el overlay: {e}")
+        sys.exit()
+
+    if not PROFILE_STARTUP:
+        # Una sola instancia: dos overlays se pelearían el socket y los mandos
+        INSTANCE_LOCK = mos_control.acquire_instance_lock()
+        if INSTANCE_LOCK is None:
+            print("[Overlay] Ya hay un overlay corriendo (usá --toggle).")
+            sys.exit(mos_control.EXIT_ALREADY_RUNNING)
+        INHERITED_LISTENER = mos_control.inherited_listener()
+
     app = OverlayApp()
+    if PROFILE_STARTUP:
+        # Reporte JSON a stdout o al archivo indicado, y salir sin esperar a los workers
+        i = sys.argv.index("--profile-startup")
+        report = json.dumps(STARTUP.report(), indent=2)
+        if i + 1 < len(sys.argv):
+            with open(sys.argv[i + 1], "w") as f:
+                f.write(report + "\n")
+        else:
+            print(report, flush=True)
+        os._exit(0)
     app.root.withdraw()
     try:
         app.root.attributes("-alpha", 0.97)
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Catálogo de apps del menú, armado desde launchers/*.sh y es_systems.xml.
+
+Cada fuente (un .sh, el XML de sistemas, un directorio de lanzadores) se
+parsea una sola vez y queda en un índice en disco (JSON) con su mtime. Al
+arrancar el overlay lee el índice de una vez y ya tiene las entradas; después
+refresh() sólo vuelve a parsear las fuentes cuyo mtime cambió. Con watch() el
+overlay se entera por inotify de altas, bajas y cambios sin reescanear.
+
+Del XML sólo interesan los sistemas de apps (los que lanzan .sh): aportan el
+nombre visible, el comando y su directorio de ROMs, donde también se buscan
+lanzadores. Los sistemas de juegos (nes, ...) quedan para ES-DE.
+
+Un .sh puede declarar en las primeras líneas cabeceras opcionales:
+    # mos-label: Nombre visible
+    # mos-desc: Texto secundario de la tarjeta
+    # mos-icon: glifo Nerd Font
+"""
+
+import json
+import os
+import shlex
+import xml.etree.ElementTree as ET
+
+import mos_inotify
+
+# =========================
+# CONSTANTES
+# =========================
+INDEX_VERSION = 1
+APP_EXTENSION = ".sh"
+HEADER_LINES = 20        # las cabeceras mos-* se buscan sólo al principio del .sh
+ROM_PLACEHOLDER = "%ROM%"
+
+WATCH_MASK = (mos_inotify.IN_CLOSE_WRITE | mos_inotify.IN_MOVED_TO | mos_inotify.IN_MOVED_FROM
+              | mos_inotify.IN_CREATE | mos_inotify.IN_DELETE | mos_inotify.IN_ATTRIB)
+
+def _mtime(path):
+    try: return os.stat(path).st_mtime_ns
+    except OSError: return None
+
+# =========================
+# PARSERS (uno por tipo de fuente)
+# =========================
+def parse_launcher(path):
+    """Cabeceras `# mos-<clave>: valor` de un lanzador."""
+    meta = {}
+    with open(path, "r", errors="replace") as f:
+        for n, line in enumerate(f):
+            if n >= HEADER_LINES:
+                break
+            line = line.strip()
+            if line.startswith("# mos-") and ":" in line:
+                key, _, value = line[len("# mos-"):].partition(":")
+                meta[key.strip()] = value.strip()
+    return meta
+
+def parse_es_systems(path):
+    """{nombre: sistema} de los <system> de es_systems.xml que lanzan scripts."""
+    systems = {}
+    for node in ET.parse(path).getroot().iter("system"):
+        if APP_EXTENSION not in (node.findtext("extension") or "").split():
+            continue
+        name = (node.findtext("name") or "").strip()
+        if not name:
+            continue
+        systems[name.lower()] = {
+            "name": name,
+            "fullname": (node.findtext("fullname") or name).strip(),
+            "path": (node.findtext("path") or "").strip(),
+            "command": (node.findtext("command") or "").strip(),
+            "category": (node.findtext("category") or "").strip(),
+        }
+    return systems
+
+def parse_dir(path):
+    """Lanzadores (.sh) de un directorio, ordenados."""
+    return sorted(n for n in os.listdir(path) if n.endswith(APP_EXTENSION) and not n.startswith("."))
+
+_PARSERS = {"launcher": parse_launcher, "systems": parse_es_systems, "dir": parse_dir}
+
+def build_command(system, script):
+    """argv para lanzar `script`: el <command> del sistema o bash a secas."""
+    if system and ROM_PLACEHOLDER in system["command"]:
+        try:
+            return [script if arg == ROM_PLACEHOLDER else arg.replace(ROM_PLACEHOLDER, script)
+                    for arg in shlex.split(system["command"])]
+        except ValueError:
+            pass
+    return ["bash", script]
+
+# =========================
+# CATÁLOGO
+# =========================
+class Catalog:
+    """Entradas del menú sacadas de los lanzadores, con índice incremental.
+
+    entries es una lista de dicts serializables:
+    {"id", "label", "desc", "icon", "cmd", "source"}. `parsed` cuenta cuántas
+    fuentes se parsearon en el último refresh() (0 con todo al día).
+    """
+
+    def __init__(self, launchers_dir, es_systems, index_path):
+        self.launchers_dir = launchers_dir
+        self.es_systems = es_systems
+        self.index_path = index_path
+        self.sources = {}   # ruta -> {"kind", "mtime", "data"}
+        self.entries = []
+        self.parsed = 0
+        self.ino = None
+        self._watched = {}  # ruta vigilada -> wd
+
+    # --- índice en disco ---
+    def load(self):
+        """Lee el índice cacheado (una sola lectura). Devuelve las entradas."""
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self.entries
+        if isinstance(data, dict) and data.get("version") == INDEX_VERSION \
+                and data.get("roots") == self._roots():
+            self.sources = data.get("sources", {})
+            self.entries = data.get("entries", [])
+        return self.entries
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp = self.index_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"version": INDEX_VERSION, "roots": self._roots(),
+                           "sources": self.sources, "entries": self.entries}, f)
+            os.replace(tmp, self.index_path)
+        except OSError as e:
+            print(f"[Catalog] No pude guardar el índice: {e}")
+
+    def _roots(self):
+        return [self.launchers_dir, self.es_systems]
+
+    # --- actualización incremental ---
+    def refresh(self):
+        """Revisa los mtimes y reparsea sólo lo que cambió. True si cambiaron las entradas."""
+        self.parsed = 0
+        seen = {}
+
+        def source(path, kind):
+            mtime = _mtime(path)
+            if mtime is None:
+                return None
+            old = self.sources.get(path)
+            if old and old["kind"] == kind and old["mtime"] == mtime:
+                data = old["data"]
+            else:
+                try:
+                    data = _PARSERS[kind](path)
+                except (OSError, ValueError, ET.ParseError) as e:
+                    print(f"[Catalog] {path}: {e}")
+                    data = None
+                self.parsed += 1
+            seen[path] = {"kind": kind, "mtime": mtime, "data": data}
+            return data
+
+        systems = source(self.es_systems, "systems") or {}
+        # Primero los directorios de ROMs de cada sistema: es lo que ejecuta ES-DE
+        dirs = [(s["path"], s) for s in systems.values() if s["path"]]
+        dirs.append((self.launchers_dir, None))
+
+        entries, ids = [], set()
+        for dirpath, dir_system in dirs:
+            names = source(dirpath, "dir") or []
+            for name in names:
+                script = os.path.join(dirpath, name)
+                meta = source(script, "launcher")
+                if meta is None:
+                    continue
+                stem = name[:-len(APP_EXTENSION)]
+                ident = stem.lower()
+                if ident in ids:
+                    continue
+                system = systems.get(ident) or (dir_system if len(names) == 1 else None)
+                label = meta.get("label") or (system["fullname"] if system else stem)
+                entries.append({
+                    "id": ident,
+                    "label": label,
+                    "desc": meta.get("desc") or f"Abrir {label}",
+                    "icon": meta.get("icon"),
+                    "cmd": build_command(system, script),
+                    "source": script,
+                })
+                ids.add(ident)
+
+        changed = entries != self.entries
+        if changed or self.parsed or seen.keys() != self.sources.keys():
+            self.sources = seen
+            self.entries = entries
+            self.save()
+        if self.ino is not None:
+            self._sync_watches()
+        return changed
+
+    # --- inotify ---
+    def watch(self):
+        """Abre el inotify del catálogo. Devuelve el objeto (tiene fileno()) o None."""
+        try:
+            self.ino = mos_inotify.Inotify()
+        except OSError as e:
+            print(f"[Catalog] Sin inotify: {e}")
+            return None
+        self._sync_watches()
+        return self.ino
+
+    def _sync_watches(self):
+        # Los directorios (no los archivos): así se ven los reemplazos atómicos
+        wanted = {path for path, src in self.sources.items() if src["kind"] == "dir"}
+        wanted.add(self.launchers_dir)
+        wanted.add(os.path.dirname(self.es_systems))
+        for path in [p for p in self._watched if p not in wanted]:
+            try: self.ino.rm_watch(self._watched.pop(path))
+            except OSError: pass
+        for path in wanted - self._watched.keys():
+            try:
+                self._watched[path] = self.ino.add_watch(path, WATCH_MASK | mos_inotify.IN_ONLYDIR)
+            except OSError:
+                pass  # no existe (todavía): se reintenta en el próximo refresh
+
+    def pending(self):
+        """Consume los eventos de inotify. True si alguno toca al catálogo."""
+        if self.ino is None:
+            return False
+        relevant = False
+        es_dir, es_name = os.path.split(self.es_systems)
+        for path, mask, name in self.ino.read_events():
+            if mask & mos_inotify.IN_IGNORED:
+                self._watched.pop(path, None)
+                relevant = True
+            elif path == es_dir and name == es_name:
+                relevant = True
+            elif name.endswith(APP_EXTENSION) or mask & mos_inotify.IN_ISDIR:
+                relevant = True
+        return relevant
+
+    def close(self):
+        if self.ino is not None:
+            self.ino.close()
+            self.ino = None
+            self._watched.clear()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Protocolo de control del overlay sobre /tmp/mos_overlay.sock.
+
+Conexiones persistentes con mensajes JSON de una línea (terminados en "\\n"):
+
+    -> {"id": 7, "cmd": "navigate", "args": {"direction": "down", "count": 3}}
+    <- {"id": 7, "cmd": "navigate", "ok": true, "result": {...},
+        "t_recv": 12345.678901, "t_done": 12345.679120}
+
+t_recv/t_done son time.monotonic() del servidor (CLOCK_MONOTONIC, común a
+todos los procesos de la máquina), así el cliente puede separar el tiempo de
+ida y vuelta del tiempo de ejecución. Comandos: show, hide, toggle, navigate,
+select, refresh, status, latency, pipeline (tiempos de la última vuelta a
+ES-DE) y wakeups, por compatibilidad.
+
+show/toggle aceptan args.trace: marcas CLOCK_MONOTONIC previas (t_event del
+kernel, t_read, t_sent) para medir la latencia de apertura por tramo.
+
+Por compatibilidad también se acepta la palabra suelta ("toggle", "wakeups")
+aunque el cliente cierre sin mandar "\\n".
+
+El socket normalmente lo escucha overlay_daemon y se lo pasa al overlay al
+lanzarlo (estilo activación por socket de systemd: LISTEN_FDS=1; el número de
+fd va en MOS_LISTEN_FD, o 3 como en systemd), así un toggle nunca se pierde
+aunque el overlay esté arrancando o se haya caído.
+
+Uso desde scripts: mos_control.py CMD ['{"arg": valor}']
+"""
+
+import fcntl
+import json
+import os
+import selectors
+import socket
+import sys
+import time
+
+SOCK_PATH = "/tmp/mos_overlay.sock"
+LOCK_PATH = "/tmp/mos_overlay.lock"
+LISTEN_FDS_START = 3   # SD_LISTEN_FDS_START
+EXIT_ALREADY_RUNNING = 3
+MAX_LINE = 64 * 1024   # una línea más larga que esto cierra la conexión
+COMMANDS = ("show", "hide", "toggle", "navigate", "select", "refresh", "status", "latency", "wakeups", "pipeline")
+
+class ControlError(Exception):
+    """Error de un comando: se responde con ok=false y el mensaje."""
+
+# =========================
+# SOCKET E INSTANCIA ÚNICA
+# =========================
+def socket_in_use(path=SOCK_PATH):
+    """True si hay alguien escuchando en `path` (overlay o daemon)."""
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        s.close()
+
+def bind_listener(path=SOCK_PATH):
+    """Socket de escucha en `path`. Sólo borra un socket viejo si nadie lo escucha."""
+    if os.path.exists(path):
+        if socket_in_use(path):
+            raise OSError(f"{path} ya está en uso")
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    try: os.chmod(path, 0o666)
+    except OSError: pass
+    sock.listen(16)
+    return sock
+
+def inherited_listener():
+    """El socket de escucha heredado (LISTEN_FDS, LISTEN_PID si está), o None."""
+    try:
+        nfds = int(os.environ.get("LISTEN_FDS", "0"))
+        pid = int(os.environ.get("LISTEN_PID", os.getpid()))
+        fd = int(os.environ.get("MOS_LISTEN_FD", LISTEN_FDS_START))
+    except ValueError:
+        return None
+    for var in ("LISTEN_FDS", "LISTEN_PID", "LISTEN_FDNAMES", "MOS_LISTEN_FD"):
+        os.environ.pop(var, None)  # que no lo hereden nuestros hijos
+    if nfds < 1 or pid != os.getpid():
+        return None
+    try:
+        sock = socket.socket(fileno=fd)
+    except OSError:
+        return None
+    if sock.family != socket.AF_UNIX or sock.type != socket.SOCK_STREAM:
+        sock.detach()
+        return None
+    sock.set_inheritable(False)
+    return sock
+
+def listener_env(fd):
+    """Entorno para lanzar el overlay heredando `fd` (pasarlo también en pass_fds)."""
+    env = dict(os.environ)
+    for var in ("LISTEN_PID", "LISTEN_FDNAMES"):
+        env.pop(var, None)
+    env.update(LISTEN_FDS="1", MOS_LISTEN_FD=str(fd))
+    return env
+
+def acquire_instance_lock(path=LOCK_PATH):
+    """flock exclusivo de instancia única. Devuelve el archivo (mantenerlo abierto) o None."""
+    f = open(path, "a")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    os.set_inheritable(f.fileno(), False)
+    return f
+
+# =========================
+# SERVIDOR
+# =========================
+class _Conn:
+    __slots__ = ("sock", "inbuf", "outbuf")
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.inbuf = b""
+        self.outbuf = b""
+
+class ControlServer:
+    """Servidor no bloqueante de muchos clientes, sin hilos propios.
+
+    Todo vive en un selector interno; su fileno() (el epoll) se vuelve legible
+    cuando cualquier socket está listo, así que alcanza con registrarlo en el
+    loop del dueño (Tk createfilehandler) y llamar a process().
+    handler(cmd, args) corre en ese mismo hilo: devuelve el resultado o lanza
+    ControlError.
+    """
+
+    def __init__(self, handler, path=SOCK_PATH, sock=None):
+        self.handler = handler
+        self.path = path
+        if sock is None:
+            sock = bind_listener(path)
+        sock.setblocking(False)
+        self.listener = sock
+        self.sel = selectors.DefaultSelector()
+        self.sel.register(sock, selectors.EVENT_READ, None)
+        self.conns = {}
+
+    def fileno(self):
+        return self.sel.fileno()
+
+    def process(self):
+        """Atiende todo lo que esté listo, sin bloquear."""
+        for key, events in self.sel.select(0):
+            if key.data is None:
+                self._accept()
+                continue
+            conn = key.data
+            if events & selectors.EVENT_READ:
+                self._read(conn)
+            if events & selectors.EVENT_WRITE and conn.sock.fileno() in self.conns:
+                self._flush(conn)
+
+    def close(self):
+        for conn in list(self.conns.values()):
+            self._drop(conn)
+        try: self.sel.unregister(self.listener)
+        except Exception: pass
+        self.listener.close()
+        self.sel.close()
+
+    def _accept(self):
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            sock.setblocking(False)
+            conn = _Conn(sock)
+            self.conns[sock.fileno()] = conn
+            self.sel.register(sock, selectors.EVENT_READ, conn)
+
+    def _read(self, conn):
+        try:
+            data = conn.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        t_recv = time.monotonic()
+        if not data:
+            # EOF: lo que quedó sin "\n" es un cliente viejo ("toggle" y cerrar)
+            if conn.inbuf.strip():
+                self._handle(conn, conn.inbuf, t_recv)
+                conn.inbuf = b""
+                self._flush(conn)
+            self._drop(conn)
+            return
+        conn.inbuf += data
+        while b"\n" in conn.inbuf:
+            line, conn.inbuf = conn.inbuf.split(b"\n", 1)
+            if line.strip():
+                self._handle(conn, line, t_recv)
+        if len(conn.inbuf) > MAX_LINE:
+            self._drop(conn)
+            return
+        self._flush(conn)
+
+    def _handle(self, conn, line, t_recv):
+        reply = {"id": None, "ok": False, "t_recv": t_recv}
+        try:
+            text = line.decode().strip()
+            if text.startswith("{"):
+                msg = json.loads(text)
+                reply["id"] = msg.get("id")
+                cmd, args = msg.get("cmd"), msg.get("args") or {}
+            else:
+                cmd, args = text, {}
+            reply["cmd"] = cmd
+            if cmd not in COMMANDS:
+                raise ControlError(f"comando desconocido: {cmd!r}")
+            reply["result"] = self.handler(cmd, args)
+            reply["ok"] = True
+        except ControlError as e:
+            reply["error"] = str(e)
+        except (ValueError, AttributeError) as e:
+            reply["error"] = f"mensaje inválido: {e}"
+        except Exception as e:
+            reply["error"] = f"{type(e).__name__}: {e}"
+        reply["t_done"] = time.monotonic()
+        conn.outbuf += json.dumps(reply).encode() + b"\n"
+
+    def _flush(self, conn):
+        if conn.outbuf:
+            try:
+                sent = conn.sock.send(conn.outbuf)
+                conn.outbuf = conn.outbuf[sent:]
+            except (BlockingIOError, InterruptedError):
+                pass
+            except OSError:
+                self._drop(conn)
+                return
+        # Sólo pedimos EVENT_WRITE mientras haya algo pendiente
+        want = selectors.EVENT_READ | (selectors.EVENT_WRITE if conn.outbuf else 0)
+        try:
+            if self.sel.get_key(conn.sock).events != want:
+                self.sel.modify(conn.sock, want, conn)
+        except (KeyError, ValueError):
+            pass
+
+    def _drop(self, conn):
+        self.conns.pop(conn.sock.fileno(), None)
+        try: self.sel.unregister(conn.sock)
+        except Exception: pass
+        conn.sock.close()
+
+# =========================
+# CLIENTE
+# =========================
+class ControlClient:
+    """Conexión persistente al overlay. Reconecta sola si el overlay reinició."""
+
+    def __init__(self, path=SOCK_PATH, timeout=1.0):
+        self.path = path
+        self.timeout = timeout
+        self.sock = None
+        self._buf = b""
+        self._next_id = 0
+
+    def connect(self):
+        if self.sock is None:
+            s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                s.connect(self.path)
+            except OSError:
+                s.close()
+                raise
+            self.sock = s
+            self._buf = b""
+        return self.sock
+
+    def close(self):
+        if self.sock:
+            try: self.sock.close()
+            except OSError: pass
+        self.sock = None
+
+    def send(self, cmd, **args):
+        """Manda un comando sin esperar el ack. Devuelve el id."""
+        self._next_id += 1
+        line = json.dumps({"id": self._next_id, "cmd": cmd, "args": args}).encode() + b"\n"
+        for attempt in (0, 1):
+            try:
+                self.connect()
+                self._discard_pending()
+                self.sock.sendall(line)
+                return self._next_id
+            except OSError:
+                self.close()
+                if attempt:
+                    raise
+        return self._next_id
+
+    def request(self, cmd, **args):
+        """Manda un comando y espera su ack. Agrega 'rtt' (s) medido en el cliente."""
+        t0 = time.monotonic()
+        rid = self.send(cmd, **args)
+        deadline = t0 + self.timeout
+        while True:
+            reply = self._read_reply(deadline)
+            if reply.get("id") == rid:
+                reply["rtt"] = time.monotonic() - t0
+                return reply
+
+    def _read_reply(self, deadline):
+        while b"\n" not in self._buf:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.close()
+                raise TimeoutError("el overlay no respondió")
+            self.sock.settimeout(remaining)
+            try:
+                data = self.sock.recv(65536)
+            finally:
+                if self.sock: self.sock.settimeout(None)
+            if not data:
+                self.close()
+                raise ConnectionError("el overlay cerró la conexión")
+            self._buf += data
+        line, self._buf = self._buf.split(b"\n", 1)
+        return json.loads(line)
+
+    def _discard_pending(self):
+        # Acks de send() que nadie esperó: que no se acumulen en el socket
+        self.sock.setblocking(False)
+        try:
+            while True:
+                data = self.sock.recv(65536)
+                if not data:
+                    raise ConnectionError("el overlay cerró la conexión")
+                self._buf += data
+        except (BlockingIOError, InterruptedError):
+            pass
+        finally:
+            if self.sock: self.sock.setblocking(True)
+        self._buf = self._buf[self._buf.rfind(b"\n") + 1:]
+
+def main(argv):
+    if not argv or argv[0] not in COMMANDS:
+        print(f"Uso: {os.path.basename(sys.argv[0])} {{{'|'.join(COMMANDS)}}} ['{{json args}}']", file=sys.stderr)
+        return 2
+    args = json.loads(argv[1]) if len(argv) > 1 else {}
+    try:
+        reply = ControlClient().request(argv[0], **args)
+    except (OSError, TimeoutError) as e:
+        print(f"[Control] No pude hablar con el overlay: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(reply, indent=2, ensure_ascii=False))
+    return 0 if reply.get("ok") else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
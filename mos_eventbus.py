@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Bus de eventos de navegación entre overlay_daemon y menu_overlay.
+
+El daemon es el único lector de los mandos: normaliza los eventos evdev a
+acciones de navegación (arriba/abajo/izquierda/derecha/aceptar/volver + fin de
+frame) y las publica en un ring buffer mmap'eado en /dev/shm. Después de cada
+frame toca un "timbre" (datagrama Unix) para que el overlay lea el ring.
+El overlay avisa al daemon por el mismo mecanismo cuándo se muestra u oculta,
+así el daemon sólo agarra (grab) los mandos y publica mientras hace falta.
+
+No depende de evdev: los códigos de linux/input-event-codes.h están acá.
+"""
+
+import mmap
+import os
+import socket
+import struct
+
+# =========================
+# RUTAS
+# =========================
+RING_PATH = "/dev/shm/mos_input_ring" if os.path.isdir("/dev/shm") else "/tmp/mos_input_ring"
+OVERLAY_BELL = "/tmp/mos_overlay_bell.sock"   # lo bindea el overlay, escribe el daemon
+DAEMON_BELL = "/tmp/mos_daemon_bell.sock"     # lo bindea el daemon, escribe el overlay
+
+# =========================
+# CÓDIGOS EVDEV (input-event-codes.h)
+# =========================
+EV_SYN, EV_KEY, EV_ABS = 0x00, 0x01, 0x03
+SYN_REPORT, SYN_DROPPED = 0, 3
+BTN_SOUTH, BTN_EAST = 0x130, 0x131   # == BTN_A/BTN_GAMEPAD, BTN_B
+BTN_TL, BTN_TR = 0x136, 0x137
+ABS_X, ABS_Y = 0x00, 0x01
+ABS_HAT0X, ABS_HAT0Y = 0x10, 0x11
+
+AXIS_THRESHOLD = 18000   # Zona muerta del stick sobre un rango de ±32767 (aprox 50%)
+AXIS_RELEASE = 0.7       # Histéresis: se suelta por debajo del 70% del umbral
+
+# =========================
+# ACCIONES NORMALIZADAS
+# =========================
+NAV_SYN = 0      # fin de frame (SYN_REPORT con acciones)
+NAV_UP = 1
+NAV_DOWN = 2
+NAV_LEFT = 3
+NAV_RIGHT = 4
+NAV_SELECT = 5
+NAV_BACK = 6
+NAV_STICK_X = 7  # estado del stick analógico: value -1 / 0 / 1
+NAV_STICK_Y = 8
+
+NAV_NAMES = {NAV_SYN: "syn", NAV_UP: "up", NAV_DOWN: "down", NAV_LEFT: "left",
+             NAV_RIGHT: "right", NAV_SELECT: "select", NAV_BACK: "back",
+             NAV_STICK_X: "stick-x", NAV_STICK_Y: "stick-y"}
+
+# Mensajes de timbre
+BELL_EVENTS = b"E"   # daemon -> overlay: hay frames nuevos en el ring
+BELL_HELLO = b"H"    # daemon -> overlay: el daemon (re)arrancó, volvé a anunciarte
+BELL_SHOW = b"S"     # overlay -> daemon: overlay visible
+BELL_HIDE = b"h"     # overlay -> daemon: overlay oculto
+
+_KEY_NAV = {BTN_SOUTH: NAV_SELECT, BTN_EAST: NAV_BACK, BTN_TL: NAV_UP, BTN_TR: NAV_DOWN}
+_HAT_NAV = {
+    (ABS_HAT0Y, -1): NAV_UP, (ABS_HAT0Y, 1): NAV_DOWN,
+    (ABS_HAT0X, -1): NAV_LEFT, (ABS_HAT0X, 1): NAV_RIGHT,
+}
+
+_STICK_NAV = {ABS_X: NAV_STICK_X, ABS_Y: NAV_STICK_Y}
+
+def axis_ranges(dev):
+    """{ABS_X/ABS_Y: (min, max)} de un InputDevice de evdev (los que tenga)."""
+    ranges = {}
+    for code in _STICK_NAV:
+        try:
+            info = dev.absinfo(code)
+            ranges[code] = (info.min, info.max)
+        except Exception:
+            pass
+    return ranges
+
+class NavNormalizer:
+    """Traduce eventos evdev crudos de un mando a acciones NAV_*.
+
+    feed() devuelve (acción, valor) o None. Los botones y el D-pad dan valor 1;
+    el stick analógico sólo emite NAV_STICK_X/Y cuando cambia de zona (-1/0/1).
+    Con SYN_REPORT devuelve NAV_SYN sólo si el frame tuvo alguna acción, para
+    no publicar frames vacíos.
+    """
+
+    def __init__(self, ranges=None, threshold=AXIS_THRESHOLD):
+        self.ranges = ranges or {}
+        self.threshold = threshold / 32767.0
+        self._stick = {}
+        self._dirty = False
+
+    def _axis(self, code, value):
+        lo, hi = self.ranges.get(code, (-32768, 32767))
+        half = (hi - lo) / 2.0 or 1.0
+        pos = (value - (lo + hi) / 2.0) / half
+        prev = self._stick.get(code, 0)
+        limit = self.threshold if prev == 0 else self.threshold * AXIS_RELEASE
+        direction = 0 if abs(pos) < limit else (1 if pos > 0 else -1)
+        if direction == prev:
+            return None
+        self._stick[code] = direction
+        return _STICK_NAV[code], direction
+
+    def feed(self, etype, code, value):
+        res = None
+        if etype == EV_KEY:
+            if value == 1 and code in _KEY_NAV:
+                res = (_KEY_NAV[code], 1)
+        elif etype == EV_ABS:
+            if code in _STICK_NAV:
+                res = self._axis(code, value)
+            elif (code, value) in _HAT_NAV:
+                res = (_HAT_NAV[(code, value)], 1)
+        elif etype == EV_SYN and code == SYN_REPORT:
+            if self._dirty:
+                self._dirty = False
+                return NAV_SYN, 0
+            return None
+        if res is not None:
+            self._dirty = True
+        return res
+
+# =========================
+# LECTURA EN LOTE
+# =========================
+INPUT_EVENT = struct.Struct("llHHi")  # struct input_event: sec, usec, type, code, value
+READ_BATCH = 64                       # eventos por read()
+
+def read_batch(fd, batch=READ_BATCH):
+    """Lee todo lo pendiente de un fd evdev no bloqueante, sin armar objetos.
+
+    Devuelve (lecturas, [(sec, usec, type, code, value), ...]). Los errores de
+    lectura (ENODEV al desconectar) se propagan como OSError.
+    """
+    size = batch * INPUT_EVENT.size
+    reads, events = 0, []
+    while True:
+        try:
+            data = os.read(fd, size)
+        except BlockingIOError:
+            break
+        reads += 1
+        events.extend(INPUT_EVENT.iter_unpack(data))
+        if len(data) < size:
+            break
+    return reads, events
+
+def collapse_frame(events):
+    """Un frame (eventos entre SYN_REPORTs) con un solo valor por eje: el último."""
+    last = {}
+    for i, ev in enumerate(events):
+        if ev[2] == EV_ABS:
+            last[ev[3]] = i
+    if len(last) == sum(1 for ev in events if ev[2] == EV_ABS):
+        return events
+    return [ev for i, ev in enumerate(events) if ev[2] != EV_ABS or last[ev[3]] == i]
+
+# =========================
+# RING BUFFER
+# =========================
+_HEADER = struct.Struct("<IIQ")     # magic, capacity, write_seq
+_RECORD = struct.Struct("<QdHhI")   # seq, timestamp (kernel), kind, value, device
+RING_MAGIC = 0x4D4F5352             # "MOSR"
+RING_CAPACITY = 256
+
+def ring_size(capacity):
+    return _HEADER.size + capacity * _RECORD.size
+
+class EventRing:
+    """Ring de un solo escritor (daemon) y un lector (overlay) sobre mmap.
+
+    El escritor completa el registro antes de publicar write_seq; el lector
+    descarta cualquier registro cuyo seq no coincida (sobrescrito mientras leía).
+    """
+
+    def __init__(self, path=RING_PATH, capacity=RING_CAPACITY, writer=False):
+        self.path = path
+        self.writer = writer
+        if writer:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                os.ftruncate(fd, ring_size(capacity))
+                self.mm = mmap.mmap(fd, ring_size(capacity))
+            finally:
+                os.close(fd)
+            self.capacity = capacity
+            self.seq = 0
+            _HEADER.pack_into(self.mm, 0, RING_MAGIC, capacity, 0)
+        else:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                size = os.fstat(fd).st_size
+                self.mm = mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+            finally:
+                os.close(fd)
+            magic, self.capacity, self.seq = _HEADER.unpack_from(self.mm, 0)
+            if magic != RING_MAGIC or size < ring_size(self.capacity):
+                self.mm.close()
+                raise ValueError(f"{path}: no es un ring de M-OS")
+        self.lost = 0
+
+    def publish(self, kind, timestamp=0.0, value=0, device=0):
+        seq = self.seq + 1
+        off = _HEADER.size + (seq % self.capacity) * _RECORD.size
+        _RECORD.pack_into(self.mm, off, seq, timestamp, kind, value, device)
+        # Recién ahora el registro es visible para el lector
+        _HEADER.pack_into(self.mm, 0, RING_MAGIC, self.capacity, seq)
+        self.seq = seq
+
+    def read_new(self):
+        """Registros nuevos desde la última lectura: [(seq, ts, kind, value, device)]."""
+        _, _, head = _HEADER.unpack_from(self.mm, 0)
+        if head < self.seq:
+            self.seq = 0  # el daemon reinició el ring
+        if head - self.seq > self.capacity:
+            self.lost += head - self.seq - self.capacity
+            self.seq = head - self.capacity
+        out = []
+        for seq in range(self.seq + 1, head + 1):
+            rec = _RECORD.unpack_from(self.mm, _HEADER.size + (seq % self.capacity) * _RECORD.size)
+            if rec[0] == seq:
+                out.append(rec)
+            else:
+                self.lost += 1
+        self.seq = head
+        return out
+
+    def close(self):
+        try: self.mm.close()
+        except Exception: pass
+
+# =========================
+# TIMBRES
+# =========================
+def bind_bell(path):
+    """Socket datagrama no bloqueante en `path` (reemplaza uno viejo)."""
+    try: os.unlink(path)
+    except FileNotFoundError: pass
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    s.bind(path)
+    s.setblocking(False)
+    try: os.chmod(path, 0o666)
+    except OSError: pass
+    return s
+
+def ring_bell(sock, path, msg=BELL_EVENTS):
+    """Envía un timbre. Devuelve False si no hay nadie escuchando en `path`."""
+    try:
+        sock.sendto(msg, path)
+        return True
+    except BlockingIOError:
+        return True  # el otro lado tiene timbres sin leer: igual se va a enterar
+    except OSError:
+        return False
+
+def drain_bell(sock):
+    """Vacía los timbres pendientes y devuelve los mensajes distintos recibidos."""
+    msgs = set()
+    while True:
+        try:
+            msgs.add(sock.recv(64))
+        except (BlockingIOError, InterruptedError):
+            return msgs
+        except OSError:
+            return msgs
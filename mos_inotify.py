@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""inotify mínimo vía ctypes (sin dependencias externas).
+
+Lo usan el daemon y el overlay para enterarse de hotplug en /dev/input y de
+cambios en archivos de estado sin tener que reescanear ni hacer polling.
+El fd es no bloqueante: se registra en un selector y se llama a read_events()
+cuando está listo.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+
+# =========================
+# CONSTANTES (linux/inotify.h)
+# =========================
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+
+_libc = None
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    return _libc
+
+class Inotify:
+    """Un fd de inotify con sus watches. read_events() devuelve (dir, mask, nombre)."""
+
+    def __init__(self):
+        libc = _load_libc()
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd = fd
+        self._paths = {}  # wd -> path vigilado
+
+    def fileno(self):
+        return self.fd
+
+    def add_watch(self, path, mask):
+        wd = _load_libc().inotify_add_watch(self.fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        self._paths[wd] = path
+        return wd
+
+    def rm_watch(self, wd):
+        self._paths.pop(wd, None)
+        _load_libc().inotify_rm_watch(self.fd, wd)
+
+    def read_events(self):
+        """Lee todo lo pendiente en un solo read(). No bloquea."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        except OSError as e:
+            if e.errno == errno.EINTR:
+                return []
+            raise
+
+        events = []
+        off = 0
+        while off + _EVENT.size <= len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, off)
+            off += _EVENT.size
+            name = data[off:off + length].rstrip(b"\0").decode(errors="replace")
+            off += length
+            path = self._paths.get(wd)
+            if mask & IN_IGNORED:
+                self._paths.pop(wd, None)
+            if path is not None:
+                events.append((path, mask, name))
+        return events
+
+    def close(self):
+        try: os.close(self.fd)
+        except OSError: pass
+        self._paths.clear()
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Registro de procesos lanzados por M-OS y cierre ordenado de sus grupos.
+
+Cada app se lanza en su propia sesión (start_new_session), así que su pid es
+también el id de su grupo de procesos. El registro guarda pid, pgid y el
+starttime de /proc/<pid>/stat (para no confundir un pid reciclado con la app)
+y el cierre manda SIGTERM a todos los grupos a la vez, espera con pidfds y
+sólo escala a SIGKILL pasado el plazo: tarda lo que la app más lenta, no una
+suma de sleeps fijos.
+
+El registro es REGISTRY_PATH, una línea por proceso: "pid pgid inicio nombre".
+Lo comparten el script register_app y cerrar_apps.sh. Las líneas viejas (sólo
+un nombre) se resuelven por nombre exacto de proceso, nunca por cmdline.
+"""
+
+import os
+import select
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+# =========================
+# CONSTANTES
+# =========================
+REGISTRY_PATH = "/tmp/open_apps"
+TERM_TIMEOUT = 3.0     # segundos entre SIGTERM y SIGKILL
+GROUP_POLL = 0.02      # con el líder ya muerto, cada cuánto se revisa el resto del grupo
+REAP_SWEEP = 5.0       # sin pidfd: cada cuánto se barren los hijos con waitpid(WNOHANG)
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+
+# Apps que se cierran con su propio comando en vez de señales (subcadena del nombre)
+STOP_COMMANDS = {
+    "waydroid": ["waydroid", "session", "stop"],
+}
+
+# =========================
+# /proc
+# =========================
+def proc_stat(pid):
+    """(pgid, starttime) de un proceso vivo, o None."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # comm puede tener espacios y paréntesis: los campos siguen al último ')'
+    fields = data[data.rfind(b")") + 2:].split()
+    try:
+        return int(fields[2]), int(fields[19])
+    except (IndexError, ValueError):
+        return None
+
+def find_by_name(names):
+    """{pid: comm} de los procesos cuyo comm es exactamente alguno de `names` (una pasada)."""
+    wanted = {n[:15] for n in names}  # el kernel trunca comm a 15 caracteres
+    found = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/comm", "r") as f:
+                comm = f.read().strip()
+        except OSError:
+            continue
+        if comm in wanted:
+            found[int(entry)] = comm
+    return found
+
+def _pidfd(pid):
+    try:
+        return os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        return None  # Python < 3.9, kernel < 5.3 o el proceso ya no existe
+
+def _reap(pid):
+    # Si el proceso es hijo nuestro (lanzado con spawn) hay que recogerlo: un zombi sigue "vivo"
+    try: os.waitpid(pid, os.WNOHANG)
+    except ChildProcessError: pass
+
+def _alive(target):
+    kind, ident = target
+    _reap(ident)
+    try:
+        if kind == "group": os.killpg(ident, 0)
+        else: os.kill(ident, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+def _signal(target, sig):
+    kind, ident = target
+    try:
+        if kind == "group": os.killpg(ident, sig)
+        else: os.kill(ident, sig)
+        return True
+    except OSError:
+        return False
+
+def proc_tree(pid):
+    """pid y todos sus descendientes vivos (vía /proc/<pid>/task/*/children)."""
+    tree, pending = [], [pid]
+    while pending:
+        p = pending.pop()
+        try: tasks = os.listdir(f"/proc/{p}/task")
+        except OSError: continue
+        tree.append(p)
+        for tid in tasks:
+            try:
+                with open(f"/proc/{p}/task/{tid}/children", "r") as f:
+                    pending.extend(int(c) for c in f.read().split())
+            except OSError:
+                pass
+    return tree
+
+# =========================
+# HIJOS
+# =========================
+class ChildReaper:
+    """Recoge a los hijos apenas terminan, para que no queden zombis.
+
+    Un hilo espera sobre un pidfd por hijo (se despierta sólo cuando alguno
+    termina) y hace proc.poll(), que además deja el returncode en el Popen.
+    Sin pidfd (kernel < 5.3) se barre cada REAP_SWEEP segundos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._procs = {}       # pidfd (o -pid sin pidfd) -> Popen
+        self._poller = select.poll()
+        self._wake_r, self._wake_w = os.pipe()
+        self._poller.register(self._wake_r, select.POLLIN)
+        self._thread = None
+        self.reaped = 0
+
+    def watch(self, proc):
+        fd = _pidfd(proc.pid)
+        with self._lock:
+            if fd is not None:
+                self._procs[fd] = proc
+                self._poller.register(fd, select.POLLIN)
+            else:
+                self._procs[-proc.pid] = proc
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="mos-reaper", daemon=True)
+                self._thread.start()
+        os.write(self._wake_w, b"x")  # que el poll vea el fd nuevo
+
+    def pending(self):
+        with self._lock:
+            return len(self._procs)
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                sweep = any(k < 0 for k in self._procs)
+            events = self._poller.poll(REAP_SWEEP * 1000 if sweep else None)
+            with self._lock:
+                for fd, _ in events:
+                    if fd == self._wake_r:
+                        os.read(self._wake_r, 64)
+                        continue
+                    proc = self._procs.pop(fd, None)
+                    self._poller.unregister(fd)
+                    os.close(fd)
+                    if proc is not None:
+                        proc.poll()
+                        self.reaped += 1
+                for key in [k for k in self._procs if k < 0]:
+                    if self._procs[key].poll() is not None:
+                        del self._procs[key]
+                        self.reaped += 1
+
+# =========================
+# CONSUMO POR APP
+# =========================
+def read_memory(pid):
+    """(VmRSS, VmSwap) en bytes de /proc/<pid>/status, o None si ya no está.
+
+    Un proceso de kernel o zombi no tiene esas líneas: cuenta como 0.
+    """
+    rss = swap = 0
+    try:
+        with open(f"/proc/{pid}/status", "rb") as f:
+            for line in f:
+                if line.startswith(b"VmRSS:"):
+                    rss = int(line.split()[1]) * 1024
+                elif line.startswith(b"VmSwap:"):
+                    swap = int(line.split()[1]) * 1024
+                    break  # VmSwap viene después de VmRSS
+    except (OSError, ValueError, IndexError):
+        return None
+    return rss, swap
+
+def read_usage(pid):
+    """(ticks de CPU, RSS, swap, bytes de E/S) de un proceso, o None si ya no está."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            fields = f.read().rsplit(b")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    ticks = int(fields[11]) + int(fields[12])   # utime + stime
+    memory = read_memory(pid)
+    if memory is None:
+        return None
+    rss, swap = memory
+    io = 0
+    try:
+        with open(f"/proc/{pid}/io", "rb") as f:
+            for line in f:
+                if line.startswith((b"read_bytes:", b"write_bytes:")):
+                    io += int(line.split()[1])
+    except OSError:
+        pass  # /proc/<pid>/io necesita ser el dueño: sin eso sólo CPU y RAM
+    return ticks, rss, swap, io
+
+class AppSampler:
+    """CPU %, RSS, swap y E/S de cada app registrada (sumando todo su árbol de procesos).
+
+    sample() compara contra la muestra anterior: la CPU y la E/S son tasas
+    desde entonces. Los procesos que terminaron en el medio no restan.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._prev = {}   # pid -> (ticks, io)
+        self._t = None
+
+    def sample(self):
+        """{nombre: {"cpu", "rss", "swap", "io", "procs"}} de las apps vivas."""
+        now = time.monotonic()
+        dt = (now - self._t) if self._t else None
+        self._t = now
+        prev, self._prev = self._prev, {}
+        apps = {}
+        for pid, _pgid, start, name in self.registry.entries():
+            if pid is None:
+                continue
+            stat = proc_stat(pid)
+            if not stat or stat[1] != start:
+                continue
+            app = apps.setdefault(name, {"cpu": 0.0, "rss": 0, "swap": 0, "io": 0.0, "procs": 0})
+            for p in proc_tree(pid):
+                usage = read_usage(p)
+                if usage is None:
+                    continue
+                ticks, rss, swap, io = usage
+                self._prev[p] = (ticks, io)
+                app["rss"] += rss
+                app["swap"] += swap
+                app["procs"] += 1
+                if dt and p in prev:
+                    app["cpu"] += max(0, ticks - prev[p][0]) * 100.0 / (CLK_TCK * dt)
+                    app["io"] += max(0, io - prev[p][1]) / dt
+        return apps
+
+# =========================
+# REGISTRO
+# =========================
+class ProcessRegistry:
+    """Procesos lanzados por M-OS, con su grupo, persistidos en `path`."""
+
+    def __init__(self, path=REGISTRY_PATH, reaper=None):
+        self.path = path
+        self.reaper = reaper or ChildReaper()
+
+    def spawn(self, cmd, name=None, track=True, **kwargs):
+        """Popen en sesión nueva, recogido al terminar y (con track) registrado."""
+        proc = subprocess.Popen(cmd, start_new_session=True, **kwargs)
+        self.reaper.watch(proc)
+        if track:
+            self.add(proc.pid, name or os.path.basename(cmd[0]))
+        return proc
+
+    def add(self, pid, name):
+        stat = proc_stat(pid)
+        if stat is None:
+            return False
+        line = f"{pid} {stat[0]} {stat[1]} {name}\n"
+        # Una sola escritura con O_APPEND: no se mezcla con otros register_app
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try: os.write(fd, line.encode())
+        finally: os.close(fd)
+        return True
+
+    def entries(self):
+        """[(pid, pgid, inicio, nombre)]; en las líneas viejas pid/pgid/inicio son None."""
+        try:
+            with open(self.path, "r") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return []
+        out = []
+        for line in lines:
+            parts = line.split(None, 3)
+            if len(parts) == 4 and all(p.isdigit() for p in parts[:3]):
+                out.append((int(parts[0]), int(parts[1]), int(parts[2]), parts[3]))
+            elif line.strip():
+                out.append((None, None, None, line.strip()))
+        return out
+
+    def clear(self):
+        try: os.remove(self.path)
+        except FileNotFoundError: pass
+
+    # --- cierre ---
+    def targets(self, names=()):
+        """Qué cerrar: ([("group", pgid) | ("pid", pid)], [comandos de cierre])."""
+        own = {os.getpid(), os.getpgrp()}
+        targets, stops, by_name = [], [], set(names)
+        for pid, pgid, start, name in self.entries():
+            stop = next((cmd for key, cmd in STOP_COMMANDS.items() if key in name.lower()), None)
+            if stop:
+                if stop not in stops: stops.append(stop)
+            elif pid is None:
+                by_name.add(name)
+            else:
+                stat = proc_stat(pid)
+                # Sólo si sigue vivo y es el mismo proceso (el pid pudo reciclarse)
+                if stat and stat[1] == start and pgid not in own and ("group", pgid) not in targets:
+                    targets.append(("group", pgid))
+        if by_name:
+            for pid in find_by_name(by_name):
+                if pid not in own:
+                    targets.append(("pid", pid))
+        return targets, stops
+
+    def terminate_all(self, names=(), timeout=TERM_TIMEOUT):
+        """Cierra todo lo registrado (y los procesos llamados `names`) en paralelo.
+
+        Devuelve un resumen: {"targets", "killed", "elapsed"}.
+        """
+        t0 = time.monotonic()
+        targets, stops = self.targets(names)
+        waits = {}  # pidfd -> target
+        for target in targets:
+            # El pidfd se abre antes de la señal: sin carrera con un pid reciclado
+            fd = _pidfd(target[1])
+            if _signal(target, signal.SIGTERM) and fd is not None:
+                waits[fd] = target
+            elif fd is not None:
+                os.close(fd)
+        stoppers = []
+        for cmd in stops:
+            try: stoppers.append(subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+            except OSError as e: print(f"[Procs] {cmd[0]}: {e}")
+
+        deadline = t0 + timeout
+        poller = select.poll()
+        for fd in waits:
+            poller.register(fd, select.POLLIN)
+        try:
+            while waits:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                for fd, _ in poller.poll(left * 1000):
+                    poller.unregister(fd)
+                    os.close(fd)
+                    waits.pop(fd, None)
+        finally:
+            for fd in waits:
+                os.close(fd)
+
+        # Muerto el líder pueden quedar otros procesos del grupo: se les da el mismo plazo
+        alive = [t for t in targets if _alive(t)]
+        while alive and time.monotonic() < deadline:
+            time.sleep(GROUP_POLL)
+            alive = [t for t in alive if _alive(t)]
+        killed = [t for t in alive if _signal(t, signal.SIGKILL)]
+
+        for proc in stoppers:
+            try: proc.wait(max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired: proc.kill()
+        self.clear()
+        return {"targets": len(targets) + len(stops), "killed": len(killed),
+                "elapsed": round(time.monotonic() - t0, 3)}
+
+# =========================
+# CLI
+# =========================
+def main(argv):
+    """mos_procs.py close [nombre...] | list"""
+    reg = ProcessRegistry()
+    if len(argv) > 1 and argv[1] == "close":
+        print(reg.terminate_all(names=argv[2:]))
+        return 0
+    if len(argv) > 1 and argv[1] == "list":
+        for entry in reg.entries():
+            print(*entry)
+        return 0
+    print(main.__doc__)
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
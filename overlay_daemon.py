@@ -3,11 +3,20 @@
 
 import os
 import sys
+import json
 import time
-import socket
+import ctypes
+import fcntl
+import random
+import signal
+import struct
 import subprocess
 from pathlib import Path
 
+import mos_control
+import mos_eventbus as bus
+import mos_inotify
+
 try:
     from evdev import InputDevice, ecodes, list_devices
     import selectors
@@ -20,26 +29,34 @@ except ImportError:
 # =========================
 BASE_DIR = Path(__file__).resolve().parent
 OVERLAY_SCRIPT = BASE_DIR / "menu_overlay.py"
-SOCK_PATH = "/tmp/mos_overlay.sock"
+CONFIG_PATH = BASE_DIR / "config.json"
+SOCK_PATH = mos_control.SOCK_PATH
 
 # =========================
 # CONFIG
 # =========================
-COOLDOWN = 0.8          # anti doble-trigger
-RESCAN_EVERY = 5.0      # reescanea /dev/input por si reconectás el joystick
+COOLDOWN = 0.8          # anti doble-trigger (si config.json no trae trigger.cooldown_ms)
+RESCAN_EVERY = 5.0      # sólo si no hay inotify: reescanea /dev/input por si reconectás el joystick
+INPUT_DIR = "/dev/input"
 DEBUG_KEYS = False      # ponelo True si querés ver qué llega
 GRAB_DEVICES = False    # dejalo False para no interferir con ES-DE/Steam
+SUPERVISE_OVERLAY = True  # el daemon escucha el socket y mantiene un overlay precargado
+RESPAWN_BACKOFF_MAX = 30.0  # s de espera máxima entre relanzamientos si el overlay se cae en loop
+OVERLAY_HEALTHY_AFTER = 10.0  # s vivo para considerar que arrancó bien (resetea el backoff)
 
 # =========================
 # COMBOS
 # =========================
+# Por defecto (si config.json no trae la sección "trigger"):
 # DualShock / PS Controller:
 # SHARE  = BTN_SELECT (314)
 # OPTIONS= BTN_START  (315)
-JOY_COMBO = {ecodes.BTN_SELECT, ecodes.BTN_START}
-
-# Teclado:
-KEY_COMBO = {ecodes.KEY_LEFTCTRL, ecodes.KEY_M}
+# Teclado: CTRL + M
+DEFAULT_TRIGGER = {
+    "cooldown_ms": int(COOLDOWN * 1000),
+    "keyboard": {"enabled": True, "hold_keys": ["KEY_LEFTCTRL"], "tap_key": "KEY_M"},
+    "joystick": {"enabled": True, "hold_buttons": ["BTN_SELECT"], "tap_button": "BTN_START"},
+}
 
 # =========================
 # HELPERS
@@ -72,80 +89,462 @@ def is_gamepad(dev: InputDevice) -> bool:
         return False
 
 def is_keyboard(dev: InputDevice) -> bool:
-    """Detecta si el dispositivo es un teclado capaz de hacer el combo."""
+    """Detecta si el dispositivo es un teclado capaz de hacer algún combo."""
     try:
         caps = dev.capabilities(verbose=False)
         if ecodes.EV_KEY not in caps:
             return False
         keys = set(caps.get(ecodes.EV_KEY, []))
-        
-        # Verificamos si tiene las teclas necesarias para el combo
+
+        # Verificamos si tiene todas las teclas de algún combo
         # Esto evita agarrar mouses o botones de encendido
-        if ecodes.KEY_M in keys and ecodes.KEY_LEFTCTRL in keys:
-            return True
-            
-        return False
+        return ENGINE.can_trigger(keys)
     except Exception:
         return False
 
-def combo_match(pressed_codes: set[int], combo_codes: set[int]) -> bool:
-    return combo_codes.issubset(pressed_codes)
+def load_config() -> dict:
+    try:
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"[Daemon] config.json inválido ({e}); uso valores por defecto.")
+        return {}
+
+# =========================
+# MOTOR DE COMBOS
+# =========================
+class Combo:
+    __slots__ = ("name", "hold", "tap", "command", "cooldown", "hold_mask", "last_fire")
+
+    def __init__(self, name, hold, tap, command, cooldown):
+        self.name = name
+        self.hold = hold          # códigos que hay que mantener
+        self.tap = tap            # código que dispara (con los hold ya apretados)
+        self.command = command    # "toggle" o lista argv
+        self.cooldown = cooldown  # segundos
+        self.hold_mask = 0
+        self.last_fire = 0.0
+
+    def describe(self):
+        return " + ".join(code_name(c) for c in self.hold) + f" -> {code_name(self.tap)}"
+
+def compile_trigger(trigger: dict) -> list[Combo]:
+    """Convierte la sección "trigger" de config.json en combos.
+
+    Además de "keyboard"/"joystick" acepta una lista "combos" con
+    {"name", "hold": [...], "tap": "...", "command": "toggle" | [argv], "cooldown_ms"}.
+    """
+    cooldown = trigger.get("cooldown_ms", COOLDOWN * 1000) / 1000.0
+    specs = []
+    kb = trigger.get("keyboard", {})
+    if kb.get("enabled", True) and kb.get("tap_key"):
+        specs.append({"name": "keyboard", "hold": kb.get("hold_keys", []), "tap": kb["tap_key"]})
+    joy = trigger.get("joystick", {})
+    if joy.get("enabled", True) and joy.get("tap_button"):
+        specs.append({"name": "joystick", "hold": joy.get("hold_buttons", []), "tap": joy["tap_button"]})
+    specs.extend(trigger.get("combos", []))
+
+    combos = []
+    for spec in specs:
+        try:
+            hold = [ecodes.ecodes[n] for n in spec.get("hold", [])]
+            tap = ecodes.ecodes[spec["tap"]]
+        except KeyError as e:
+            print(f"[Daemon] Combo {spec.get('name', '?')} ignorado: código desconocido {e}")
+            continue
+        combos.append(Combo(
+            spec.get("name", spec["tap"]), hold, tap,
+            spec.get("command", "toggle"),
+            spec.get("cooldown_ms", cooldown * 1000) / 1000.0,
+        ))
+    return combos
+
+class ComboEngine:
+    """Combos compilados a máscaras de bits con estado por dispositivo.
+
+    Cada código usado en algún combo recibe un bit. Cada dispositivo tiene su
+    propio entero de teclas apretadas, así que lo que se mantiene en un mando
+    no se mezcla con otro y desaparece al desconectarlo. feed() hace una
+    búsqueda en dict y una comparación de máscara: O(1) por EV_KEY.
+    """
+
+    def __init__(self, combos: list[Combo]):
+        self.combos = combos
+        self.bits: dict[int, int] = {}
+        self.by_tap: dict[int, tuple] = {}
+        self.state: dict[object, int] = {}
+        for combo in combos:
+            for code in (*combo.hold, combo.tap):
+                self.bits.setdefault(code, 1 << len(self.bits))
+            combo.hold_mask = 0
+            for code in combo.hold:
+                combo.hold_mask |= self.bits[code]
+        for combo in combos:
+            self.by_tap[combo.tap] = self.by_tap.get(combo.tap, ()) + (combo,)
+
+    @property
+    def codes(self) -> set[int]:
+        return set(self.bits)
+
+    def can_trigger(self, keys: set[int]) -> bool:
+        return any(set(c.hold).issubset(keys) and c.tap in keys for c in self.combos)
+
+    def feed(self, dev_key, code: int, value: int, now: float):
+        """Procesa un EV_KEY. Devuelve el Combo disparado o None."""
+        bit = self.bits.get(code)
+        if bit is None:
+            return None
+        st = self.state.get(dev_key, 0)
+        fired = None
+        if value == 1:
+            for combo in self.by_tap.get(code, ()):
+                # hold-then-tap: los hold tienen que estar apretados ANTES del tap
+                if st & combo.hold_mask == combo.hold_mask and (now - combo.last_fire) > combo.cooldown:
+                    combo.last_fire = now
+                    fired = combo
+                    break
+            st |= bit
+        elif value == 0:
+            st &= ~bit
+        # value == 2 (autorepeat) no cambia el estado
+        self.state[dev_key] = st
+        return fired
+
+    def drop(self, dev_key):
+        """Olvida el estado de un dispositivo desconectado."""
+        self.state.pop(dev_key, None)
+
+ENGINE = ComboEngine(compile_trigger(load_config().get("trigger", DEFAULT_TRIGGER)))
+
+def run_combo(combo: Combo, trace: dict | None = None):
+    if combo.command == "toggle":
+        send_toggle_command(trace)
+        return
+    try:
+        subprocess.Popen(combo.command, start_new_session=True)
+    except Exception as e:
+        print(f"[Daemon] Falló el comando de {combo.name}: {e}")
+
+# Conexión persistente al overlay: un combo no paga connect() ni accept()
+CONTROL = mos_control.ControlClient(SOCK_PATH)
 
-def send_toggle_command():
-    """Si el menú está abierto, manda toggle por socket; si no, lo lanza."""
-    if os.path.exists(SOCK_PATH):
+def send_toggle_command(trace: dict | None = None):
+    """Manda toggle al overlay sin esperar el ack (el loop de eventos no se frena).
+
+    `trace` lleva los tiempos (CLOCK_MONOTONIC) desde la tecla, para medir la
+    latencia de apertura en el overlay.
+    """
+    trace = dict(trace or {}, t_sent=time.monotonic())
+    try:
+        CONTROL.send("toggle", trace=trace)
+    except OSError as e:
+        print(f"[Daemon] No pude hablar con el overlay: {e}")
+
+# =========================
+# OVERLAY (ACTIVACIÓN POR SOCKET)
+# =========================
+class OverlaySupervisor:
+    """Escucha el socket de control y mantiene menu_overlay.py precargado.
+
+    El overlay hereda el socket ya escuchando (LISTEN_FDS, como systemd), así
+    que lo que llegue mientras arranca o se relanza queda en el backlog del
+    kernel y se atiende apenas está listo: el primer combo nunca se pierde.
+    El overlay arranca oculto (withdraw), así que mostrarlo es un toggle tibio.
+    `on_gone()` se llama cada vez que el overlay termina (a propósito o no).
+    """
+
+    def __init__(self, selector, on_gone=None):
+        self.selector = selector
+        self.on_gone = on_gone
+        self.listener = None
+        self.proc = None
+        self.pidfd = None
+        self.started_at = 0.0
+        self.failures = 0
+        self.respawn_at = None
+
+    def start(self) -> bool:
+        try:
+            self.listener = mos_control.bind_listener(SOCK_PATH)
+        except OSError as e:
+            # Otro overlay (lanzado a mano o por un daemon anterior) ya atiende el socket
+            print(f"[Daemon] No superviso el overlay: {e}")
+            return False
+        self.spawn()
+        return True
+
+    def spawn(self):
+        self.respawn_at = None
+        fd = self.listener.fileno()
         try:
-            s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            s.connect(SOCK_PATH)
-            s.sendall(b"toggle\n")
-            s.close()
+            self.proc = subprocess.Popen(
+                [sys.executable, str(OVERLAY_SCRIPT)], cwd=str(BASE_DIR),
+                pass_fds=(fd,), env=mos_control.listener_env(fd),
+            )
+        except OSError as e:
+            print(f"[Daemon] No pude lanzar el overlay: {e}")
+            self._schedule_respawn()
             return
-        except Exception:
-            pass
+        self.started_at = time.monotonic()
+        print(f"[Daemon] Overlay precargado (pid {self.proc.pid}).")
+        try:
+            self.pidfd = os.pidfd_open(self.proc.pid)
+            self.selector.register(self.pidfd, selectors.EVENT_READ, "overlay")
+        except (AttributeError, OSError):
+            self.pidfd = None  # sin pidfd: se revisa en tick()
+
+    def on_exit(self):
+        """El overlay terminó: recogerlo y agendar el relanzamiento."""
+        if self.pidfd is not None:
+            try: self.selector.unregister(self.pidfd)
+            except Exception: pass
+            os.close(self.pidfd)
+            self.pidfd = None
+        code = self.proc.wait()
+        self.proc = None
+        print(f"[Daemon] El overlay terminó (código {code}).")
+        if self.on_gone:
+            self.on_gone()
+        if code == mos_control.EXIT_ALREADY_RUNNING:
+            # Otro overlay tiene el lock: relanzar en loop no sirve, se reintenta con el backoff máximo
+            self.respawn_at = time.monotonic() + RESPAWN_BACKOFF_MAX
+            return
+        if time.monotonic() - self.started_at >= OVERLAY_HEALTHY_AFTER:
+            self.failures = 0
+        self._schedule_respawn()
+
+    def _schedule_respawn(self):
+        delay = min(RESPAWN_BACKOFF_MAX, 0.5 * (2 ** self.failures)) if self.failures else 0.0
+        self.failures += 1
+        self.respawn_at = time.monotonic() + delay
+
+    def timeout(self):
+        """Segundos hasta que tick() tenga algo que hacer (None: nada pendiente)."""
+        if self.respawn_at is not None:
+            return max(0.0, self.respawn_at - time.monotonic())
+        if self.proc is not None and self.pidfd is None:
+            return 1.0
+        return None
+
+    def tick(self):
+        if self.proc is not None and self.pidfd is None and self.proc.poll() is not None:
+            self.on_exit()
+        if self.respawn_at is not None and time.monotonic() >= self.respawn_at:
+            self.spawn()
+
+# Veredicto de clasificación por identidad de dispositivo (vendor/product/phys...).
+# Un mando que se reconecta no vuelve a pasar por las consultas de capacidades,
+# y un dispositivo ya rechazado ni siquiera se abre.
+# Valores: "gamepad", "keyboard" o "" (rechazado).
+CLASS_CACHE: dict[tuple, str] = {}
+
+def device_identity(path: str):
+    """Identidad estable del nodo leída de sysfs, sin abrir el device."""
+    base = Path("/sys/class/input", os.path.basename(path), "device")
+    parts = []
+    for f in ("id/bustype", "id/vendor", "id/product", "id/version", "phys", "uniq", "name"):
+        try:
+            parts.append((base / f).read_text().strip())
+        except OSError:
+            parts.append("")
+    return tuple(parts) if any(parts) else None
+
+def classify(dev: InputDevice) -> str:
+    # AHORA ACEPTAMOS GAMEPAD O TECLADO
+    if is_gamepad(dev):
+        return "gamepad"
+    if is_keyboard(dev):
+        return "keyboard"
+    return ""
+
+def probe_device(path: str):
+    """(InputDevice, tipo) si es gamepad o teclado con combo; si no, (None, "")."""
+    ident = device_identity(path)
+    kind = CLASS_CACHE.get(ident) if ident else None
+    if kind == "":
+        return None, ""
+    try:
+        d = InputDevice(path)
+    except Exception:
+        return None, ""
+    if kind is None:
+        kind = classify(d)
+        if ident:
+            CLASS_CACHE[ident] = kind
+    if not kind:
+        try: d.close()
+        except: pass
+        return None, ""
+    return d, kind
 
-def scan_devices():
+def scan_devices(skip=()):
     found = []
     try:
         for path in list_devices():
-            try:
-                d = InputDevice(path)
-                # AHORA ACEPTAMOS GAMEPAD O TECLADO
-                if is_gamepad(d) or is_keyboard(d):
-                    found.append(d)
-                else:
-                    try: d.close()
-                    except: pass
-            except Exception:
-                pass
+            if path in skip:
+                continue
+            d, kind = probe_device(path)
+            if d:
+                found.append((d, kind))
     except Exception:
         pass
     return found
 
+def open_hotplug_watch():
+    """inotify sobre /dev/input. Si no se puede, se vuelve al rescan periódico."""
+    try:
+        ino = mos_inotify.Inotify()
+        # CREATE: aparece el nodo; ATTRIB: udev le pone permisos (recién ahí se puede abrir)
+        ino.add_watch(INPUT_DIR, mos_inotify.IN_CREATE | mos_inotify.IN_ATTRIB | mos_inotify.IN_DELETE)
+        return ino
+    except OSError as e:
+        print(f"[Daemon] Sin inotify ({e}); reescaneo cada {RESCAN_EVERY}s.")
+        return None
+
+# =========================
+# FILTRO EN EL KERNEL (EVIOCSMASK)
+# =========================
+# Con la máscara puesta el kernel descarta lo que no nos interesa (ejes
+# analógicos, EV_MSC, botones que no son de ningún combo) y ni siquiera nos
+# despierta: un SYN_REPORT con el paquete vacío no se entrega.
+EVIOCSMASK = 0x40104593              # _IOW('E', 0x93, struct input_mask), kernel >= 4.4
+EVIOCSCLOCKID = 0x400445a0           # _IOW('E', 0xa0, int)
+CLOCK_MONOTONIC = 1
+EV_CNT, KEY_CNT, ABS_CNT = 0x20, 0x300, 0x40
+_INPUT_MASK = struct.Struct("IIQ")   # type, codes_size, codes_ptr
+
+NAV_KEYS = frozenset((bus.BTN_SOUTH, bus.BTN_EAST, bus.BTN_TL, bus.BTN_TR))
+NAV_AXES = frozenset((bus.ABS_X, bus.ABS_Y, bus.ABS_HAT0X, bus.ABS_HAT0Y))
+
+def _set_mask(fd: int, etype: int, codes, count: int):
+    bits = bytearray(((count + 63) // 64) * 8)  # bitmap de unsigned long (little endian)
+    for code in codes:
+        if code < count:
+            bits[code // 8] |= 1 << (code % 8)
+    buf = ctypes.create_string_buffer(bytes(bits), len(bits))
+    fcntl.ioctl(fd, EVIOCSMASK, _INPUT_MASK.pack(etype, len(bits), ctypes.addressof(buf)))
+
+def use_monotonic_clock(dev: InputDevice) -> bool:
+    """Timestamps de eventos en CLOCK_MONOTONIC (comparables con time.monotonic())."""
+    try:
+        fcntl.ioctl(dev.fd, EVIOCSCLOCKID, struct.pack("i", CLOCK_MONOTONIC))
+        return True
+    except OSError:
+        return False
+
+def apply_event_mask(dev: InputDevice, keys, axes=()) -> bool:
+    """Que el kernel sólo entregue EV_KEY de `keys` y EV_ABS de `axes`.
+
+    Devuelve False si el kernel no soporta EVIOCSMASK; en ese caso el filtrado
+    queda del lado nuestro (lecturas en lote, ver bus.read_batch).
+    """
+    try:
+        _set_mask(dev.fd, ecodes.EV_KEY, keys, KEY_CNT)
+        _set_mask(dev.fd, ecodes.EV_ABS, axes, ABS_CNT)
+        # Máscara de tipos al final: mientras tanto no se pierde nada de lo que sí va
+        _set_mask(dev.fd, 0, (ecodes.EV_KEY, ecodes.EV_ABS) if axes else (ecodes.EV_KEY,), EV_CNT)
+        return True
+    except OSError:
+        return False
+
+class DeviceStats:
+    """Eventos recibidos vs. relevantes de un dispositivo (para medir el filtro).
+
+    No cuenta SYN_REPORT: el kernel nunca los filtra.
+    """
+    __slots__ = ("name", "kind", "masked", "monotonic", "reads", "received", "relevant")
+
+    def __init__(self, name: str, kind: str):
+        self.name, self.kind = name, kind
+        self.masked = False
+        self.monotonic = False  # timestamps del kernel en CLOCK_MONOTONIC
+        self.reads = self.received = self.relevant = 0
+
+    def describe(self) -> str:
+        pct = 100.0 * self.relevant / self.received if self.received else 100.0
+        filtro = "kernel" if self.masked else "userspace"
+        return (f"{self.name} [{self.kind}]: {self.received} recibidos, {self.relevant} relevantes "
+                f"({pct:.0f}%), {self.reads} lecturas, filtro {filtro}")
+
 # =========================
 # MAIN
 # =========================
 def main():
     print("[Daemon] M-OS overlay daemon activo.")
-    print("[Daemon] Combo Joystick:", " + ".join(code_name(c) for c in sorted(JOY_COMBO)))
-    print("[Daemon] Combo Teclado :", " + ".join(code_name(c) for c in sorted(KEY_COMBO)))
+    for combo in ENGINE.combos:
+        print(f"[Daemon] Combo {combo.name}: {combo.describe()}")
 
     selector = selectors.DefaultSelector()
     devices_by_path: dict[str, InputDevice] = {}
+    gamepads: dict[str, bus.NavNormalizer] = {}
+    stats: dict[str, DeviceStats] = {}
+    combo_codes = frozenset(ENGINE.codes)
+    record = open(sys.argv[sys.argv.index("--record") + 1], "a") if "--record" in sys.argv else None
+    # Para depurar o grabar hace falta ver todas las teclas: sin filtro
+    see_all = DEBUG_KEYS or record is not None
 
-    pressed: set[int] = set()
-    last_fire = 0.0
     last_scan = 0.0
 
-    def register_device(dev: InputDevice):
+    # Bus de navegación hacia el overlay: somos el único lector de los mandos
+    ring = bus.EventRing(writer=True)
+    bell = bus.bind_bell(bus.DAEMON_BELL)
+    selector.register(bell.fileno(), selectors.EVENT_READ, "bell")
+    overlay_visible = False
+
+    def set_grab(dev: InputDevice, grab: bool):
+        try:
+            if grab: dev.grab()
+            else: dev.ungrab()
+        except Exception:
+            pass
+
+    def update_mask(dev: InputDevice):
+        if see_all:
+            return
+        # Oculto: sólo los códigos de los combos. Visible: también la navegación del mando
+        if dev.path in gamepads and overlay_visible:
+            masked = apply_event_mask(dev, combo_codes | NAV_KEYS, NAV_AXES)
+        else:
+            masked = apply_event_mask(dev, combo_codes)
+        stats[dev.path].masked = masked
+
+    def report_stats(*_):
+        for st in stats.values():
+            print(f"[Daemon] {st.describe()}")
+
+    def set_overlay_visible(visible: bool):
+        nonlocal overlay_visible
+        overlay_visible = visible
+        # Con el overlay visible los mandos son sólo nuestros (como hacía el overlay)
+        for path in gamepads:
+            update_mask(devices_by_path[path])
+            if not GRAB_DEVICES:
+                set_grab(devices_by_path[path], visible)
+
+    def on_bell():
+        for msg in bus.drain_bell(bell):
+            if msg in (bus.BELL_SHOW, bus.BELL_HIDE):
+                set_overlay_visible(msg == bus.BELL_SHOW)
+
+    def on_overlay_gone():
+        # Si se cayó con el menú abierto no va a mandar BELL_HIDE: devolverle los mandos al juego
+        if overlay_visible:
+            set_overlay_visible(False)
+
+    def register_device(dev: InputDevice, kind: str):
         if dev.path in devices_by_path:
             return
         devices_by_path[dev.path] = dev
         try:
-            if GRAB_DEVICES:
-                try:
-                    dev.grab()
-                except Exception:
-                    pass
+            if kind == "gamepad":
+                gamepads[dev.path] = bus.NavNormalizer(bus.axis_ranges(dev))
+            stats[dev.path] = DeviceStats(dev.name, kind)
+            stats[dev.path].monotonic = use_monotonic_clock(dev)
+            update_mask(dev)
+            if GRAB_DEVICES or (overlay_visible and kind == "gamepad"):
+                set_grab(dev, True)
             selector.register(dev.fd, selectors.EVENT_READ, dev)
             print(f"[Daemon] -> Escuchando: {dev.name} ({dev.path})")
         except Exception as e:
@@ -153,6 +552,8 @@ def main():
             try: dev.close()
             except: pass
             devices_by_path.pop(dev.path, None)
+            gamepads.pop(dev.path, None)
+            stats.pop(dev.path, None)
 
     def unregister_device(dev: InputDevice):
         try: selector.unregister(dev.fd)
@@ -160,59 +561,202 @@ def main():
         try: dev.close()
         except: pass
         devices_by_path.pop(dev.path, None)
+        gamepads.pop(dev.path, None)
+        ENGINE.drop(dev.path)
         print(f"[Daemon] Dispositivo desconectado: {dev.name} ({dev.path})")
+        st = stats.pop(dev.path, None)
+        if st:
+            print(f"[Daemon] {st.describe()}")
+
+    def on_hotplug():
+        for _, mask, name in hotplug.read_events():
+            if not name.startswith("event"):
+                continue
+            path = os.path.join(INPUT_DIR, name)
+            if mask & mos_inotify.IN_DELETE:
+                dev = devices_by_path.get(path)
+                if dev:
+                    unregister_device(dev)
+            elif path not in devices_by_path:
+                d, kind = probe_device(path)
+                if d:
+                    register_device(d, kind)
+
+    # Hotplug por inotify (registrado en el mismo selector) antes del primer scan,
+    # así no se pierde nada que aparezca en el medio
+    hotplug = open_hotplug_watch()
+    if hotplug:
+        selector.register(hotplug.fileno(), selectors.EVENT_READ, "hotplug")
 
     # Primer scan
-    for d in scan_devices():
-        register_device(d)
+    for d, kind in scan_devices():
+        register_device(d, kind)
+    last_scan = time.time()
+
+    # Si el overlay ya estaba corriendo, que nos vuelva a decir si está visible
+    bus.ring_bell(bell, bus.OVERLAY_BELL, bus.BELL_HELLO)
+
+    supervisor = OverlaySupervisor(selector, on_gone=on_overlay_gone)
+    if not (SUPERVISE_OVERLAY and supervisor.start()):
+        supervisor = None
 
     if not devices_by_path:
         print("[Daemon] OJO: no detecté dispositivos compatibles (permisos o no conectados).")
 
-    while True:
-        now = time.time()
+    # kill -USR1 <pid>: recibidos vs. relevantes por dispositivo
+    signal.signal(signal.SIGUSR1, report_stats)
 
-        # Re-scan periódico
-        if (now - last_scan) >= RESCAN_EVERY:
-            last_scan = now
-            for d in scan_devices():
-                register_device(d)
+    while True:
+        # Re-scan periódico sólo como fallback sin inotify
+        if not hotplug and (time.time() - last_scan) >= RESCAN_EVERY:
+            last_scan = time.time()
+            for d, kind in scan_devices(skip=devices_by_path):
+                register_device(d, kind)
 
         # Leer eventos
         try:
-            events = selector.select(timeout=1.0)
+            timeouts = [t for t in (None if hotplug else RESCAN_EVERY,
+                                    supervisor.timeout() if supervisor else None) if t is not None]
+            events = selector.select(timeout=min(timeouts) if timeouts else None)
         except Exception:
             continue
 
+        if supervisor:
+            supervisor.tick()
+
         for key, _ in events:
+            if key.data == "hotplug":
+                on_hotplug()
+                continue
+            if key.data == "overlay":
+                supervisor.on_exit()
+                continue
+            if key.data == "bell":
+                on_bell()
+                continue
             dev: InputDevice = key.data
+            nav = gamepads.get(dev.path) if overlay_visible else None
+            st = stats[dev.path]
+            frames = 0
             try:
-                for event in dev.read():
-                    if event.type != ecodes.EV_KEY:
+                reads, batch = bus.read_batch(dev.fd)
+                t_read = time.monotonic()
+                st.reads += reads
+                for sec, usec, etype, code, value in batch:
+                    if etype == ecodes.EV_SYN:
+                        if nav is None:
+                            continue
+                    else:
+                        st.received += 1
+                        if etype == ecodes.EV_KEY:
+                            relevant = see_all or code in combo_codes or (nav is not None and code in NAV_KEYS)
+                        else:
+                            relevant = etype == ecodes.EV_ABS and nav is not None and code in NAV_AXES
+                        if not relevant:
+                            continue  # sin máscara en el kernel: se descarta acá, sin más trabajo
+                        st.relevant += 1
+
+                    if nav:
+                        res = nav.feed(etype, code, value)
+                        if res is not None:
+                            ring.publish(res[0], sec + usec / 1e6, res[1], dev.fd)
+                            frames += res[0] == bus.NAV_SYN
+
+                    if etype != ecodes.EV_KEY:
                         continue
 
                     # 1=down, 0=up, 2=hold
-                    if event.value == 1:
-                        pressed.add(event.code)
-                        if DEBUG_KEYS:
-                            print(f"[DBG] DOWN {dev.name}: {code_name(event.code)} ({event.code})")
-                    elif event.value == 0:
-                        if DEBUG_KEYS:
-                            print(f"[DBG] UP    {dev.name}: {code_name(event.code)} ({event.code})")
-                        pressed.discard(event.code)
-
-                    # Chequear combos con cooldown
-                    now2 = time.time()
-                    if (now2 - last_fire) > COOLDOWN:
-                        if combo_match(pressed, JOY_COMBO) or combo_match(pressed, KEY_COMBO):
-                            send_toggle_command()
-                            last_fire = now2
-                            pressed.clear()
+                    if DEBUG_KEYS and value in (0, 1):
+                        state = "DOWN" if value else "UP  "
+                        print(f"[DBG] {state} {dev.name}: {code_name(code)} ({code})")
+                    if record:
+                        record.write(f"{dev.path}\t{code}\t{value}\n")
+
+                    combo = ENGINE.feed(dev.path, code, value, t_read)
+                    if combo:
+                        trace = {"t_read": t_read}
+                        if st.monotonic:
+                            trace["t_event"] = sec + usec / 1e6
+                        run_combo(combo, trace)
+
+                if frames:
+                    bus.ring_bell(bell, bus.OVERLAY_BELL)
 
             except OSError:
                 unregister_device(dev)
             except Exception:
                 pass
 
+# =========================
+# BENCHMARK
+# =========================
+def load_recording(path: str) -> list[tuple]:
+    """Lee un stream grabado con --record (dev, code, value por línea)."""
+    events = []
+    with open(path, "r") as f:
+        for line in f:
+            dev, code, value = line.rstrip("\n").split("\t")
+            events.append((dev, int(code), int(value)))
+    return events
+
+def synthetic_stream(n: int = 200_000, devices: int = 4) -> list[tuple]:
+    """Stream sintético: mucho ruido de botones + algún combo de vez en cuando."""
+    rng = random.Random(1234)
+    noise = [ecodes.BTN_SOUTH, ecodes.BTN_EAST, ecodes.BTN_NORTH, ecodes.BTN_WEST,
+             ecodes.BTN_TL, ecodes.BTN_TR, ecodes.KEY_A, ecodes.KEY_SPACE]
+    events = []
+    while len(events) < n:
+        dev = f"/dev/input/event{rng.randrange(devices)}"
+        if rng.random() < 0.01 and ENGINE.combos:
+            combo = rng.choice(ENGINE.combos)
+            seq = [(c, 1) for c in combo.hold] + [(combo.tap, 1), (combo.tap, 0)] + [(c, 0) for c in combo.hold]
+        else:
+            code = rng.choice(noise)
+            seq = [(code, 1), (code, 0)]
+        events.extend((dev, code, value) for code, value in seq)
+    return events
+
+def bench(path: str | None = None, rounds: int = 5):
+    events = load_recording(path) if path else synthetic_stream()
+    print(f"[Bench] {len(events)} eventos EV_KEY ({'grabados: ' + path if path else 'sintéticos'}), {len(ENGINE.combos)} combos")
+
+    # Referencia: el esquema anterior (set global + issubset por evento)
+    legacy = [set(c.hold) | {c.tap} for c in ENGINE.combos]
+    def run_legacy():
+        pressed, fired = set(), 0
+        for _dev, code, value in events:
+            if value == 1: pressed.add(code)
+            elif value == 0: pressed.discard(code)
+            for combo in legacy:
+                if combo.issubset(pressed):
+                    fired += 1
+                    pressed.clear()
+                    break
+        return fired
+
+    engine = ComboEngine(compile_trigger(load_config().get("trigger", DEFAULT_TRIGGER)))
+    def run_engine():
+        engine.state.clear()
+        for c in engine.combos: c.cooldown, c.last_fire = 0.0, 0.0
+        feed, fired, now = engine.feed, 0, 1.0
+        for dev, code, value in events:
+            now += 0.001
+            if feed(dev, code, value, now):
+                fired += 1
+        return fired
+
+    for name, fn in (("legacy set", run_legacy), ("bitmask", run_engine)):
+        best = None
+        for _ in range(rounds):
+            t0 = time.perf_counter_ns()
+            fired = fn()
+            dt = time.perf_counter_ns() - t0
+            best = dt if best is None else min(best, dt)
+        print(f"[Bench] {name:<10}: {best / len(events):7.1f} ns/evento, {fired} disparos")
+
 if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        i = sys.argv.index("--bench")
+        bench(sys.argv[i + 1] if i + 1 < len(sys.argv) else None)
+        sys.exit()
     main()
\ No newline at end of file
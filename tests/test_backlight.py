@@ -0,0 +1,77 @@
+import queue
+
+import menu_overlay as mo
+
+
+def make_backlight(root, name, kind="raw", max_brightness=1000, brightness=500):
+    path = root / "class" / "backlight" / name
+    path.mkdir(parents=True)
+    (path / "type").write_text(kind + "\n")
+    (path / "max_brightness").write_text(f"{max_brightness}\n")
+    (path / "brightness").write_text(f"{brightness}\n")
+    (path / "actual_brightness").write_text(f"{brightness}\n")
+    return path
+
+
+def no_tools(_name):
+    return None
+
+
+def test_probe_prefers_firmware_then_platform_then_raw(tmp_path):
+    make_backlight(tmp_path, "acpi_video0", kind="raw")
+    make_backlight(tmp_path, "intel_backlight", kind="platform")
+    make_backlight(tmp_path, "nv_backlight", kind="firmware")
+    backend = mo.probe_backlight(str(tmp_path), which=no_tools)
+    assert backend.name == "sysfs"
+    assert backend.path.endswith("nv_backlight")
+
+
+def test_probe_without_sysfs_falls_back_to_tools(tmp_path):
+    assert mo.probe_backlight(str(tmp_path), which=no_tools) is None
+    backend = mo.probe_backlight(str(tmp_path), which=lambda n: n == "light" and "/usr/bin/light")
+    assert backend.name == "light"
+
+
+def test_probe_skips_broken_devices(tmp_path):
+    broken = make_backlight(tmp_path, "a_broken", kind="firmware")
+    (broken / "max_brightness").write_text("garbage\n")
+    make_backlight(tmp_path, "b_ok", kind="raw")
+    assert mo.probe_backlight(str(tmp_path), which=no_tools).path.endswith("b_ok")
+
+
+def test_sysfs_read_and_adjust(tmp_path):
+    path = make_backlight(tmp_path, "intel_backlight", max_brightness=2400, brightness=1200)
+    backend = mo.probe_backlight(str(tmp_path), which=no_tools)
+    assert backend.read() == 50
+    assert backend.adjust(10)
+    assert (path / "brightness").read_text() == "1440"
+    backend.adjust(-100)
+    assert int((path / "brightness").read_text()) == round(mo.BACKLIGHT_MIN_PERCENT * 2400 / 100)
+
+
+def test_read_only_sysfs_delegates_to_tool(tmp_path, monkeypatch):
+    make_backlight(tmp_path, "intel_backlight")
+    calls = []
+
+    class Tool:
+        name = "brightnessctl"
+        def adjust(self, delta):
+            calls.append(delta)
+            return True
+
+    monkeypatch.setattr(mo.os, "access", lambda path, mode: False)
+    backend = mo.SysfsBacklight(str(tmp_path / "class" / "backlight" / "intel_backlight"), writer=Tool())
+    assert backend.adjust(5) and calls == [5]
+
+
+def test_monitor_pushes_current_value(tmp_path):
+    make_backlight(tmp_path, "intel_backlight", max_brightness=100, brightness=30)
+    monitor = mo.BacklightMonitor(root=str(tmp_path))
+    got = queue.Queue()
+    monitor.add_listener(got.put)
+    monitor.start()
+    try:
+        assert got.get(timeout=2) == "Brillo: 30%"
+        assert monitor.text() == "Brillo: 30%"
+    finally:
+        monitor.stop()
@@ -0,0 +1,63 @@
+from evdev import ecodes
+
+import overlay_daemon as od
+
+SELECT, START, CTRL, KEY_M = ecodes.BTN_SELECT, ecodes.BTN_START, ecodes.KEY_LEFTCTRL, ecodes.KEY_M
+
+
+def engine(cooldown_ms=800):
+    return od.ComboEngine(od.compile_trigger(dict(od.DEFAULT_TRIGGER, cooldown_ms=cooldown_ms)))
+
+
+def replay(eng, events, t0=100.0, step=0.01):
+    """(dispositivo, código, valor) a feed(); devuelve los nombres de los combos disparados."""
+    fired = []
+    for i, (dev, code, value) in enumerate(events):
+        combo = eng.feed(dev, code, value, t0 + i * step)
+        if combo:
+            fired.append(combo.name)
+    return fired
+
+
+def test_hold_then_tap_fires():
+    eng = engine()
+    pad = [("pad", SELECT, 1), ("pad", START, 1), ("pad", START, 0), ("pad", SELECT, 0)]
+    kbd = [("kbd", CTRL, 1), ("kbd", KEY_M, 1), ("kbd", KEY_M, 0), ("kbd", CTRL, 0)]
+    assert replay(eng, pad) == ["joystick"]
+    assert replay(eng, kbd, t0=200.0) == ["keyboard"]
+
+
+def test_tap_before_hold_does_not_fire():
+    eng = engine()
+    assert replay(eng, [("pad", START, 1), ("pad", SELECT, 1), ("pad", START, 0), ("pad", SELECT, 0)]) == []
+
+
+def test_holds_do_not_mix_between_devices():
+    eng = engine()
+    assert replay(eng, [("pad0", SELECT, 1), ("pad1", START, 1)]) == []
+    eng.drop("pad0")
+    assert replay(eng, [("pad0", START, 1)], t0=200.0) == []
+
+
+def test_autorepeat_keeps_the_hold():
+    eng = engine()
+    assert replay(eng, [("kbd", CTRL, 1), ("kbd", CTRL, 2), ("kbd", CTRL, 2), ("kbd", KEY_M, 1)]) == ["keyboard"]
+
+
+def test_cooldown():
+    eng = engine(cooldown_ms=500)
+    tap = [("pad", START, 1), ("pad", START, 0)]
+    assert eng.feed("pad", SELECT, 1, 10.0) is None
+    assert replay(eng, tap, t0=10.1) == ["joystick"]
+    assert replay(eng, tap, t0=10.4) == []            # dentro del cooldown
+    assert replay(eng, tap, t0=10.7) == ["joystick"]  # ya pasó
+
+
+def test_recorded_stream(tmp_path):
+    rec = tmp_path / "keys.tsv"
+    rec.write_text("".join(f"{dev}\t{code}\t{value}\n" for dev, code, value in [
+        ("/dev/input/event3", ecodes.BTN_SOUTH, 1), ("/dev/input/event3", ecodes.BTN_SOUTH, 0),
+        ("/dev/input/event3", SELECT, 1), ("/dev/input/event3", START, 1),
+        ("/dev/input/event3", START, 0), ("/dev/input/event3", SELECT, 0),
+    ]))
+    assert replay(engine(), od.load_recording(str(rec))) == ["joystick"]
@@ -0,0 +1,86 @@
+import queue
+
+import menu_overlay as mo
+
+NM = mo.NM_BUS
+DEV = "/org/freedesktop/NetworkManager/Devices/3"
+AP1 = "/org/freedesktop/NetworkManager/AccessPoint/1"
+AP2 = "/org/freedesktop/NetworkManager/AccessPoint/2"
+HCI = "/org/bluez/hci0"
+
+
+class FakeBus:
+    """Bus D-Bus falso: propiedades fijas y señales PropertiesChanged guionadas."""
+
+    def __init__(self):
+        self.props = {
+            (DEV, f"{NM}.Device"): {"DeviceType": mo.NM_DEVICE_TYPE_WIFI},
+            (DEV, f"{NM}.Device.Wireless"): {"ActiveAccessPoint": AP1},
+            (AP1, f"{NM}.AccessPoint"): {"Ssid": b"casa", "Strength": 70},
+            (AP2, f"{NM}.AccessPoint"): {"Ssid": b"bar", "Strength": 40},
+        }
+        self.signals = queue.Queue()
+        self.matches = []
+
+    def call(self, dest, path, iface, method, signature=None, *args):
+        assert method == "GetDevices"
+        return ([DEV],)
+
+    def get_all(self, dest, path, iface):
+        return dict(self.props[(path, iface)])
+
+    def managed_objects(self, dest):
+        return {HCI: {"org.bluez.Adapter1": {"Powered": False}}}
+
+    def add_signal_match(self, path_namespace):
+        self.matches.append(path_namespace)
+
+    def next_signal(self):
+        sig = self.signals.get()
+        if sig is None:
+            raise ConnectionError("bus cerrado")
+        return sig
+
+    def close(self):
+        self.signals.put(None)
+
+
+def test_properties_changed_updates_cache():
+    bus = FakeBus()
+    watcher = mo.NetworkWatcher(bus_factory=lambda: bus)
+    got = queue.Queue()
+    watcher.add_listener(lambda wifi, bt: got.put((wifi, bt)))
+    watcher.start()
+    try:
+        assert got.get(timeout=2) == ("Conectado a: casa (70%)", "Bluetooth: Apagado")
+        assert bus.matches == [mo.NM_PATH, "/org/bluez"]
+
+        bus.signals.put((AP1, f"{NM}.AccessPoint", {"Strength": 55}))
+        assert got.get(timeout=2)[0] == "Conectado a: casa (55%)"
+
+        bus.signals.put((DEV, f"{NM}.Device.Wireless", {"ActiveAccessPoint": AP2}))
+        assert got.get(timeout=2)[0] == "Conectado a: bar (40%)"
+
+        bus.signals.put((HCI, "org.bluez.Adapter1", {"Powered": True}))
+        assert got.get(timeout=2)[1] == "Bluetooth: Encendido"
+
+        # Una señal que no toca nada cacheado no despierta a los listeners
+        bus.signals.put((AP1, f"{NM}.AccessPoint", {"Strength": 10}))
+        bus.signals.put((DEV, f"{NM}.Device.Wireless", {"ActiveAccessPoint": "/"}))
+        assert got.get(timeout=2)[0] == "Wi-Fi: Desconectado"
+    finally:
+        watcher.stop()
+
+
+def test_stale_cache_instead_of_fork(monkeypatch):
+    watcher = mo.NetworkWatcher(bus_factory=FakeBus)
+    watcher.has_wifi = watcher.has_bt = True
+    watcher.ssid, watcher.strength, watcher.bt_powered = "casa", 70, True
+    monkeypatch.setattr(mo, "NETWORK_WATCHER", watcher)
+    monkeypatch.setattr(mo.subprocess, "check_output", lambda *a, **k: _no_fork())
+    assert mo.get_wifi_text() == "Conectado a: casa (70%)" + mo.NETWORK_STALE_MARK
+    assert mo.get_bt_text() == "Bluetooth: Encendido" + mo.NETWORK_STALE_MARK
+
+
+def _no_fork():
+    raise AssertionError("no debería forkear con el watcher vivo")
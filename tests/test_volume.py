@@ -0,0 +1,97 @@
+import queue
+import threading
+from types import SimpleNamespace
+
+import menu_overlay as mo
+
+
+class ScriptedBackend:
+    """Fuente de eventos sustituta: cada evento es el (volumen, mute) nuevo del sink."""
+
+    def __init__(self, volume=50, muted=False):
+        self.volume, self.muted = volume, muted
+        self.events = queue.Queue()
+        self.reads = 0
+        self.adjusts = []
+
+    def connect(self): pass
+    def close(self): pass
+
+    def read(self):
+        self.reads += 1
+        return self.volume, self.muted
+
+    def adjust(self, delta):
+        self.adjusts.append(delta)
+        self.volume += delta
+
+    def wait_event(self):
+        ev = self.events.get()
+        if ev is None:
+            return False  # wake()
+        self.volume, self.muted = ev
+        return True
+
+    def wake(self):
+        self.events.put(None)
+
+
+def _texts(monitor):
+    got = queue.Queue()
+    monitor.add_listener(got.put)
+    return got
+
+
+def test_events_reach_listeners():
+    backend = ScriptedBackend()
+    monitor = mo.VolumeMonitor(backend)
+    got = _texts(monitor)
+    monitor.start()
+    try:
+        assert got.get(timeout=2) == "Volumen: 50%"
+        backend.events.put((30, False))
+        backend.events.put((30, True))
+        assert got.get(timeout=2) == "Volumen: 30%"
+        assert got.get(timeout=2) == "Volumen: 30% (silencio)"
+    finally:
+        monitor.stop()
+
+
+def test_pending_adjusts_are_merged():
+    backend = ScriptedBackend()
+    monitor = mo.VolumeMonitor(backend)
+    got = _texts(monitor)
+    monitor.adjust(5)
+    monitor.adjust(5)
+    monitor.start()
+    try:
+        assert got.get(timeout=2) == "Volumen: 50%"
+        assert got.get(timeout=2) == "Volumen: 60%"
+        assert backend.adjusts == [10]
+    finally:
+        monitor.stop()
+
+
+def test_pactl_burst_is_one_batch():
+    burst = "; ".join(["echo \"Event 'change' on sink #0\""] * 20)
+    backend = mo.PactlVolumeBackend(subscribe_cmd=["sh", "-c", f"{burst}; sleep 5"])
+    backend.connect()
+    try:
+        assert backend.wait_event() is True
+        backend.wake()
+        assert backend.wait_event() is False  # la ráfaga ya se consumió entera
+    finally:
+        backend.close()
+
+
+def test_pulsectl_wake_before_listen_is_not_lost():
+    backend = mo.PulsectlVolumeBackend()
+    stops = []
+    backend.pulse = SimpleNamespace(event_listen_stop=lambda: stops.append(1))
+    backend.wake()  # llega antes de entrar al loop
+    backend._listening = True
+    idle = SimpleNamespace(fd=backend._wake_w, events=0, revents=0)
+    done = threading.Event()
+    threading.Thread(target=lambda: (backend._poll([idle], -0.001), done.set()), daemon=True).start()
+    assert done.wait(2)
+    assert stops == [1]